@@ -2,17 +2,45 @@ import re
 import streamlit as st
 import pandas as pd
 from io import BytesIO
-from docx import Document
-import pytz
+from typing import Callable
 import pandas as pd
 import streamlit as st
 
+from file_io import csv_download, read_csv_bytes
+from perf import DEFAULT_LOG_PATH, PerfLog
+from roster_calendar import DUE_DATE_RULES_2025_26, HolidayCalendar, due_dates, rotation_calendar
+from stage_cache import STAGE_CACHE, content_digest
+from student_identity import StudentIndex, psu_email, resolve_record_ids, strip_psu_email
+
 
 st.set_page_config(page_title="REDCap Formatter", layout="wide")
 st.title("🔄 REDCap Instruments Formatter")
 st.markdown("[Open REDCap Data Import](https://redcap.ctsi.psu.edu/redcap_v15.0.26/index.php?pid=18203&route=DataImportController:index)")
 
 
+def load_csv(uploaded, **kwargs) -> pd.DataFrame:
+    """pd.read_csv for an uploaded file, parsed once with a sniffed encoding that is shown in the UI.
+
+    Parses are cached by the SHA-256 of the file plus the read_csv arguments, so widget reruns reuse them.
+    """
+    raw = uploaded.getvalue()
+    df = perf.run(
+        f"parse {uploaded.name}",
+        lambda: STAGE_CACHE.get_or_compute(
+            "csv",
+            (content_digest(raw), tuple(sorted(kwargs.items()))),
+            lambda: read_csv_bytes(raw, **kwargs),
+        ),
+    )
+    st.caption(f"Read {uploaded.name} as {df.attrs['encoding']}")
+    return df
+
+
+def encode_csv(df: pd.DataFrame, encoding: str = "utf-8") -> Callable[[], bytes]:
+    """df.to_csv(index=False) as download data, encoded only when the button is clicked."""
+    return csv_download(df, encoding)
+
+
 # choose which instrument you want to format
 instrument = st.sidebar.selectbox(
     "Select instrument", 
@@ -20,6 +48,67 @@ instrument = st.sidebar.selectbox(
      "Weekly Quiz Reports", "Documentation Submission #1", "Documentation Submission #2", "Practical Exam Codes #1", "Practical Exam Codes #2","Open PCAPs","Close PCAPs"]
 )
 
+with st.sidebar.expander("⏱️ Performance"):
+    trace_memory = st.checkbox("Trace Python allocations (slower)", value=False)
+    log_perf = st.checkbox(f"Append timings to {DEFAULT_LOG_PATH}", value=False)
+perf = PerfLog(trace_memory=trace_memory)
+
+# Instruments whose student column can be mapped to record_id through a roster.
+ROSTER_RESOLVED_INSTRUMENTS = [
+    "SDOH Form",
+    "Developmental Assessment Form",
+    "Weekly Quiz Reports",
+    "Documentation Submission #1",
+    "Documentation Submission #2",
+]
+student_index = None
+if instrument in ROSTER_RESOLVED_INSTRUMENTS:
+    identity_roster = st.sidebar.file_uploader(
+        "Student roster for record_id lookup (optional)",
+        type=["csv"],
+        key="identity_roster",
+        help="An OASIS roster export. Student emails, usernames and IDs in the report are mapped to the "
+        "roster's External ID; values the roster does not know are kept as they are.",
+    )
+    if identity_roster is not None:
+        try:
+            student_index = perf.run(
+                "build student index", lambda: StudentIndex.from_roster(load_csv(identity_roster, dtype=str))
+            )
+        except ValueError as e:
+            st.sidebar.error(str(e))
+            st.stop()
+        st.sidebar.caption(
+            f"{len(student_index)} student alias(es) indexed; {student_index.ambiguous['alias_key'].nunique()} "
+            "shared by several students are ignored."
+        )
+
+# Roster formatters whose due dates can be moved off closure days.
+ROSTER_DUE_DATE_INSTRUMENTS = ["Roster_HMC", "Roster_KP"]
+holiday_calendar = None
+if instrument in ROSTER_DUE_DATE_INSTRUMENTS:
+    calendar_file = st.sidebar.file_uploader(
+        "Holiday / closure calendar (optional)",
+        type=["csv"],
+        key="holiday_calendar",
+        help="One closure per row: a 'date' column, or 'start_date' / 'end_date' for a range. "
+        "Grade due dates that land on a closure day move to the next open day.",
+    )
+    if calendar_file is not None:
+        calendar_df = load_csv(calendar_file, dtype=str)
+        calendar_version = content_digest(calendar_file.getvalue())
+        try:
+            holiday_calendar = STAGE_CACHE.get_or_compute(
+                "holiday calendar",
+                calendar_version,
+                lambda: HolidayCalendar.from_frame(calendar_df, version=calendar_version),
+                copy=False,
+            )
+        except ValueError as e:
+            st.sidebar.error(str(e))
+            st.stop()
+        st.sidebar.caption(f"{len(holiday_calendar)} closure day(s) in the calendar.")
+
 if instrument == "OASIS Evaluation":
     st.header("📋 OASIS Evaluation Formatter")
     st.markdown("[Open OASIS Clinical Assessment of Student Setup](https://oasis.pennstatehealth.net/admin/course/e_manage/student_performance/setup_analysis_report.html)")
@@ -28,7 +117,7 @@ if instrument == "OASIS Evaluation":
     if not uploaded:
         st.stop()
 
-    df = pd.read_csv(uploaded, dtype=str)
+    df = load_csv(uploaded, dtype=str)
 
     # 自动把 "Course ID"→"course_id", "1 Question Number"→"q1_question_number", …
     def rename_oasis(col: str) -> str:
@@ -81,7 +170,7 @@ if instrument == "OASIS Evaluation":
     st.dataframe(df, height=400)
     st.download_button(
         "📥 Download formatted OASIS CSV",
-        df.to_csv(index=False).encode("utf-8"),
+        encode_csv(df),
         file_name="oasis_eval_formatted.csv",
         mime="text/csv",
     )
@@ -104,7 +193,7 @@ elif instrument == "Practical Exam Codes #1":
         st.stop()
 
     # Load the files
-    dfs = [pd.read_csv(f, dtype=str) for f in uploaded]
+    dfs = [load_csv(f, dtype=str) for f in uploaded]
 
     # Identify which file has which column
     df_code = next(df for df in dfs if "Survey Access Code" in df.columns)
@@ -122,7 +211,7 @@ elif instrument == "Practical Exam Codes #1":
 
     st.dataframe(df_combined)
 
-    st.download_button("📥 Download record_id + code_p1 CSV", df_combined.to_csv(index=False).encode("utf-8"), file_name="record_id_code_p1.csv", mime="text/csv")
+    st.download_button("📥 Download record_id + code_p1 CSV", encode_csv(df_combined), file_name="record_id_code_p1.csv", mime="text/csv")
 
 elif instrument == "Practical Exam Codes #2":
     st.header("📋 Practical Exam Codes #2")
@@ -137,7 +226,7 @@ elif instrument == "Practical Exam Codes #2":
         st.stop()
 
     # Load the files
-    dfs = [pd.read_csv(f, dtype=str) for f in uploaded]
+    dfs = [load_csv(f, dtype=str) for f in uploaded]
 
     # Identify which file has which column
     df_code = next(df for df in dfs if "Survey Access Code" in df.columns)
@@ -152,7 +241,7 @@ elif instrument == "Practical Exam Codes #2":
 
     st.dataframe(df_combined)
 
-    st.download_button("📥 Download record_id + code_p2 CSV", df_combined.to_csv(index=False).encode("utf-8"), file_name="record_id_code_p1.csv", mime="text/csv")
+    st.download_button("📥 Download record_id + code_p2 CSV", encode_csv(df_combined), file_name="record_id_code_p1.csv", mime="text/csv")
     
 elif instrument == "Checklist Entry":
     st.header("🔖 Checklist Entry Merger")
@@ -166,7 +255,7 @@ elif instrument == "Checklist Entry":
         st.stop()
 
     # Read + concat
-    dfs = [pd.read_csv(f, dtype=str) for f in uploaded]
+    dfs = [load_csv(f, dtype=str) for f in uploaded]
     df_cl = pd.concat(dfs, ignore_index=True, sort=False)
 
     # Rename only your 22 columns
@@ -259,7 +348,7 @@ elif instrument == "Checklist Entry":
     st.dataframe(df_cl, height=400)
     st.download_button(
         "📥 Download formatted checklist CSV",
-        df_cl.to_csv(index=False).encode("utf-8"),
+        encode_csv(df_cl),
         file_name="checklist_entries.csv",
         mime="text/csv",
     )
@@ -280,7 +369,14 @@ elif instrument == "NBME Scores":
         st.stop()
 
     # read the specific worksheet - NBME worksheet has two sheet, it will read the workbook and find the sheet that we want. 
-    df_nbme = pd.read_excel(nbme_file, sheet_name="GradeBook", dtype=str)
+    df_nbme = perf.run(
+        f"parse {nbme_file.name}",
+        lambda: STAGE_CACHE.get_or_compute(
+            "nbme_gradebook",
+            content_digest(nbme_file.getvalue()),
+            lambda: pd.read_excel(nbme_file, sheet_name="GradeBook", dtype=str),
+        ),
+    )
 
     # rename only the nine columns you need
     rename_map_nbme = {
@@ -314,7 +410,7 @@ elif instrument == "NBME Scores":
     
     # preview + download
     st.dataframe(df_nbme, height=400)
-    st.download_button("📥 Download formatted NBME XLSX → CSV",df_nbme.to_csv(index=False).encode("utf-8"),file_name="nbme_scores_formatted.csv",mime="text/csv")
+    st.download_button("📥 Download formatted NBME XLSX → CSV",encode_csv(df_nbme),file_name="nbme_scores_formatted.csv",mime="text/csv")
 
 elif instrument == "Preceptor Matching":
     st.header("🔖 Preceptor Matching")
@@ -331,63 +427,76 @@ elif instrument == "Preceptor Matching":
         st.stop()
 
     # read
-    df_pmx = pd.read_csv(preceptor_file, dtype=str)
-
-    # drop the unwanted Delete column
-    if "Delete" in df_pmx.columns:
-        df_pmx = df_pmx.drop(columns=["Delete"])
-
-    # rename only the REDCap-friendly columns
-    rename_map = {
-        "Start Date":                    "start_date",
-        "End Date":                      "end_date",
-        "Location":                      "location",
-        "Faculty Name":                  "faculty_name",
-        "Faculty Username":              "faculty_username",
-        "Faculty External ID":           "faculty_external_id",
-        "Faculty Email":                 "faculty_email",
-        "Type of Association":           "type_of_association",
-        "Student Name":                  "student_name",
-        "Student Username":              "student_username",
-        "Student External ID":           "record_id",
-        "Student Email":                 "student_email",
-        "Evaluation Period Start Date":  "eval_period_start_date",
-        "Evaluation Period End Date":    "eval_period_end_date",
-        "Classification":                "classification",
-        "Student Activity":              "student_activity",
-        "Manual Evaluations":            "manual_evaluations",
-    }
-    df_pmx = df_pmx.rename(columns=rename_map)
-
-    # keep only those columns, in that exact order
-    df_pmx = df_pmx[list(rename_map.values())]
-
-    # move record_id to front
-    df_pmx = df_pmx[["record_id"] + [c for c in df_pmx.columns if c != "record_id"]]
-
-    # add REDCap repeater fields
-    df_pmx["redcap_repeat_instrument"] = "oasis_eval"
-    df_pmx["redcap_repeat_instance"]   = df_pmx.groupby("record_id").cumcount() + 1
-
-    df_pmx = df_pmx.drop(columns=["start_date","end_date","location","student_name","student_username","student_email"])
-
-    # ─── normalize manual_evaluations to one per row ────────────────────
-    # split on "|" into lists
-    df_pmx["manual_evaluations"] = df_pmx["manual_evaluations"] \
-        .fillna("") \
-        .str.split("|")
-    
-    # explode so each list element gets its own row
-    df_pmx = df_pmx.explode("manual_evaluations")
-    
-    # remove leading "*" and any extra whitespace
-    df_pmx["manual_evaluations"] = df_pmx["manual_evaluations"] \
-        .str.lstrip("*") \
-        .str.strip()
-
-        # ─── drop unwanted categories ───────────────────────────────────────
-    to_drop = ["Clinical Teaching Eval", "Mid-Cycle Feedback"]
-    df_pmx = df_pmx[~df_pmx["manual_evaluations"].isin(to_drop)]
+    df_pmx = load_csv(preceptor_file, dtype=str)
+
+    # reshape once per file; the multiselect below only re-filters the cached result
+    def reshape_preceptor_matching(df_pmx: pd.DataFrame) -> pd.DataFrame:
+        # drop the unwanted Delete column
+        if "Delete" in df_pmx.columns:
+            df_pmx = df_pmx.drop(columns=["Delete"])
+
+        # rename only the REDCap-friendly columns
+        rename_map = {
+            "Start Date":                    "start_date",
+            "End Date":                      "end_date",
+            "Location":                      "location",
+            "Faculty Name":                  "faculty_name",
+            "Faculty Username":              "faculty_username",
+            "Faculty External ID":           "faculty_external_id",
+            "Faculty Email":                 "faculty_email",
+            "Type of Association":           "type_of_association",
+            "Student Name":                  "student_name",
+            "Student Username":              "student_username",
+            "Student External ID":           "record_id",
+            "Student Email":                 "student_email",
+            "Evaluation Period Start Date":  "eval_period_start_date",
+            "Evaluation Period End Date":    "eval_period_end_date",
+            "Classification":                "classification",
+            "Student Activity":              "student_activity",
+            "Manual Evaluations":            "manual_evaluations",
+        }
+        df_pmx = df_pmx.rename(columns=rename_map)
+
+        # keep only those columns, in that exact order
+        df_pmx = df_pmx[list(rename_map.values())]
+
+        # move record_id to front
+        df_pmx = df_pmx[["record_id"] + [c for c in df_pmx.columns if c != "record_id"]]
+
+        # add REDCap repeater fields
+        df_pmx["redcap_repeat_instrument"] = "oasis_eval"
+        df_pmx["redcap_repeat_instance"]   = df_pmx.groupby("record_id").cumcount() + 1
+
+        df_pmx = df_pmx.drop(columns=["start_date","end_date","location","student_name","student_username","student_email"])
+
+        # ─── normalize manual_evaluations to one per row ────────────────────
+        # split on "|" into lists
+        df_pmx["manual_evaluations"] = df_pmx["manual_evaluations"] \
+            .fillna("") \
+            .str.split("|")
+
+        # explode so each list element gets its own row
+        df_pmx = df_pmx.explode("manual_evaluations")
+
+        # remove leading "*" and any extra whitespace
+        df_pmx["manual_evaluations"] = df_pmx["manual_evaluations"] \
+            .str.lstrip("*") \
+            .str.strip()
+
+            # ─── drop unwanted categories ───────────────────────────────────────
+        to_drop = ["Clinical Teaching Eval", "Mid-Cycle Feedback"]
+        df_pmx = df_pmx[~df_pmx["manual_evaluations"].isin(to_drop)]
+        return df_pmx
+
+    df_pmx = perf.run(
+        "reshape preceptor matching",
+        lambda: STAGE_CACHE.get_or_compute(
+            "preceptor_matching:2025-26",
+            content_digest(preceptor_file.getvalue()),
+            lambda: reshape_preceptor_matching(df_pmx),
+        ),
+        rows_in=len(df_pmx),
+    )
 
     # get all unique manual_evaluations values
     opts = df_pmx["manual_evaluations"].dropna().unique().tolist()
@@ -407,7 +516,7 @@ elif instrument == "Preceptor Matching":
     st.dataframe(df_pmx, height=400)
     st.download_button(
         "📥 Download formatted Preceptor Matching CSV",
-        df_pmx.to_csv(index=False).encode("utf-8"),
+        encode_csv(df_pmx),
         file_name="preceptor_matching_formatted.csv",
         mime="text/csv",
     )
@@ -427,7 +536,7 @@ elif instrument == "Email Record Mapper":
         st.stop()
 
     # Read the CSV
-    df_roster = pd.read_csv(roster_file, dtype=str)
+    df_roster = load_csv(roster_file, dtype=str)
 
     # Rename only the needed columns
     rename_map = {
@@ -448,24 +557,26 @@ elif instrument == "Email Record Mapper":
 
     # Preview and download
     st.dataframe(df_roster, height=400)
-    # Create a Word doc in memory
-    doc = Document()
-    doc.add_heading('REDCap Dropdown: record_id, email', level=1)
-    
-    # Add each line as plain text
-    for _, row in df_roster.iterrows():
-        record_id = str(row['record_id']).strip()
-        email = str(row['email']).strip()
-        doc.add_paragraph(f"{record_id}, {email}")
-    
-    # Save to BytesIO
-    doc_io = BytesIO()
-    doc.save(doc_io)
-    doc_io.seek(0)
+
+    def dropdown_docx() -> bytes:
+        """The Word file, built only when the button is clicked; python-docx is imported here."""
+        from docx import Document
+
+        doc = Document()
+        doc.add_heading('REDCap Dropdown: record_id, email', level=1)
+
+        # Add each line as plain text
+        lines = df_roster["record_id"].str.strip() + ", " + df_roster["email"].str.strip()
+        for line in lines:
+            doc.add_paragraph(line)
+
+        doc_io = BytesIO()
+        doc.save(doc_io)
+        return doc_io.getvalue()
 
     st.download_button(
         label="📥 Download REDCap Dropdown (Word)",
-        data=doc_io,
+        data=dropdown_docx,
         file_name="email_roster_dropdown.docx",
         mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
     )
@@ -491,7 +602,7 @@ elif instrument == "Weekly Quiz Reports":
         st.stop()
 
     for file in uploaded:
-        df = pd.read_csv(file, dtype=str)
+        df = load_csv(file, dtype=str)
     
         # Identify the quiz week from the filename
         week = None
@@ -516,8 +627,8 @@ elif instrument == "Weekly Quiz Reports":
             "score": quiz_score_column,
         }, inplace=True)
     
-        # Clean record_id
-        df["record_id"] = df["record_id"].str.replace(r"@psu\.edu", "", regex=True)
+        # sis_id is the PSU email: map it through the roster if one is loaded, else drop @psu.edu
+        df["record_id"] = resolve_record_ids(df["record_id"], student_index, strip_psu_email(df["record_id"]))
     
         # Convert quiz score to percentage
         df[quiz_score_column] = pd.to_numeric(df[quiz_score_column], errors='coerce')
@@ -551,7 +662,7 @@ elif instrument == "Weekly Quiz Reports":
     st.dataframe(df_quiz_combined, height=400)
     st.download_button(
         "📥 Download formatted Weekly Quiz CSV",
-        df_quiz_combined.to_csv(index=False).encode("utf-8"),
+        encode_csv(df_quiz_combined),
         file_name="weekly_quiz_formatted.csv",
         mime="text/csv",
     )
@@ -572,7 +683,7 @@ elif instrument == "SDOH Form":
         st.stop()
 
     # Read the CSV
-    df = pd.read_csv(roster_file, dtype=str)
+    df = load_csv(roster_file, dtype=str)
 
     # Only keep the two columns you care about
     cols = ["email_2", "social_drivers_of_health_sdoh_assessment_form_timestamp", "social_drivers_of_health_sdoh_assessment_form_complete"]
@@ -581,6 +692,7 @@ elif instrument == "SDOH Form":
         st.error(f"Missing expected columns: {', '.join(missing)}")
         st.stop()
     df = df[cols].copy()
+    df["email_2"] = resolve_record_ids(df["email_2"], student_index)
 
     # Convert the SDOH-complete column to numeric, so max() works
     df["social_drivers_of_health_sdoh_assessment_form_complete"] = pd.to_numeric(
@@ -613,7 +725,7 @@ elif instrument == "SDOH Form":
 
     
     # Offer as CSV download
-    csv_bytes = df_grouped.to_csv(index=False).encode("utf-8")
+    csv_bytes = encode_csv(df_grouped)
     st.download_button(
         label="📥 Download email_2 + SDOH (max) CSV",
         data=csv_bytes,
@@ -637,7 +749,7 @@ elif instrument == "Developmental Assessment Form":
         st.stop()
 
     # Read the CSV
-    df = pd.read_csv(roster_file, dtype=str)
+    df = load_csv(roster_file, dtype=str)
 
     # Only keep the columns you care about
     cols = ["email_2", "developmental_assessment_of_patient_timestamp", "developmental_assessment_of_patient_complete"]
@@ -646,6 +758,7 @@ elif instrument == "Developmental Assessment Form":
         st.error(f"Missing expected columns: {', '.join(missing)}")
         st.stop()
     df = df[cols].copy()
+    df["email_2"] = resolve_record_ids(df["email_2"], student_index)
 
     # Convert the complete column to numeric
     df["developmental_assessment_of_patient_complete"] = pd.to_numeric(
@@ -678,7 +791,7 @@ elif instrument == "Developmental Assessment Form":
 
     
     # Offer as CSV download
-    csv_bytes = df_grouped.to_csv(index=False).encode("utf-8")
+    csv_bytes = encode_csv(df_grouped)
     st.download_button(
         label="📥 Download record_id + Developmental (max) CSV",
         data=csv_bytes,
@@ -700,7 +813,7 @@ elif instrument == "Documentation Submission #1":
         st.stop()
 
     # Read the CSV
-    df = pd.read_csv(roster_file, dtype=str)
+    df = load_csv(roster_file, dtype=str)
 
     # Only keep the columns you care about
     cols = [
@@ -720,6 +833,7 @@ elif instrument == "Documentation Submission #1":
         st.error(f"Missing expected columns: {', '.join(missing)}")
         st.stop()
     df = df[cols].copy()
+    df["email_2"] = resolve_record_ids(df["email_2"], student_index)
 
     df = df.rename(columns={"email_2": "record_id", "documentation_submission_1_timestamp":"peddoclate1"})
 
@@ -735,7 +849,7 @@ elif instrument == "Documentation Submission #1":
     df = df[cols]
 
     # Offer as CSV download
-    csv_bytes = df.to_csv(index=False).encode("utf-8")
+    csv_bytes = encode_csv(df)
     st.download_button(label="📥 Download Documentation Submission #1",data=csv_bytes,file_name="docsubmit1.csv",mime="text/csv")
 
 elif instrument == "Documentation Submission #2":
@@ -748,7 +862,7 @@ elif instrument == "Documentation Submission #2":
         st.stop()
 
     # Read the CSV
-    df = pd.read_csv(roster_file, dtype=str)
+    df = load_csv(roster_file, dtype=str)
 
     # Only keep the columns you care about
     cols = [
@@ -767,6 +881,7 @@ elif instrument == "Documentation Submission #2":
         st.error(f"Missing expected columns: {', '.join(missing)}")
         st.stop()
     df = df[cols].copy()
+    df["email_2"] = resolve_record_ids(df["email_2"], student_index)
 
     df = df.rename(columns={"email_2": "record_id", "documentation_submission_2_timestamp":"peddoclate2"})
 
@@ -782,7 +897,7 @@ elif instrument == "Documentation Submission #2":
     df = df[cols]
 
     # Offer as CSV download
-    csv_bytes = df.to_csv(index=False).encode("utf-8")
+    csv_bytes = encode_csv(df)
     st.download_button(label="📥 Download Documentation Submission #2",data=csv_bytes,file_name="docsubmit1.csv",mime="text/csv")
     
 elif instrument == "Roster_HMC":
@@ -796,7 +911,7 @@ elif instrument == "Roster_HMC":
         st.stop()
 
     # read as CSV
-    df_roster = pd.read_csv(roster_file, dtype=str)
+    df_roster = load_csv(roster_file, dtype=str)
 
     df_roster.columns = df_roster.columns.str.strip()
 
@@ -869,7 +984,7 @@ elif instrument == "Roster_HMC":
 
     df_roster["legal_name"] = df_roster["lastname"] + ", " + df_roster["firstname"] + " (MD)" 
 
-    df_roster["email_2"] = df_roster["record_id"] + "@psu.edu"
+    df_roster["email_2"] = psu_email(df_roster["record_id"])
 
     #legal name ... legal_name
     
@@ -883,20 +998,14 @@ elif instrument == "Roster_HMC":
     # 0) ensure start_date is a true datetime
     df_roster["start_date"] = pd.to_datetime(df_roster["start_date"], errors='coerce')
     
-    # 1) grab each unique date, sorted oldest → newest
-    unique_dates = sorted(df_roster["start_date"].dropna().unique())
+    # 1) each unique date, oldest → newest, is a rotation: rot_date_# columns + rotation codes
+    rot_dates, rotation_codes, rotation_reference = rotation_calendar(df_roster["start_date"])
+    df_roster[rot_dates.columns] = rot_dates
     
-    # 2) for each one, make a new column rot_date_#
-    for idx, dt in enumerate(unique_dates, 1):
-        df_roster[f"rot_date_{idx}"] = df_roster["start_date"].apply(lambda x: dt.strftime("%m-%d-%Y") if pd.notna(x) and x == dt else "")
+    # 2) assign each student’s rotation1 based on their start_date
+    df_roster["rotation1"] = rotation_codes
 
-    # 3) build a mapping from date → rotation code
-    rotation_map = {dt: f"r{idx:02}" for idx, dt in enumerate(unique_dates, 1)}
-    
-    # 4) assign each student’s rotation1 based on their start_date
-    df_roster["rotation1"] = df_roster["start_date"].map(rotation_map)
-
-    df_roster["rotation"] = df_roster["start_date"].map(rotation_map)
+    df_roster["rotation"] = rotation_codes
 
     # 3) now drop your old columns
     df_roster.drop(columns=renamed_cols, errors="ignore", inplace=True)
@@ -907,33 +1016,9 @@ elif instrument == "Roster_HMC":
     df_roster["start_date"] = pd.to_datetime(df_roster["start_date"], infer_datetime_format=True)
     df_roster["end_date"]   = pd.to_datetime(df_roster["end_date"], infer_datetime_format=True)
     
-    # ─── 2) Compute first Sunday on/after start_date ────────────────────────────
-    days_to_sunday = (6 - df_roster["start_date"].dt.weekday) % 7
-    first_sunday   = df_roster["start_date"] + pd.to_timedelta(days_to_sunday, unit="D")
-    
-    # ─── 3) Create quiz_due_1 … quiz_due_4 ──────────────────────────────────────
-    for n in range(1, 5):
-        df_roster[f"quiz_due_{n}"] = first_sunday + pd.Timedelta(weeks=(n - 1))
-    
-    # ─── 4) Alias assignment & doc-assignment due dates ─────────────────────────
-    df_roster["ass_middue_date"]   = df_roster["quiz_due_2"]
-    df_roster["ass_due_date"]      = df_roster["quiz_due_4"]
-    df_roster["docass_due_date_1"] = df_roster["quiz_due_2"]
-    df_roster["docass_due_date_2"] = df_roster["quiz_due_4"]
-    
-    # ─── 5) Grade due date: 6 weeks after end_date ──────────────────────────────
-    df_roster["grade_due_date"] = df_roster["end_date"] + pd.Timedelta(weeks=6)
-
-    # ─── 6) Normalize all due dates to 23:59 with no seconds ─────────────────
-    due_cols = [
-        "quiz_due_1","quiz_due_2","quiz_due_3","quiz_due_4",
-        "ass_middue_date","ass_due_date",
-        "docass_due_date_1","docass_due_date_2",
-        "grade_due_date"
-    ]
-    
-    for col in due_cols:
-        df_roster[col] = (df_roster[col].dt.normalize() + pd.Timedelta(hours=23, minutes=59)).dt.strftime("%m-%d-%Y 23:59")
+    # ─── 2) Quiz, assignment and grade due dates (23:59) from the 2025-26 rules ─
+    due = due_dates(df_roster["start_date"], df_roster["end_date"], DUE_DATE_RULES_2025_26, holiday_calendar)
+    df_roster[due.columns] = due
 
     df_roster["start_date"] = df_roster["start_date"].dt.strftime("%m-%d-%Y")
     df_roster["end_date"] = df_roster["end_date"].dt.strftime("%m-%d-%Y")
@@ -944,7 +1029,7 @@ elif instrument == "Roster_HMC":
     # preview + download
     st.dataframe(df_roster, height=400)
     
-    st.download_button("📥 Download formatted Roster CSV",df_roster.to_csv(index=False).encode("utf-8"),file_name="roster_formatted.csv",mime="text/csv")
+    st.download_button("📥 Download formatted Roster CSV",encode_csv(df_roster),file_name="roster_formatted.csv",mime="text/csv")
 
 elif instrument == "Roster_KP":
     st.header("🔖 Roster KP")
@@ -956,7 +1041,7 @@ elif instrument == "Roster_KP":
         st.stop()
 
     # read as CSV
-    df_roster = pd.read_csv(roster_file, dtype=str)
+    df_roster = load_csv(roster_file, dtype=str)
 
     df_roster.columns = df_roster.columns.str.strip()
 
@@ -1025,7 +1110,7 @@ elif instrument == "Roster_KP":
 
     df_roster["legal_name"] = df_roster["lastname"] + ", " + df_roster["firstname"] + " (MD)" 
 
-    df_roster["email_2"] = df_roster["record_id"] + "@psu.edu"
+    df_roster["email_2"] = psu_email(df_roster["record_id"])
 
     #legal name ... legal_name
     
@@ -1039,17 +1124,11 @@ elif instrument == "Roster_KP":
     # 0) ensure start_date is a true datetime
     df_roster["start_date"] = pd.to_datetime(df_roster["start_date"], errors='coerce')
     
-    # 1) grab each unique date, sorted oldest → newest
-    unique_dates = sorted(df_roster["start_date"].dropna().unique())
+    # 1) each unique date, oldest → newest, gets a rot_date_# column
+    rot_dates, _, _ = rotation_calendar(df_roster["start_date"], code_format="r{}")
+    df_roster[rot_dates.columns] = rot_dates
     
-    # 2) for each one, make a new column rot_date_#
-    for idx, dt in enumerate(unique_dates, 1):
-        df_roster[f"rot_date_{idx}"] = df_roster["start_date"].apply(lambda x: dt.strftime("%m-%d-%Y") if pd.notna(x) and x == dt else "")
-
-    # 3) build a mapping from date → rotation code
-    rotation_map = {dt: f"r{idx}" for idx, dt in enumerate(unique_dates, 1)}
-    
-    # 4) assign each student’s rotation1 based on their start_date
+    # 2) assign each student’s rotation1 based on their start_date
     df_roster["rotation1"] = "KPLIC"
 
     df_roster["rotation"] = "KPLIC"
@@ -1063,33 +1142,9 @@ elif instrument == "Roster_KP":
     df_roster["start_date"] = pd.to_datetime(df_roster["start_date"], infer_datetime_format=True)
     df_roster["end_date"]   = pd.to_datetime(df_roster["end_date"], infer_datetime_format=True)
     
-    # ─── 2) Compute first Sunday on/after start_date ────────────────────────────
-    days_to_sunday = (6 - df_roster["start_date"].dt.weekday) % 7
-    first_sunday   = df_roster["start_date"] + pd.to_timedelta(days_to_sunday, unit="D")
-    
-    # ─── 3) Create quiz_due_1 … quiz_due_4 ──────────────────────────────────────
-    for n in range(1, 5):
-        df_roster[f"quiz_due_{n}"] = first_sunday + pd.Timedelta(weeks=(n - 1))
-    
-    # ─── 4) Alias assignment & doc-assignment due dates ─────────────────────────
-    df_roster["ass_middue_date"]   = df_roster["quiz_due_2"]
-    df_roster["ass_due_date"]      = df_roster["quiz_due_4"]
-    df_roster["docass_due_date_1"] = df_roster["quiz_due_2"]
-    df_roster["docass_due_date_2"] = df_roster["quiz_due_4"]
-    
-    # ─── 5) Grade due date: 6 weeks after end_date ──────────────────────────────
-    df_roster["grade_due_date"] = df_roster["end_date"] + pd.Timedelta(weeks=6)
-
-    # ─── 6) Normalize all due dates to 23:59 with no seconds ─────────────────
-    due_cols = [
-        "quiz_due_1","quiz_due_2","quiz_due_3","quiz_due_4",
-        "ass_middue_date","ass_due_date",
-        "docass_due_date_1","docass_due_date_2",
-        "grade_due_date"
-    ]
-    
-    for col in due_cols:
-        df_roster[col] = (df_roster[col].dt.normalize() + pd.Timedelta(hours=23, minutes=59)).dt.strftime("%m-%d-%Y 23:59")
+    # ─── 2) Quiz, assignment and grade due dates (23:59) from the 2025-26 rules ─
+    due = due_dates(df_roster["start_date"], df_roster["end_date"], DUE_DATE_RULES_2025_26, holiday_calendar)
+    df_roster[due.columns] = due
 
     df_roster["start_date"] = df_roster["start_date"].dt.strftime("%m-%d-%Y")
     df_roster["end_date"] = df_roster["end_date"].dt.strftime("%m-%d-%Y")
@@ -1097,7 +1152,7 @@ elif instrument == "Roster_KP":
     # preview + download
     st.dataframe(df_roster, height=400)
     
-    st.download_button("📥 Download formatted Roster CSV",df_roster.to_csv(index=False).encode("utf-8"),file_name="roster_formatted.csv",mime="text/csv")
+    st.download_button("📥 Download formatted Roster CSV",encode_csv(df_roster),file_name="roster_formatted.csv",mime="text/csv")
 
 
 elif instrument == "Open PCAPs":
@@ -1111,12 +1166,11 @@ elif instrument == "Open PCAPs":
         st.error("The uploaded file is empty.")
     else:
         try:
-            # Try normal UTF-8 (handles BOM with utf-8-sig)
-            pcap = pd.read_csv(uploaded, dtype=str, encoding="utf-8-sig")
+            # Encoding is sniffed (BOM, UTF-8, else latin-1)
+            pcap = load_csv(uploaded, dtype=str)
         except Exception:
-            # Reset pointer and try delimiter sniffing
-            uploaded.seek(0)
-            pcap = pd.read_csv(uploaded, dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+            # Try delimiter sniffing
+            pcap = load_csv(uploaded, dtype=str, sep=None, engine="python")
 
         if "record_id" not in pcap.columns:
             st.error(f"Missing 'record_id' column. Found columns: {list(pcap.columns)}")
@@ -1127,7 +1181,7 @@ elif instrument == "Open PCAPs":
             st.dataframe(pcap, height=400)
             st.download_button(
                 "📥 Download formatted Open PCAP",
-                pcap.to_csv(index=False).encode("utf-8"),
+                encode_csv(pcap),
                 file_name="open_pcap.csv",
                 mime="text/csv",
             )
@@ -1143,10 +1197,9 @@ elif instrument == "Close PCAPs":
         st.error("The uploaded file is empty.")
     else:
         try:
-            pcap = pd.read_csv(uploaded, dtype=str, encoding="utf-8-sig")
+            pcap = load_csv(uploaded, dtype=str)
         except Exception:
-            uploaded.seek(0)
-            pcap = pd.read_csv(uploaded, dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+            pcap = load_csv(uploaded, dtype=str, sep=None, engine="python")
 
         if "record_id" not in pcap.columns:
             st.error(f"Missing 'record_id' column. Found columns: {list(pcap.columns)}")
@@ -1157,10 +1210,18 @@ elif instrument == "Close PCAPs":
             st.dataframe(pcap, height=400)
             st.download_button(
                 "📥 Download formatted Closed PCAP",
-                pcap.to_csv(index=False).encode("utf-8"),
+                encode_csv(pcap),
                 file_name="closed_pcap.csv",  # fixed filename
                 mime="text/csv",
             )
 
 
-
+# ─── Performance ────────────────────────────────────────────────────────────
+with st.expander("⏱️ Performance"):
+    st.caption(
+        f"Run took {perf.elapsed:.2f} s, {perf.total_seconds:.2f} s of it in the stages below. "
+        f"Stage cache: {STAGE_CACHE.hits} hit(s), {STAGE_CACHE.misses} miss(es)."
+    )
+    st.dataframe(perf.to_frame(), hide_index=True)
+if log_perf:
+    perf.append_jsonl(app="app.py", instrument=instrument)
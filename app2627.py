@@ -1,16 +1,45 @@
 from __future__ import annotations
+import os
 import re
 import streamlit as st
 import pandas as pd
-from io import BytesIO
-from docx import Document
-import pytz
-
-import re
-from dataclasses import dataclass
-from io import BytesIO
-from typing import Iterable
-from urllib.parse import quote_plus
+from typing import Callable
+
+from file_io import csv_download, read_csv_bytes
+from perf import DEFAULT_LOG_PATH, PerfLog
+from roster_calendar import (
+    DUE_DATE_RULES_2026_27,
+    DueDateRule,
+    HolidayCalendar,
+    due_dates,
+    rotation_calendar,
+    rotation_reference_text,
+)
+from roster_clean import format_date_column, parse_date_column, strip_column
+from oasis_reminder_core import (
+    DATE_MODE_ALL,
+    EVAL_CONFIGS,
+    SNAPSHOT_COMPLETED,
+    SNAPSHOT_EXPECTED,
+    SNAPSHOT_FILE_NAMES,
+    build_eval_selection,
+    build_reminder_report,
+    build_reminder_report_parallel,
+    filter_expected_by_date,
+    match_by_faculty_identity,
+    prepare_completed_oasis,
+    prepare_expected_associations,
+    read_csv_any,
+    read_oasis_export_streaming,
+    read_parquet_snapshot,
+    reminder_file_stem,
+    resolve_faculty_identities,
+    sweep_reminder_counts,
+    to_parquet_snapshot,
+)
+from stage_cache import STAGE_CACHE, content_digest
+from student_identity import psu_email
+from submission_store import DEFAULT_STORE_PATH, SubmissionStore
 
 
 st.set_page_config(page_title="REDCap Formatter", layout="wide")
@@ -18,9 +47,69 @@ st.title("🔄 REDCap Instruments Formatter")
 st.markdown("[Open REDCap Data Import](https://redcap.ctsi.psu.edu/redcap_v15.5.35/index.php?pid=19389&route=DataImportController:index)")
 
 
+def load_csv(uploaded, **kwargs) -> pd.DataFrame:
+    """pd.read_csv for an uploaded file, parsed once with a sniffed encoding that is shown in the UI.
+
+    Parses are cached by the SHA-256 of the file plus the read_csv arguments, so widget reruns reuse them.
+    """
+    raw = uploaded.getvalue()
+    df = perf.run(
+        f"parse {uploaded.name}",
+        lambda: STAGE_CACHE.get_or_compute(
+            "csv",
+            (content_digest(raw), tuple(sorted(kwargs.items()))),
+            lambda: read_csv_bytes(raw, **kwargs),
+        ),
+    )
+    st.caption(f"Read {uploaded.name} as {df.attrs['encoding']}")
+    return df
+
+
+def encode_csv(df: pd.DataFrame, encoding: str = "utf-8") -> Callable[[], bytes]:
+    """df.to_csv(index=False) as download data, encoded only when the button is clicked."""
+    return csv_download(df, encoding)
+
+
 # choose which instrument you want to format
 instrument = st.sidebar.selectbox("Select instrument", ["OASIS Evaluation", "Checklist Entry", "Preceptor Matching", "NBME Scores", "Roster_HMC", "Roster_KP", "Roster_Updater","Oasis Reminder"])
 
+with st.sidebar.expander("⏱️ Performance"):
+    trace_memory = st.checkbox("Trace Python allocations (slower)", value=False)
+    log_perf = st.checkbox(f"Append timings to {DEFAULT_LOG_PATH}", value=False)
+perf = PerfLog(trace_memory=trace_memory)
+
+
+def encode_snapshot(df: pd.DataFrame, kind: str) -> Callable[[], bytes]:
+    """to_parquet_snapshot as download data, encoded (and timed) only when the button is clicked."""
+    return lambda: perf.run(f"encode {kind} snapshot", lambda: to_parquet_snapshot(df, kind), rows_in=len(df))
+
+
+# Roster formatters whose due dates can be moved off closure days.
+ROSTER_DUE_DATE_INSTRUMENTS = ["Roster_HMC", "Roster_KP", "Roster_Updater"]
+holiday_calendar = None
+if instrument in ROSTER_DUE_DATE_INSTRUMENTS:
+    calendar_file = st.sidebar.file_uploader(
+        "Holiday / closure calendar (optional)",
+        type=["csv"],
+        key="holiday_calendar",
+        help="One closure per row: a 'date' column, or 'start_date' / 'end_date' for a range. "
+        "Grade due dates that land on a closure day move to the next open day.",
+    )
+    if calendar_file is not None:
+        calendar_df = load_csv(calendar_file, dtype=str)
+        calendar_version = content_digest(calendar_file.getvalue())
+        try:
+            holiday_calendar = STAGE_CACHE.get_or_compute(
+                "holiday calendar",
+                calendar_version,
+                lambda: HolidayCalendar.from_frame(calendar_df, version=calendar_version),
+                copy=False,
+            )
+        except ValueError as e:
+            st.sidebar.error(str(e))
+            st.stop()
+        st.sidebar.caption(f"{len(holiday_calendar)} closure day(s) in the calendar.")
+
 if instrument == "OASIS Evaluation":
     st.header("📋 OASIS Evaluation Formatter")
     st.markdown("[Open OASIS Clinical Assessment of Student Setup](https://oasis.pennstatehealth.net/admin/course/e_manage/student_performance/setup_analysis_report.html)")
@@ -29,7 +118,7 @@ if instrument == "OASIS Evaluation":
     if not uploaded:
         st.stop()
 
-    df = pd.read_csv(uploaded, dtype=str)
+    df = load_csv(uploaded, dtype=str)
 
     # 自动把 "Course ID"→"course_id", "1 Question Number"→"q1_question_number", …
     def rename_oasis(col: str) -> str:
@@ -82,7 +171,7 @@ if instrument == "OASIS Evaluation":
     st.dataframe(df, height=400)
     st.download_button(
         "📥 Download formatted OASIS CSV",
-        df.to_csv(index=False).encode("utf-8"),
+        encode_csv(df),
         file_name="oasis_eval_formatted.csv",
         mime="text/csv",
     )
@@ -96,7 +185,7 @@ elif instrument == "Checklist Entry":
         st.stop()
 
     # Read + concat
-    dfs = [pd.read_csv(f, dtype=str) for f in uploaded]
+    dfs = [load_csv(f, dtype=str) for f in uploaded]
     df_cl = pd.concat(dfs, ignore_index=True, sort=False)
 
     # Rename only your 22 columns
@@ -190,7 +279,7 @@ elif instrument == "Checklist Entry":
     st.dataframe(df_cl, height=400)
     st.download_button(
         "📥 Download formatted checklist CSV",
-        df_cl.to_csv(index=False).encode("utf-8"),
+        encode_csv(df_cl),
         file_name="checklist_entries.csv",
         mime="text/csv",
     )
@@ -211,7 +300,14 @@ elif instrument == "NBME Scores":
         st.stop()
 
     # read the specific worksheet - NBME worksheet has two sheet, it will read the workbook and find the sheet that we want. 
-    df_nbme = pd.read_excel(nbme_file, sheet_name="GradeBook", dtype=str)
+    df_nbme = perf.run(
+        f"parse {nbme_file.name}",
+        lambda: STAGE_CACHE.get_or_compute(
+            "nbme_gradebook",
+            content_digest(nbme_file.getvalue()),
+            lambda: pd.read_excel(nbme_file, sheet_name="GradeBook", dtype=str),
+        ),
+    )
 
     # rename only the nine columns you need
     rename_map_nbme = {
@@ -247,7 +343,7 @@ elif instrument == "NBME Scores":
     df_nbme = df_nbme.drop(columns=exclude, errors='ignore')
     # preview + download
     st.dataframe(df_nbme, height=400)
-    st.download_button("📥 Download formatted NBME XLSX → CSV",df_nbme.to_csv(index=False).encode("utf-8"),file_name="nbme_scores_formatted.csv",mime="text/csv")
+    st.download_button("📥 Download formatted NBME XLSX → CSV",encode_csv(df_nbme),file_name="nbme_scores_formatted.csv",mime="text/csv")
 
 elif instrument == "Preceptor Matching":
     st.header("🔖 Preceptor Matching")
@@ -264,72 +360,85 @@ elif instrument == "Preceptor Matching":
         st.stop()
 
     # read
-    df_pmx = pd.read_csv(preceptor_file, dtype=str)
-
-    # drop the unwanted Delete column
-    if "Delete" in df_pmx.columns:
-        df_pmx = df_pmx.drop(columns=["Delete"])
+    df_pmx = load_csv(preceptor_file, dtype=str)
+
+    # reshape once per file; the multiselect below only re-filters the cached result
+    def reshape_preceptor_matching(df_pmx: pd.DataFrame) -> pd.DataFrame:
+        # drop the unwanted Delete column
+        if "Delete" in df_pmx.columns:
+            df_pmx = df_pmx.drop(columns=["Delete"])
+
+        # rename only the REDCap-friendly columns
+        rename_map = {
+            "Start Date":                    "start_date",
+            "End Date":                      "end_date",
+            "Location":                      "location",
+            "Faculty Name":                  "faculty_name",
+            "Faculty Username":              "faculty_username",
+            "Faculty External ID":           "faculty_external_id",
+            "Faculty Email":                 "faculty_email",
+            "Type of Association":           "type_of_association",
+            "Student Name":                  "student_name",
+            "Student Username":              "student_username",
+            "Student External ID":           "record_id",
+            "Student Email":                 "student_email",
+            "Evaluation Period Start Date":  "eval_period_start_date",
+            "Evaluation Period End Date":    "eval_period_end_date",
+            "Classification":                "classification",
+            "Student Activity":              "student_activity1",
+            "Manual Evaluations":            "manual_evaluations",
+        }
+        df_pmx = df_pmx.rename(columns=rename_map)
 
-    # rename only the REDCap-friendly columns
-    rename_map = {
-        "Start Date":                    "start_date",
-        "End Date":                      "end_date",
-        "Location":                      "location",
-        "Faculty Name":                  "faculty_name",
-        "Faculty Username":              "faculty_username",
-        "Faculty External ID":           "faculty_external_id",
-        "Faculty Email":                 "faculty_email",
-        "Type of Association":           "type_of_association",
-        "Student Name":                  "student_name",
-        "Student Username":              "student_username",
-        "Student External ID":           "record_id",
-        "Student Email":                 "student_email",
-        "Evaluation Period Start Date":  "eval_period_start_date",
-        "Evaluation Period End Date":    "eval_period_end_date",
-        "Classification":                "classification",
-        "Student Activity":              "student_activity1",
-        "Manual Evaluations":            "manual_evaluations",
-    }
-    df_pmx = df_pmx.rename(columns=rename_map)
+        # keep only those columns, in that exact order
+        df_pmx = df_pmx[list(rename_map.values())]
 
-    # keep only those columns, in that exact order
-    df_pmx = df_pmx[list(rename_map.values())]
+        # move record_id to front
+        df_pmx = df_pmx[["record_id"] + [c for c in df_pmx.columns if c != "record_id"]]
 
-    # move record_id to front
-    df_pmx = df_pmx[["record_id"] + [c for c in df_pmx.columns if c != "record_id"]]
+        # drop columns you do not want
+        df_pmx = df_pmx.drop(columns=[
+            "start_date",
+            "end_date",
+            "location",
+            "student_name",
+            "student_username",
+            "student_email"
+        ])
 
-    # drop columns you do not want
-    df_pmx = df_pmx.drop(columns=[
-        "start_date",
-        "end_date",
-        "location",
-        "student_name",
-        "student_username",
-        "student_email"
-    ])
+        # normalize manual_evaluations to one per row
+        df_pmx["manual_evaluations"] = (
+            df_pmx["manual_evaluations"]
+            .fillna("")
+            .str.split("|")
+        )
 
-    # normalize manual_evaluations to one per row
-    df_pmx["manual_evaluations"] = (
-        df_pmx["manual_evaluations"]
-        .fillna("")
-        .str.split("|")
-    )
+        df_pmx = df_pmx.explode("manual_evaluations")
 
-    df_pmx = df_pmx.explode("manual_evaluations")
+        df_pmx["manual_evaluations"] = (
+            df_pmx["manual_evaluations"]
+            .fillna("")
+            .str.lstrip("*")
+            .str.strip()
+        )
 
-    df_pmx["manual_evaluations"] = (
-        df_pmx["manual_evaluations"]
-        .fillna("")
-        .str.lstrip("*")
-        .str.strip()
-    )
+        # remove blank rows
+        df_pmx = df_pmx[df_pmx["manual_evaluations"] != ""]
 
-    # remove blank rows
-    df_pmx = df_pmx[df_pmx["manual_evaluations"] != ""]
+        # drop unwanted categories
+        to_drop = ["Clinical Teaching Eval", "Mid-Cycle Feedback"]
+        df_pmx = df_pmx[~df_pmx["manual_evaluations"].isin(to_drop)]
+        return df_pmx
 
-    # drop unwanted categories
-    to_drop = ["Clinical Teaching Eval", "Mid-Cycle Feedback"]
-    df_pmx = df_pmx[~df_pmx["manual_evaluations"].isin(to_drop)]
+    df_pmx = perf.run(
+        "reshape preceptor matching",
+        lambda: STAGE_CACHE.get_or_compute(
+            "preceptor_matching:2026-27",
+            content_digest(preceptor_file.getvalue()),
+            lambda: reshape_preceptor_matching(df_pmx),
+        ),
+        rows_in=len(df_pmx),
+    )
 
     # get all unique manual_evaluations values
     opts = sorted(df_pmx["manual_evaluations"].dropna().unique().tolist())
@@ -357,7 +466,7 @@ elif instrument == "Preceptor Matching":
     st.dataframe(df_pmx, height=400)
     st.download_button(
         "📥 Download formatted Preceptor Matching CSV",
-        df_pmx.to_csv(index=False).encode("utf-8"),
+        encode_csv(df_pmx),
         file_name="preceptor_matching_formatted.csv",
         mime="text/csv",
     )
@@ -375,7 +484,7 @@ elif instrument == "Roster_HMC":
         st.stop()
 
     # read as CSV
-    df_roster = pd.read_csv(roster_file, dtype=str)
+    df_roster = load_csv(roster_file, dtype=str)
 
     df_roster.columns = df_roster.columns.str.strip()
 
@@ -448,7 +557,7 @@ elif instrument == "Roster_HMC":
 
     df_roster["legal_name"] = df_roster["lastname"] + ", " + df_roster["firstname"] + " (MD)" 
 
-    df_roster["email_2"] = df_roster["record_id"] + "@psu.edu"
+    df_roster["email_2"] = psu_email(df_roster["record_id"])
 
     #legal name ... legal_name
     
@@ -462,20 +571,14 @@ elif instrument == "Roster_HMC":
     # 0) ensure start_date is a true datetime
     df_roster["start_date"] = pd.to_datetime(df_roster["start_date"], errors='coerce')
     
-    # 1) grab each unique date, sorted oldest → newest
-    unique_dates = sorted(df_roster["start_date"].dropna().unique())
-    
-    # 2) for each one, make a new column rot_date_#
-    for idx, dt in enumerate(unique_dates, 1):
-        df_roster[f"rot_date_{idx}"] = df_roster["start_date"].apply(lambda x: dt.strftime("%m-%d-%Y") if pd.notna(x) and x == dt else "")
-
-    # 3) build a mapping from date → rotation code
-    rotation_map = {dt: f"r{idx:02}" for idx, dt in enumerate(unique_dates, 1)}
+    # 1) each unique date, oldest → newest, is a rotation: rot_date_# columns + rotation codes
+    rot_dates, rotation_codes, rotation_reference = rotation_calendar(df_roster["start_date"])
+    df_roster[rot_dates.columns] = rot_dates
     
-    # 4) assign each student’s rotation1 based on their start_date
-    df_roster["rotation1"] = df_roster["start_date"].map(rotation_map)
+    # 2) assign each student’s rotation1 based on their start_date
+    df_roster["rotation1"] = rotation_codes
 
-    df_roster["rotation"] = df_roster["start_date"].map(rotation_map)
+    df_roster["rotation"] = rotation_codes
 
     # 3) now drop your old columns
     df_roster.drop(columns=renamed_cols, errors="ignore", inplace=True)
@@ -486,35 +589,18 @@ elif instrument == "Roster_HMC":
     df_roster["start_date"] = pd.to_datetime(df_roster["start_date"], errors="coerce")
     df_roster["end_date"]   = pd.to_datetime(df_roster["end_date"], errors="coerce")
     
-    # ─── 2) Compute first Sunday on/after start_date ────────────────────────────
-    days_to_sunday = (6 - df_roster["start_date"].dt.weekday) % 7
-    first_sunday   = df_roster["start_date"] + pd.to_timedelta(days_to_sunday, unit="D")
-    
-    # ─── 3) Create quiz_due_1 … quiz_due_4 ──────────────────────────────────────
-    for n in range(1, 5):
-        df_roster[f"quiz_due_{n}"] = first_sunday + pd.Timedelta(weeks=(n - 1))
-    
-    # ─── 4) Alias assignment & doc-assignment due dates ─────────────────────────
-    #df_roster["ass_middue_date"]   = df_roster["quiz_due_2"]
-    df_roster["ass_due_date"]      = df_roster["quiz_due_4"]
-    #df_roster["docass_due_date_1"] = df_roster["quiz_due_2"]
-    #df_roster["docass_due_date_2"] = df_roster["quiz_due_4"]
-    
-    # ─── 5) Grade due date: 6 weeks after end_date ──────────────────────────────
-    df_roster["grade_due_date"] = df_roster["end_date"] + pd.Timedelta(weeks=6)
-    df_roster["grade_due_date2"] = df_roster["end_date"] + pd.Timedelta(weeks=6)
-    
-    # ─── 6) Normalize all due dates to 23:59 with no seconds ─────────────────
-    #due_cols = ["quiz_due_1","quiz_due_2","quiz_due_3","quiz_due_4","ass_middue_date","ass_due_date","docass_due_date_1","docass_due_date_2","grade_due_date"]
-    
-    due_cols = ["ass_due_date","grade_due_date"]
-    
-    for col in due_cols:
-        df_roster[col] = (df_roster[col].dt.normalize() + pd.Timedelta(hours=23, minutes=59)).dt.strftime("%m-%d-%Y 23:59")
+    # ─── 2) Assignment and grade due dates from the 2026-27 rules ───────────────
+    # (grade_due_date2 is the grade deadline again, as a bare date)
+    due = due_dates(
+        df_roster["start_date"],
+        df_roster["end_date"],
+        DUE_DATE_RULES_2026_27 + [DueDateRule("grade_due_date2", "end_date", weeks=6, time=None, roll="forward")],
+        holiday_calendar,
+    )
+    df_roster[due.columns] = due
 
     df_roster["start_date"] = df_roster["start_date"].dt.strftime("%m-%d-%Y")
     df_roster["end_date"] = df_roster["end_date"].dt.strftime("%m-%d-%Y")
-    df_roster["grade_due_date2"] = df_roster["grade_due_date2"].dt.strftime("%m-%d-%Y")
     
     df_roster["student_demographics_complete"] = 2 
     
@@ -523,17 +609,10 @@ elif instrument == "Roster_HMC":
 
     st.dataframe(df_roster, height=400)
 
-    st.download_button("📥 Download formatted Roster CSV",df_roster.to_csv(index=False).encode("utf-8"),file_name="roster_formatted.csv",mime="text/csv")
+    st.download_button("📥 Download formatted Roster CSV",encode_csv(df_roster),file_name="roster_formatted.csv",mime="text/csv")
 
     # --------- BUILD ROTATION START DATE FILE ----------
-    rotation_reference = pd.DataFrame({
-        "rotation_code": [rotation_map[dt] for dt in unique_dates],
-        "start_date": [pd.to_datetime(dt).strftime("%m-%d-%Y") for dt in unique_dates]
-    })
-    rotation_text = "\n".join(
-    f"{row.rotation_code}, {row.start_date}"
-    for _, row in rotation_reference.iterrows()
-)
+    rotation_text = rotation_reference_text(rotation_reference)
 
     st.download_button(
         "📥 Download Rotation Start Dates For RedCap(.txt)",
@@ -545,7 +624,7 @@ elif instrument == "Roster_HMC":
     # --------- REMOVE QUIZ DUE COLUMNS COMPLETELY ----------
     df_roster = (df_roster[['record_id','lastname', 'firstname', 'email', 'rotation','student_demographics_complete']].rename(columns={'lastname': 'last_name','firstname': 'first_name','student_demographics_complete': 'pediatric_clerkship_intake_form_complete'}))
     
-    st.download_button("📥 Download roster_intake_form csv",df_roster.to_csv(index=False).encode("utf-8"),file_name="roster_intake_form.csv",mime="text/csv")
+    st.download_button("📥 Download roster_intake_form csv",encode_csv(df_roster),file_name="roster_intake_form.csv",mime="text/csv")
 
 elif instrument == "Roster_KP":
     st.header("🔖 Roster KPLIC")
@@ -561,19 +640,8 @@ elif instrument == "Roster_KP":
     if not roster_file:
         st.stop()
 
-    def clean_text(x):
-        if pd.isna(x):
-            return ""
-        return str(x).strip()
-
-    def safe_date(x):
-        x = clean_text(x)
-        if x == "":
-            return pd.NaT
-        return pd.to_datetime(x, errors="coerce")
-
     try:
-        df_roster = pd.read_csv(roster_file, dtype=str).fillna("")
+        df_roster = load_csv(roster_file, dtype=str).fillna("")
     except Exception as e:
         st.error(f"Could not read roster file: {e}")
         st.stop()
@@ -624,11 +692,9 @@ elif instrument == "Roster_KP":
         if col not in df_roster.columns:
             df_roster[col] = ""
 
-    df_roster["record_id"] = df_roster["record_id"].apply(clean_text).str.lower()
-    df_roster["email"] = df_roster["email"].apply(clean_text)
-    df_roster["psu_id"] = df_roster["psu_id"].apply(clean_text)
-    df_roster["track"] = df_roster["track"].apply(clean_text)
-    df_roster["location"] = df_roster["location"].apply(clean_text)
+    df_roster["record_id"] = strip_column(df_roster["record_id"]).str.lower()
+    for col in ["email", "psu_id", "track", "location"]:
+        df_roster[col] = strip_column(df_roster[col])
 
     blank_ids = df_roster[df_roster["record_id"] == ""].copy()
 
@@ -654,10 +720,10 @@ elif instrument == "Roster_KP":
 
     df_roster["name"] = (df_roster["firstname"] + " " + df_roster["lastname"]).str.strip()
     df_roster["legal_name"] = (df_roster["lastname"] + ", " + df_roster["firstname"] + " (MD)").str.strip()
-    df_roster["email_2"] = df_roster["record_id"] + "@psu.edu"
+    df_roster["email_2"] = psu_email(df_roster["record_id"])
 
-    df_roster["start_date"] = df_roster["start_date"].apply(safe_date)
-    df_roster["end_date"] = df_roster["end_date"].apply(safe_date)
+    df_roster["start_date"] = parse_date_column(df_roster["start_date"])
+    df_roster["end_date"] = parse_date_column(df_roster["end_date"])
 
     bad_dates = df_roster[
         df_roster["start_date"].isna() | df_roster["end_date"].isna()
@@ -670,20 +736,8 @@ elif instrument == "Roster_KP":
     df_roster["rotation1"] = "KPLIC"
     df_roster["rotation"] = "KPLIC"
 
-    days_to_sunday = (6 - df_roster["start_date"].dt.weekday) % 7
-    first_sunday = df_roster["start_date"] + pd.to_timedelta(days_to_sunday, unit="D")
-
-    df_roster["ass_due_date"] = first_sunday + pd.Timedelta(weeks=3)
-    df_roster["grade_due_date"] = df_roster["end_date"] + pd.Timedelta(weeks=6)
-
-    for col in ["ass_due_date", "grade_due_date"]:
-        df_roster[col] = (
-            df_roster[col]
-            .dt.normalize()
-            .add(pd.Timedelta(hours=23, minutes=59))
-            .dt.strftime("%m-%d-%Y 23:59")
-            .fillna("")
-        )
+    due = due_dates(df_roster["start_date"], df_roster["end_date"], DUE_DATE_RULES_2026_27, holiday_calendar)
+    df_roster[due.columns] = due
 
     df_roster["start_date"] = df_roster["start_date"].dt.strftime("%m-%d-%Y").fillna("")
     df_roster["end_date"] = df_roster["end_date"].dt.strftime("%m-%d-%Y").fillna("")
@@ -697,7 +751,7 @@ elif instrument == "Roster_KP":
 
     st.download_button(
         "📥 Download KPLIC REDCap Roster CSV",
-        df_roster.to_csv(index=False).encode("utf-8-sig"),
+        encode_csv(df_roster, "utf-8-sig"),
         file_name="kplic_roster_formatted.csv",
         mime="text/csv"
     )
@@ -714,7 +768,7 @@ elif instrument == "Roster_KP":
 
     st.download_button(
         "📥 Download KPLIC Intake Form CSV",
-        df_intake.to_csv(index=False).encode("utf-8-sig"),
+        encode_csv(df_intake, "utf-8-sig"),
         file_name="kplic_roster_intake_form.csv",
         mime="text/csv"
     )
@@ -742,23 +796,9 @@ elif instrument == "Roster_Updater":
     if not old_file or not new_file:
         st.stop()
 
-    def clean_text(x):
-        if pd.isna(x):
-            return ""
-        return str(x).strip()
-
-    def format_date(x):
-        x = clean_text(x)
-        if x == "":
-            return ""
-        parsed = pd.to_datetime(x, errors="coerce")
-        if pd.isna(parsed):
-            return ""
-        return parsed.strftime("%m-%d-%Y")
-
     def read_csv_safely(file, label):
         try:
-            return pd.read_csv(file, dtype=str).fillna("")
+            return load_csv(file, dtype=str).fillna("")
         except Exception as e:
             st.error(f"Could not read {label} file: {e}")
             st.stop()
@@ -801,9 +841,9 @@ elif instrument == "Roster_Updater":
 
     for oasis_col, redcap_col in required_oasis_cols.items():
         if redcap_col in date_cols:
-            df_new[redcap_col] = df_oasis[oasis_col].apply(format_date)
+            df_new[redcap_col] = format_date_column(df_oasis[oasis_col])
         else:
-            df_new[redcap_col] = df_oasis[oasis_col].apply(clean_text)
+            df_new[redcap_col] = strip_column(df_oasis[oasis_col])
 
     df_new["legal_name"] = (
         df_new["legal_name"]
@@ -826,18 +866,24 @@ elif instrument == "Roster_Updater":
 
     df_new["name"] = (df_new["firstname"] + " " + df_new["lastname"]).str.strip()
 
-    df_new["email_2"] = df_new["record_id"].str.lower() + "@psu.edu"
+    df_new["email_2"] = psu_email(df_new["record_id"].str.lower())
     df_new["rotation1"] = ""
     df_new["rotation"] = ""
-    df_new["ass_due_date"] = ""
-    df_new["grade_due_date"] = ""
+    # Same deadlines the 2026-27 roster formatters write; the date formatting below trims them to MM-DD-YYYY.
+    due = due_dates(
+        pd.to_datetime(df_new["start_date"], format="%m-%d-%Y", errors="coerce"),
+        pd.to_datetime(df_new["end_date"], format="%m-%d-%Y", errors="coerce"),
+        DUE_DATE_RULES_2026_27,
+        holiday_calendar,
+    )
+    df_new[due.columns] = due
     df_new["student_demographics_complete"] = "2"
 
     df_new = df_new[redcap_cols].copy()
 
     # Clean IDs
-    df_old["record_id"] = df_old["record_id"].apply(clean_text).str.lower()
-    df_new["record_id"] = df_new["record_id"].apply(clean_text).str.lower()
+    df_old["record_id"] = strip_column(df_old["record_id"]).str.lower()
+    df_new["record_id"] = strip_column(df_new["record_id"]).str.lower()
 
     # Ignore KPLIC from OLD REDCap only
     df_old["rotation"] = df_old["rotation"].astype(str).str.strip()
@@ -886,8 +932,8 @@ elif instrument == "Roster_Updater":
 
     # Format all date columns safely
     for col in ["start_date", "end_date", "ass_due_date", "grade_due_date"]:
-        df_old[col] = df_old[col].apply(format_date)
-        df_new[col] = df_new[col].apply(format_date)
+        df_old[col] = format_date_column(df_old[col])
+        df_new[col] = format_date_column(df_new[col])
 
     # Dropped students = OLD REDCap students not present in NEW OASIS
     new_ids = set(df_new["record_id"])
@@ -944,7 +990,7 @@ elif instrument == "Roster_Updater":
     st.subheader("Preview of Updated Roster")
     st.dataframe(df_combined)
 
-    csv_output = df_combined.to_csv(index=False).encode("utf-8-sig")
+    csv_output = encode_csv(df_combined, "utf-8-sig")
 
     st.download_button(
         label="Download Updated REDCap Roster CSV",
@@ -953,7 +999,7 @@ elif instrument == "Roster_Updater":
         mime="text/csv"
     )
 
-    dropped_output = df_dropped.to_csv(index=False).encode("utf-8-sig")
+    dropped_output = encode_csv(df_dropped, "utf-8-sig")
 
     st.download_button(
         label="Download Dropped Students CSV",
@@ -962,610 +1008,6 @@ elif instrument == "Roster_Updater":
         mime="text/csv"
     )
 elif instrument == "Oasis Reminder":
-    # ============================================================
-    # Evaluation configuration
-    # ============================================================
-    @dataclass(frozen=True)
-    class EvalConfig:
-        label: str                    # sidebar/display label
-        match_name: str               # raw OASIS / association form name after cleaning
-        output_name: str              # value written to output CSV
-        redcap_base_url: str          # prefilled survey URL base
-        note_style: str               # "cas" or "hp" or "generic"
-    
-    
-    EVAL_CONFIGS: list[EvalConfig] = [
-        EvalConfig(
-            label="Clinical Assessment of Student",
-            match_name="Clinical Assessment of Student",
-            output_name="Clinical Assessment of Student",
-            redcap_base_url="https://redcap.ctsi.psu.edu/surveys/?s=C7EJ3MPDMCMCFJEP",
-            note_style="cas",
-        ),
-        EvalConfig(
-            label="Observed H&P / PEDS History Taking & Physical Exam",
-            match_name="PEDS History Taking & Physical Exam",
-            output_name="PEDS History Taking & Physical Exam",
-            redcap_base_url="https://redcap.ctsi.psu.edu/surveys/?s=8C7DLPNX8LT9HTJP",
-            note_style="hp",
-        ),
-    ]
-    
-    
-    # ============================================================
-    # General helpers
-    # ============================================================
-    def read_csv_any(uploaded_file) -> pd.DataFrame:
-        """Read a user-uploaded CSV with a few encoding fallbacks."""
-        if uploaded_file is None:
-            return pd.DataFrame()
-    
-        raw = uploaded_file.getvalue()
-        last_error = None
-    
-        for enc in ("utf-8-sig", "utf-8", "latin-1"):
-            try:
-                return pd.read_csv(BytesIO(raw), dtype=str, encoding=enc).fillna("")
-            except Exception as e:  # pragma: no cover - displayed in Streamlit
-                last_error = e
-    
-        raise ValueError(f"Could not read CSV. Last error: {last_error}")
-    
-    
-    def normalize_colnames(df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        df.columns = [str(c).strip().lstrip("\ufeff") for c in df.columns]
-        return df
-    
-    
-    def first_existing_col(df: pd.DataFrame, candidates: Iterable[str]) -> str | None:
-        for c in candidates:
-            if c in df.columns:
-                return c
-        return None
-    
-    
-    def clean_text(x) -> str:
-        return re.sub(r"\s+", " ", str(x or "").strip())
-    
-    
-    def clean_eval_name(x) -> str:
-        """Normalize evaluation names from both files: remove leading asterisks, normalize spacing/case."""
-        s = clean_text(x)
-        s = s.lstrip("*").strip()
-        return re.sub(r"\s+", " ", s).lower()
-    
-    
-    def display_eval_name(x) -> str:
-        """Human-facing evaluation name."""
-        s = clean_text(x).lstrip("*").strip()
-        return re.sub(r"\s+", " ", s)
-    
-    
-    def clean_email(x) -> str:
-        return clean_text(x).lower()
-    
-    
-    def clean_id(x) -> str:
-        return clean_text(x).lower()
-    
-    
-    def clean_name_for_display(x) -> str:
-        """
-        Convert 'Last, First; MD2028' or 'Last - First' to 'First Last'.
-        Leaves already-readable names alone.
-        """
-        s = clean_text(x)
-        s = re.sub(r";\s*MD\d{4}", "", s, flags=re.IGNORECASE).strip()
-    
-        if " - " in s:
-            last, first = s.split(" - ", 1)
-            return f"{first.strip()} {last.strip()}".strip()
-    
-        if "," in s:
-            last, first = s.split(",", 1)
-            return f"{first.strip()} {last.strip()}".strip()
-    
-        return s
-    
-    
-    def to_date(s: pd.Series) -> pd.Series:
-        return pd.to_datetime(s, errors="coerce").dt.normalize()
-    
-    
-    def make_prefill_link(base_url: str, student_name: str, faculty_name: str, partial: bool = False) -> str:
-        if not base_url:
-            return ""
-    
-        url = (
-            f"{base_url}"
-            f"&student={quote_plus(str(student_name).strip())}"
-            f"&preceptor={quote_plus(str(faculty_name).strip())}"
-        )
-    
-        if partial:
-            # Existing shortcut values from your prior scripts. Edit/remove if you ever change the REDCap forms.
-            url += "&complete=1&ph=3&ch=3&pp=3&cp=3"
-    
-        return url
-    
-    
-    def safe_for_power_automate(value) -> str:
-        """
-        Keep CSV simple for Flow/Power Automate:
-        - no embedded line breaks
-        - replace commas with hyphens, matching your prior scripts
-        - no double quotes
-        """
-        s = str(value or "")
-        s = s.replace(",", " -")
-        s = s.replace('"', "")
-        s = s.replace("\r", " ").replace("\n", " ")
-        return re.sub(r"\s+", " ", s).strip()
-    
-    
-    def config_maps(configs: list[EvalConfig]) -> tuple[dict[str, EvalConfig], dict[str, str]]:
-        """Return maps keyed by normalized raw match names and sidebar labels."""
-        by_key = {clean_eval_name(c.match_name): c for c in configs}
-        label_to_key = {c.label: clean_eval_name(c.match_name) for c in configs}
-        return by_key, label_to_key
-    
-    
-    # ============================================================
-    # Data preparation
-    # ============================================================
-    def prepare_expected_associations(
-        assoc_raw: pd.DataFrame,
-        selected_eval_keys: set[str],
-        eval_config_by_key: dict[str, EvalConfig],
-        as_of_date: pd.Timestamp,
-        date_mode: str,
-        include_all_students: bool,
-    ) -> pd.DataFrame:
-        """
-        Convert raw evaluation_associations / preceptor matching file to one expected-evaluation row
-        per student/faculty/evaluation association.
-        """
-        df = normalize_colnames(assoc_raw)
-    
-        # Support raw OASIS association headers and common REDCap-style lowercase headers.
-        rename_variants = {
-            "faculty_name": "Faculty Name",
-            "faculty_username": "Faculty Username",
-            "faculty_external_id": "Faculty External ID",
-            "faculty_email": "Faculty Email",
-            "student_name": "Student Name",
-            "student_username": "Student Username",
-            "record_id": "Student External ID",
-            "student_email": "Student Email",
-            "manual_evaluations": "Manual Evaluations",
-            "start_date": "Start Date",
-            "end_date": "End Date",
-            "eval_period_start_date": "Evaluation Period Start Date",
-            "eval_period_end_date": "Evaluation Period End Date",
-        }
-        present = {old: new for old, new in rename_variants.items() if old in df.columns and new not in df.columns}
-        if present:
-            df = df.rename(columns=present)
-    
-        required = [
-            "Faculty Name",
-            "Faculty Username",
-            "Faculty External ID",
-            "Faculty Email",
-            "Student Name",
-            "Student Username",
-            "Student External ID",
-            "Student Email",
-            "Manual Evaluations",
-        ]
-        missing = [c for c in required if c not in df.columns]
-        if missing:
-            raise ValueError(f"Association file is missing expected column(s): {missing}")
-    
-        # Prefer evaluation-period dates; fall back to course dates.
-        eval_start_col = first_existing_col(df, ["Evaluation Period Start Date", "eval_period_start_date"])
-        eval_end_col = first_existing_col(df, ["Evaluation Period End Date", "eval_period_end_date"])
-        course_start_col = first_existing_col(df, ["Start Date", "start_date"])
-        course_end_col = first_existing_col(df, ["End Date", "end_date"])
-    
-        df["expected_start_date"] = df[eval_start_col] if eval_start_col else ""
-        df["expected_end_date"] = df[eval_end_col] if eval_end_col else ""
-    
-        if course_start_col:
-            df["expected_start_date"] = df["expected_start_date"].replace("", pd.NA).fillna(df[course_start_col])
-        if course_end_col:
-            df["expected_end_date"] = df["expected_end_date"].replace("", pd.NA).fillna(df[course_end_col])
-    
-        # Remove all-student/global rows by default.
-        if not include_all_students:
-            df = df[
-                ~df["Student External ID"].astype(str).str.strip().str.lower().eq("all students")
-            ].copy()
-    
-        # Remove rows marked for deletion if present.
-        if "Delete" in df.columns:
-            df = df[df["Delete"].astype(str).str.strip().eq("")].copy()
-    
-        # Explode manual evaluations separated by pipes.
-        df["manual_eval_item"] = df["Manual Evaluations"].astype(str).str.split("|")
-        df = df.explode("manual_eval_item").copy()
-        df["evaluation_key"] = df["manual_eval_item"].apply(clean_eval_name)
-    
-        # Drop blanks and keep selected tracked evaluations only.
-        df = df[df["evaluation_key"].ne("")].copy()
-        df = df[df["evaluation_key"].isin(selected_eval_keys)].copy()
-    
-        df["evaluation_type"] = df["evaluation_key"].map(
-            lambda k: eval_config_by_key.get(k).output_name if k in eval_config_by_key else display_eval_name(k)
-        )
-        df["evaluation_label"] = df["evaluation_key"].map(
-            lambda k: eval_config_by_key.get(k).label if k in eval_config_by_key else display_eval_name(k)
-        )
-    
-        # Standard keys.
-        df["record_id"] = df["Student External ID"].apply(clean_id)
-        df["student_username_key"] = df["Student Username"].apply(clean_id)
-        df["student_name"] = df["Student Name"].apply(clean_name_for_display)
-        df["student_email"] = df["Student Email"].apply(clean_email)
-    
-        df["faculty_name"] = df["Faculty Name"].apply(clean_name_for_display)
-        df["faculty_username_key"] = df["Faculty Username"].apply(clean_id)
-        df["faculty_external_id_key"] = df["Faculty External ID"].apply(clean_id)
-        df["faculty_email"] = df["Faculty Email"].apply(clean_email)
-    
-        df["expected_start"] = to_date(df["expected_start_date"])
-        df["expected_end"] = to_date(df["expected_end_date"])
-    
-        # Date filter for reminders.
-        if date_mode == "Active as of selected date":
-            df = df[
-                (df["expected_start"].notna())
-                & (df["expected_end"].notna())
-                & (df["expected_start"] <= as_of_date)
-                & (df["expected_end"] >= as_of_date)
-            ].copy()
-        elif date_mode == "Evaluation period ended on/before selected date":
-            df = df[
-                (df["expected_end"].notna())
-                & (df["expected_end"] <= as_of_date)
-            ].copy()
-        elif date_mode == "No date filter":
-            pass
-        else:
-            raise ValueError(f"Unknown date_mode: {date_mode}")
-    
-        keep = [
-            "record_id",
-            "student_username_key",
-            "student_name",
-            "student_email",
-            "faculty_name",
-            "faculty_username_key",
-            "faculty_external_id_key",
-            "faculty_email",
-            "evaluation_key",
-            "evaluation_type",
-            "evaluation_label",
-            "expected_start",
-            "expected_end",
-        ]
-        return df[keep].drop_duplicates().reset_index(drop=True)
-    
-    
-    def prepare_completed_oasis(
-        oasis_raw: pd.DataFrame,
-        selected_eval_keys: set[str],
-        eval_config_by_key: dict[str, EvalConfig],
-    ) -> pd.DataFrame:
-        """
-        Convert raw OASIS question-level export to one row per submitted evaluation.
-        """
-        df = normalize_colnames(oasis_raw)
-    
-        # Normalize common OASIS column variants.
-        rename_variants = {
-            "Answer text": "Answer Text",
-            "answer text": "Answer Text",
-            "Multiple Choice Value": "Mult Choice Value",
-            "Multiple choice value": "Mult Choice Value",
-            "Student external id": "Student External ID",
-            "Evaluator external id": "Evaluator External ID",
-            "Submit date": "Submit Date",
-            "Evaluator email": "Evaluator Email",
-            "Student email": "Student Email",
-        }
-        present = {old: new for old, new in rename_variants.items() if old in df.columns and new not in df.columns}
-        if present:
-            df = df.rename(columns=present)
-    
-        required = [
-            "Student",
-            "Student Username",
-            "Student External ID",
-            "Student Email",
-            "Evaluator",
-            "Evaluator Username",
-            "Evaluator External ID",
-            "Evaluator Email",
-            "Evaluation",
-            "Submit Date",
-        ]
-        missing = [c for c in required if c not in df.columns]
-        if missing:
-            raise ValueError(f"OASIS export is missing expected column(s): {missing}")
-    
-        start_col = first_existing_col(df, ["Start Date", "Evaluation Start Date"])
-        end_col = first_existing_col(df, ["End Date", "Evaluation End Date"])
-    
-        df["evaluation_key"] = df["Evaluation"].apply(clean_eval_name)
-        df = df[df["evaluation_key"].isin(selected_eval_keys)].copy()
-    
-        df["evaluation_type"] = df["evaluation_key"].map(
-            lambda k: eval_config_by_key.get(k).output_name if k in eval_config_by_key else display_eval_name(k)
-        )
-        df["evaluation_label"] = df["evaluation_key"].map(
-            lambda k: eval_config_by_key.get(k).label if k in eval_config_by_key else display_eval_name(k)
-        )
-    
-        df["submit_dt"] = pd.to_datetime(df["Submit Date"], errors="coerce")
-        df = df[df["submit_dt"].notna()].copy()
-    
-        df["record_id"] = df["Student External ID"].apply(clean_id)
-        df["student_username_key"] = df["Student Username"].apply(clean_id)
-        df["student_name"] = df["Student"].apply(clean_name_for_display)
-        df["student_email"] = df["Student Email"].apply(clean_email)
-    
-        df["faculty_name"] = df["Evaluator"].apply(clean_name_for_display)
-        df["faculty_username_key"] = df["Evaluator Username"].apply(clean_id)
-        df["faculty_external_id_key"] = df["Evaluator External ID"].apply(clean_id)
-        df["faculty_email"] = df["Evaluator Email"].apply(clean_email)
-    
-        df["oasis_start"] = to_date(df[start_col]) if start_col else pd.NaT
-        df["oasis_end"] = to_date(df[end_col]) if end_col else pd.NaT
-    
-        # OASIS is usually question-level. Form Record is best if present.
-        # Include evaluation_key in case Form Record is ever reused unexpectedly.
-        if "Form Record" in df.columns:
-            dedupe_cols = ["Form Record", "evaluation_key"]
-        else:
-            dedupe_cols = [
-                "record_id",
-                "student_username_key",
-                "faculty_username_key",
-                "faculty_external_id_key",
-                "faculty_email",
-                "evaluation_key",
-                "submit_dt",
-            ]
-    
-        keep = [
-            "record_id",
-            "student_username_key",
-            "student_name",
-            "student_email",
-            "faculty_name",
-            "faculty_username_key",
-            "faculty_external_id_key",
-            "faculty_email",
-            "evaluation_key",
-            "evaluation_type",
-            "evaluation_label",
-            "submit_dt",
-            "oasis_start",
-            "oasis_end",
-        ]
-        return df.drop_duplicates(subset=dedupe_cols)[keep].reset_index(drop=True)
-    
-    
-    # ============================================================
-    # Matching logic
-    # ============================================================
-    def row_matches(
-        expected_row: pd.Series,
-        completed: pd.DataFrame,
-        allow_email_fallback: bool,
-        allow_username_fallback: bool,
-    ) -> pd.DataFrame:
-        """
-        Match expected association to completed OASIS submission.
-    
-        Important design choice:
-        - Do not require date equality. Raw associations may use evaluation-period dates,
-          while raw OASIS exports often use course dates.
-        - Primary match: student external ID + evaluator external ID + evaluation.
-        - Fallbacks: evaluator email and/or evaluator username when external ID is blank.
-        """
-        c = completed[completed["evaluation_key"].eq(expected_row["evaluation_key"])].copy()
-    
-        # Student match: external ID first. If external ID is missing, fall back to username.
-        expected_record_id = expected_row.get("record_id", "")
-        expected_student_username = expected_row.get("student_username_key", "")
-    
-        if expected_record_id:
-            c = c[c["record_id"].eq(expected_record_id)].copy()
-        elif expected_student_username:
-            c = c[c["student_username_key"].eq(expected_student_username)].copy()
-        else:
-            return c.iloc[0:0].copy()
-    
-        if c.empty:
-            return c
-    
-        # Evaluator match priority.
-        expected_ext = expected_row.get("faculty_external_id_key", "")
-        expected_email = expected_row.get("faculty_email", "")
-        expected_username = expected_row.get("faculty_username_key", "")
-    
-        masks = []
-    
-        if expected_ext:
-            masks.append(c["faculty_external_id_key"].eq(expected_ext))
-    
-        if allow_email_fallback and expected_email:
-            masks.append(c["faculty_email"].eq(expected_email))
-    
-        if allow_username_fallback and expected_username:
-            masks.append(c["faculty_username_key"].eq(expected_username))
-    
-        if not masks:
-            return c.iloc[0:0].copy()
-    
-        combined_mask = masks[0]
-        for m in masks[1:]:
-            combined_mask = combined_mask | m
-    
-        return c[combined_mask].copy()
-    
-    
-    def build_reminder_note(note_style: str, expected: int, completed: int) -> str:
-        pending = max(expected - completed, 0)
-        if pending <= 0:
-            return ""
-    
-        if note_style == "hp":
-            if expected == 1 and completed == 0:
-                return "The student indicated that you observed an H&P encounter with them, but we have not yet received the corresponding formative assessment."
-            if expected > 1 and completed == 0:
-                return f"The student indicated that you observed {expected} H&P encounters with them, but we have not yet received any formative assessments."
-            return f"The student indicated that you observed {expected} H&P encounters with them. We have received {completed} submission(s) so far and are still missing {pending}."
-    
-        if note_style == "cas":
-            if expected == 1 and completed == 0:
-                return "The student reported working with you, but we have not yet received the corresponding evaluation."
-            if expected > 1 and completed == 0:
-                return f"The student reported working with you on {expected} occasions, but we have not yet received any completed evaluations."
-            return f"The student reported working with you on {expected} occasions. We have received {completed} completed evaluation(s) so far and are still missing {pending}."
-    
-        # Generic fallback.
-        if expected == 1 and completed == 0:
-            return "The student reported working with you, but we have not yet received the corresponding evaluation."
-        return f"The student reported {expected} expected evaluation(s). We have received {completed} submission(s) and are still missing {pending}."
-    
-    
-    def build_reminder_report(
-        expected: pd.DataFrame,
-        completed: pd.DataFrame,
-        allow_email_fallback: bool,
-        allow_username_fallback: bool,
-        eval_config_by_key: dict[str, EvalConfig],
-    ) -> tuple[pd.DataFrame, pd.DataFrame]:
-        """
-        Return:
-          reminders: Power Automate-ready pending rows across all selected evaluation types
-          debug: all expected rows with matched count/status
-        """
-        rows = []
-    
-        for _, e in expected.iterrows():
-            matches = row_matches(e, completed, allow_email_fallback, allow_username_fallback)
-            completed_count = len(matches)
-    
-            row = e.to_dict()
-            row["completed_eval_count"] = completed_count
-            row["completed_submit_dates"] = "; ".join(
-                matches["submit_dt"].dt.strftime("%Y-%m-%d %H:%M:%S").dropna().unique().tolist()
-            )
-            row["matched_faculty_names"] = "; ".join(
-                sorted(set(x for x in matches["faculty_name"].astype(str).tolist() if x.strip()))
-            )
-            rows.append(row)
-    
-        debug_rows = pd.DataFrame(rows)
-        if debug_rows.empty:
-            return pd.DataFrame(), debug_rows
-    
-        # Collapse duplicated expected associations for the same student/faculty/eval.
-        group_cols = [
-            "record_id",
-            "student_email",
-            "student_name",
-            "faculty_email",
-            "faculty_name",
-            "evaluation_key",
-            "evaluation_type",
-            "evaluation_label",
-        ]
-    
-        collapsed = (
-            debug_rows.groupby(group_cols, dropna=False)
-            .agg(
-                expected_eval_count=("evaluation_key", "size"),
-                completed_eval_count=("completed_eval_count", "max"),
-                first_expected_start=("expected_start", "min"),
-                last_expected_end=("expected_end", "max"),
-                completed_submit_dates=(
-                    "completed_submit_dates",
-                    lambda s: "; ".join(sorted(set("; ".join(s).split("; ")) - {""})),
-                ),
-                matched_faculty_names=(
-                    "matched_faculty_names",
-                    lambda s: "; ".join(sorted(set("; ".join(s).split("; ")) - {""})),
-                ),
-            )
-            .reset_index()
-        )
-        collapsed.insert(collapsed.columns.get_loc("record_id") + 1, "student_last_name_debug", collapsed["student_name"].astype(str).str.split().str[-1])
-        collapsed["pending_eval_count"] = (
-            collapsed["expected_eval_count"] - collapsed["completed_eval_count"]
-        ).clip(lower=0)
-    
-        collapsed["duplicate_match_flag"] = collapsed["expected_eval_count"].apply(lambda n: "YES" if n > 1 else "")
-        collapsed["needs_reminder"] = collapsed["pending_eval_count"].apply(lambda n: "YES" if n > 0 else "")
-    
-        def note_for_row(r: pd.Series) -> str:
-            config = eval_config_by_key.get(r["evaluation_key"])
-            note_style = config.note_style if config else "generic"
-            return build_reminder_note(
-                note_style=note_style,
-                expected=int(r["expected_eval_count"]),
-                completed=int(r["completed_eval_count"]),
-            )
-    
-        collapsed["reminder_note"] = collapsed.apply(note_for_row, axis=1)
-    
-        def base_for_row(r: pd.Series) -> str:
-            config = eval_config_by_key.get(r["evaluation_key"])
-            return config.redcap_base_url if config else ""
-    
-        collapsed["blank_form_link"] = collapsed.apply(
-            lambda r: make_prefill_link(base_for_row(r), r["student_name"], r["faculty_name"], partial=False),
-            axis=1,
-        )
-        collapsed["partial_form_link"] = collapsed.apply(
-            lambda r: make_prefill_link(base_for_row(r), r["student_name"], r["faculty_name"], partial=True),
-            axis=1,
-        )
-    
-        reminders = collapsed[collapsed["needs_reminder"].eq("YES")].copy()
-    
-        final_cols = [
-            "faculty_email",
-            "faculty_name",
-            "student_name",
-            "student_email",
-            "evaluation_type",
-            "evaluation_label",
-            "expected_eval_count",
-            "completed_eval_count",
-            "pending_eval_count",
-            "duplicate_match_flag",
-            "reminder_note",
-            "blank_form_link",
-            "partial_form_link",
-            "record_id",
-            "first_expected_start",
-            "last_expected_end",
-        ]
-    
-        reminders = reminders[final_cols].copy()
-    
-        for col in reminders.columns:
-            reminders[col] = reminders[col].apply(safe_for_power_automate)
-    
-        return reminders.reset_index(drop=True), collapsed.reset_index(drop=True)
-    
-    
     # ============================================================
     # Streamlit UI
     # ============================================================
@@ -1583,7 +1025,6 @@ elif instrument == "Oasis Reminder":
         "Power Automate-ready reminder CSV."
     )
     
-    EVAL_CONFIG_BY_KEY, LABEL_TO_KEY = config_maps(EVAL_CONFIGS)
     DEFAULT_LABELS = [c.label for c in EVAL_CONFIGS]
     
     with st.sidebar:
@@ -1600,6 +1041,26 @@ elif instrument == "Oasis Reminder":
             type=["csv"],
             key="oasis_file",
         )
+        stream_oasis = st.checkbox(
+            "Stream large OASIS export",
+            value=False,
+            help="Read only the columns the reminder needs, in chunks, keeping one row per submission.",
+        )
+        use_store = st.checkbox(
+            "Keep submissions in a local store",
+            value=False,
+            help="Upsert each OASIS upload into a local SQLite file and match against every submission stored "
+            "so far, so earlier terms stay available. The OASIS upload becomes optional.",
+        )
+        if use_store:
+            store_path = st.text_input("Store file", value=str(DEFAULT_STORE_PATH))
+        with st.expander("Optional: load normalized snapshots"):
+            st.caption(
+                "Parquet snapshots from an earlier run's **Raw normalized inputs** tab. Each one replaces "
+                "its CSV upload and skips re-parsing it."
+            )
+            expected_snapshot = st.file_uploader("Expected associations snapshot", type=["parquet"], key="expected_snapshot")
+            completed_snapshot = st.file_uploader("Completed OASIS snapshot", type=["parquet"], key="completed_snapshot")
     
         st.header("Evaluation types to track")
         selected_labels = st.multiselect(
@@ -1628,20 +1089,41 @@ elif instrument == "Oasis Reminder":
         include_all_students = st.checkbox("Include 'All Students' rows", value=False)
         allow_email_fallback = st.checkbox("Allow evaluator email fallback", value=True)
         allow_username_fallback = st.checkbox("Allow evaluator username fallback", value=True)
+        resolve_faculty = st.checkbox(
+            "Resolve faculty identities across files",
+            value=False,
+            help="Link evaluator IDs, emails and usernames that co-occur anywhere in either file into one faculty "
+            "identity before matching, so e.g. a blank external ID still matches through a linked email. "
+            "Adds a faculty identity table to the debug view. Not used with the local store.",
+        )
+        sanitize_text_only = st.checkbox(
+            "Only sanitize text columns",
+            value=False,
+            help="Keep counts and dates as typed values in the reminder CSV instead of passing them through the text sanitizer.",
+        )
+        match_workers = st.number_input(
+            "Matching worker processes",
+            min_value=1,
+            max_value=os.cpu_count() or 1,
+            value=1,
+            help="Split matching by evaluation and student across this many processes. Output is identical; "
+            "only large exports gain from more than one.",
+        )
+        sweep_dates = st.checkbox(
+            "Sweep reminder counts over weekdays",
+            value=False,
+            help="Also count reminders for every weekday in a range (e.g. a term) to plan reminder cadence.",
+        )
+        if sweep_dates:
+            sweep_range = st.date_input(
+                "Sweep from / to",
+                value=(as_of_date.date(), (as_of_date + pd.Timedelta(days=90)).date()),
+            )
     
     # Build final config map including optional custom evaluation.
-    selected_eval_keys = {LABEL_TO_KEY[label] for label in selected_labels}
-    if custom_eval_name.strip():
-        custom_config = EvalConfig(
-            label=custom_output_name.strip() or custom_eval_name.strip(),
-            match_name=custom_eval_name.strip(),
-            output_name=custom_output_name.strip() or display_eval_name(custom_eval_name),
-            redcap_base_url=custom_redcap_url.strip(),
-            note_style="generic",
-        )
-        custom_key = clean_eval_name(custom_config.match_name)
-        EVAL_CONFIG_BY_KEY = {**EVAL_CONFIG_BY_KEY, custom_key: custom_config}
-        selected_eval_keys.add(custom_key)
+    selected_eval_keys, EVAL_CONFIG_BY_KEY = build_eval_selection(
+        selected_labels, custom_eval_name, custom_output_name, custom_redcap_url
+    )
     
     run_clicked = st.button("Build reminder CSV", type="primary")
     
@@ -1649,7 +1131,9 @@ elif instrument == "Oasis Reminder":
         st.info("Upload both CSV files, confirm the evaluation types, then click **Build reminder CSV**.")
         st.stop()
     
-    if assoc_file is None or oasis_file is None:
+    if (assoc_file is None and expected_snapshot is None) or (
+        oasis_file is None and completed_snapshot is None and not use_store
+    ):
         st.error("Please upload both the raw association file and the raw OASIS evaluation export.")
         st.stop()
     
@@ -1658,31 +1142,208 @@ elif instrument == "Oasis Reminder":
         st.stop()
     
     try:
-        assoc_raw = read_csv_any(assoc_file)
-        oasis_raw = read_csv_any(oasis_file)
-    
-        expected = prepare_expected_associations(
-            assoc_raw=assoc_raw,
-            selected_eval_keys=selected_eval_keys,
-            eval_config_by_key=EVAL_CONFIG_BY_KEY,
-            as_of_date=as_of_date,
-            date_mode=date_mode,
-            include_all_students=include_all_students,
+        # Every stage is keyed by the upload digests plus only the settings it depends on, so a rerun
+        # after e.g. moving the as-of date reuses the parsed files and the OASIS submissions.
+        assoc_digest = None if assoc_file is None else content_digest(assoc_file.getvalue())
+        oasis_digest = None if oasis_file is None else content_digest(oasis_file.getvalue())
+        eval_keys = tuple(sorted(selected_eval_keys))
+        config_key = tuple(sorted(EVAL_CONFIG_BY_KEY.items()))
+    
+        # Parsed uploads are only read by the prepare_* functions, so they are shared without copying.
+        # A snapshot replaces its CSV, which is then not parsed at all.
+        if expected_snapshot is not None:
+            assoc_raw = None
+        else:
+            assoc_raw = perf.run(
+                "read associations",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_assoc_csv", assoc_digest, lambda: read_csv_any(assoc_file), copy=False
+                ),
+            )
+        if oasis_file is None or (completed_snapshot is not None and not use_store):
+            oasis_raw = None
+        elif stream_oasis and not use_store:
+            oasis_raw = perf.run(
+                "read OASIS export (streamed)",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_oasis_stream",
+                    (oasis_digest, eval_keys),
+                    lambda: read_oasis_export_streaming(oasis_file, selected_eval_keys),
+                    copy=False,
+                ),
+            )
+        else:
+            oasis_raw = perf.run(
+                "read OASIS export",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_oasis_csv", oasis_digest, lambda: read_csv_any(oasis_file), copy=False
+                ),
+            )
+        st.caption(
+            f"Read associations as {'(none)' if assoc_raw is None else assoc_raw.attrs.get('encoding')}, "
+            f"OASIS export as {'(none)' if oasis_raw is None else oasis_raw.attrs.get('encoding')}."
         )
     
-        completed = prepare_completed_oasis(
-            oasis_raw=oasis_raw,
-            selected_eval_keys=selected_eval_keys,
-            eval_config_by_key=EVAL_CONFIG_BY_KEY,
+        # Expected rows are prepared once without a date filter; moving the as-of date or switching the
+        # date mode only re-filters them.
+        if expected_snapshot is not None:
+            all_expected_key = ("snapshot", content_digest(expected_snapshot.getvalue()), eval_keys, config_key)
+            all_expected = perf.run(
+                "load expected snapshot",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_expected",
+                    all_expected_key,
+                    lambda: read_parquet_snapshot(
+                        expected_snapshot, SNAPSHOT_EXPECTED, selected_eval_keys, EVAL_CONFIG_BY_KEY
+                    ),
+                ),
+            )
+        else:
+            all_expected_key = (assoc_digest, eval_keys, config_key, include_all_students)
+            all_expected = perf.run(
+                "prepare expected associations",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_expected",
+                    all_expected_key,
+                    lambda: prepare_expected_associations(
+                        assoc_raw=assoc_raw,
+                        selected_eval_keys=selected_eval_keys,
+                        eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                        as_of_date=as_of_date,
+                        date_mode=DATE_MODE_ALL,
+                        include_all_students=include_all_students,
+                    ),
+                ),
+                rows_in=len(assoc_raw),
+            )
+        expected_key = (all_expected_key, as_of_date, date_mode)
+        expected = perf.run(
+            "filter by date",
+            lambda: filter_expected_by_date(all_expected, as_of_date, date_mode),
+            rows_in=len(all_expected),
         )
     
-        reminders, debug = build_reminder_report(
-            expected=expected,
-            completed=completed,
-            allow_email_fallback=allow_email_fallback,
-            allow_username_fallback=allow_username_fallback,
-            eval_config_by_key=EVAL_CONFIG_BY_KEY,
-        )
+        faculty_identities = None
+        if use_store:
+            # The store changes between runs, so its stages are not cached; later stages key on what it returned.
+            with SubmissionStore(store_path) as store:
+                if oasis_raw is not None:
+                    written = perf.run("upsert OASIS into store", lambda: store.upsert_export(oasis_raw))
+                    st.caption(f"Upserted {written} new or changed submission(s); {len(store)} stored in {store_path}.")
+                matched, pairs = perf.run(
+                    "match in store",
+                    lambda: store.match(expected, allow_email_fallback, allow_username_fallback, EVAL_CONFIG_BY_KEY),
+                    rows_in=len(expected),
+                )
+                completed = perf.run(
+                    "load completed from store",
+                    lambda: store.load_completed(selected_eval_keys, EVAL_CONFIG_BY_KEY),
+                )
+            completed_digest = content_digest(pd.util.hash_pandas_object(completed, index=False).to_numpy().tobytes())
+            completed_key = ("store", completed_digest)
+            reminders, debug = perf.run(
+                "match and build reminders",
+                lambda: build_reminder_report(
+                    expected=expected,
+                    completed=matched,
+                    allow_email_fallback=allow_email_fallback,
+                    allow_username_fallback=allow_username_fallback,
+                    eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                    sanitize_text_only=sanitize_text_only,
+                    pairs=pairs,
+                ),
+                rows_in=len(expected),
+            )
+        else:
+            if completed_snapshot is not None:
+                completed_key = ("snapshot", content_digest(completed_snapshot.getvalue()), eval_keys, config_key)
+                completed = perf.run(
+                    "load completed snapshot",
+                    lambda: STAGE_CACHE.get_or_compute(
+                        "reminder_completed",
+                        completed_key,
+                        lambda: read_parquet_snapshot(
+                            completed_snapshot, SNAPSHOT_COMPLETED, selected_eval_keys, EVAL_CONFIG_BY_KEY
+                        ),
+                    ),
+                )
+            else:
+                completed_key = (oasis_digest, stream_oasis, eval_keys, config_key)
+                completed = perf.run(
+                    "prepare completed OASIS",
+                    lambda: STAGE_CACHE.get_or_compute(
+                        "reminder_completed",
+                        completed_key,
+                        lambda: prepare_completed_oasis(
+                            oasis_raw=oasis_raw,
+                            selected_eval_keys=selected_eval_keys,
+                            eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                        ),
+                    ),
+                    rows_in=len(oasis_raw),
+                )
+    
+            if resolve_faculty:
+                faculty_identities = perf.run(
+                    "resolve faculty identities",
+                    lambda: STAGE_CACHE.get_or_compute(
+                        "reminder_faculty_identities",
+                        (expected_key, completed_key, allow_email_fallback, allow_username_fallback),
+                        lambda: resolve_faculty_identities(
+                            expected, completed, allow_email_fallback, allow_username_fallback
+                        ),
+                    ),
+                    rows_in=len(expected) + len(completed),
+                )
+                reminders, debug = perf.run(
+                    "match and build reminders",
+                    lambda: STAGE_CACHE.get_or_compute(
+                        "reminder_report",
+                        (
+                            expected_key,
+                            completed_key,
+                            allow_email_fallback,
+                            allow_username_fallback,
+                            sanitize_text_only,
+                            "faculty_identity",
+                        ),
+                        lambda: build_reminder_report(
+                            expected=expected,
+                            completed=completed,
+                            allow_email_fallback=allow_email_fallback,
+                            allow_username_fallback=allow_username_fallback,
+                            eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                            sanitize_text_only=sanitize_text_only,
+                            pairs=match_by_faculty_identity(expected, completed, faculty_identities),
+                        ),
+                    ),
+                    rows_in=len(expected),
+                )
+            else:
+                reminders, debug = perf.run(
+                    "match and build reminders",
+                    lambda: STAGE_CACHE.get_or_compute(
+                        "reminder_report",
+                        (expected_key, completed_key, allow_email_fallback, allow_username_fallback, sanitize_text_only),
+                        lambda: build_reminder_report_parallel(
+                            expected=expected,
+                            completed=completed,
+                            allow_email_fallback=allow_email_fallback,
+                            allow_username_fallback=allow_username_fallback,
+                            eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                            sanitize_text_only=sanitize_text_only,
+                            workers=int(match_workers),
+                        ),
+                    ),
+                    rows_in=len(expected),
+                )
+        # 2026-27 debug view: student last name next to record_id for sorting/troubleshooting.
+        if not debug.empty:
+            debug.insert(
+                debug.columns.get_loc("record_id") + 1,
+                "student_last_name_debug",
+                debug["student_name"].astype(str).str.split().str[-1],
+            )
     
     except Exception as e:  # pragma: no cover - shown in Streamlit
         st.exception(e)
@@ -1710,6 +1371,34 @@ elif instrument == "Oasis Reminder":
             counts[c] = counts[c].astype(int)
         st.dataframe(counts, use_container_width=True)
     
+    if sweep_dates and len(sweep_range) == 2:
+        st.subheader("Reminder cadence sweep")
+        st.caption(f"Reminder rows on every weekday from {sweep_range[0]} to {sweep_range[1]} ({date_mode.lower()}).")
+        sweep = perf.run(
+            "reminder sweep",
+            lambda: STAGE_CACHE.get_or_compute(
+                "reminder_sweep",
+                (all_expected_key, completed_key, date_mode, allow_email_fallback, allow_username_fallback, tuple(sweep_range)),
+                lambda: sweep_reminder_counts(
+                    expected=all_expected,
+                    completed=completed,
+                    dates=pd.bdate_range(*sweep_range),
+                    date_mode=date_mode,
+                    allow_email_fallback=allow_email_fallback,
+                    allow_username_fallback=allow_username_fallback,
+                ),
+            ),
+            rows_in=len(all_expected),
+        )
+        st.line_chart(sweep.pivot(index="as_of_date", columns="evaluation_type", values="reminder_rows"))
+        st.dataframe(sweep, use_container_width=True)
+        st.download_button(
+            label="Download reminder_sweep.csv",
+            data=encode_csv(sweep, "utf-8-sig"),
+            file_name="reminder_sweep.csv",
+            mime="text/csv",
+        )
+
     tab1, tab2, tab3, tab4 = st.tabs([
         "Combined Power Automate CSV",
         "Separate downloads",
@@ -1798,14 +1487,14 @@ elif instrument == "Oasis Reminder":
     
         st.download_button(
             label=f"Download preceptor_eval_reminders.csv ({len(cas_export)} rows)",
-            data=cas_export.to_csv(index=False).encode("utf-8-sig"),
+            data=encode_csv(cas_export, "utf-8-sig"),
             file_name="preceptor_eval_reminders.csv",
             mime="text/csv",
         )
     
         st.download_button(
             label=f"Download observed_hp_reminders.csv ({len(hp_export)} rows)",
-            data=hp_export.to_csv(index=False).encode("utf-8-sig"),
+            data=encode_csv(hp_export, "utf-8-sig"),
             file_name="observed_hp_reminders.csv",
             mime="text/csv",
         )
@@ -1817,12 +1506,12 @@ elif instrument == "Oasis Reminder":
         else:
             for eval_type in sorted(reminders["evaluation_type"].dropna().unique().tolist()):
                 sub = reminders[reminders["evaluation_type"].eq(eval_type)].copy()
-                safe_name = re.sub(r"[^a-z0-9]+", "_", eval_type.lower()).strip("_") or "evaluation"
+                safe_name = reminder_file_stem(eval_type)
                 st.write(f"**{eval_type}** — {len(sub)} reminder row(s)")
                 st.dataframe(sub, use_container_width=True)
                 st.download_button(
                     label=f"Download {safe_name}_reminders.csv",
-                    data=sub.to_csv(index=False).encode("utf-8-sig"),
+                    data=encode_csv(sub, "utf-8-sig"),
                     file_name=f"{safe_name}_reminders.csv",
                     mime="text/csv",
                     key=f"download_{safe_name}",
@@ -1836,7 +1525,7 @@ elif instrument == "Oasis Reminder":
         )
         st.dataframe(debug, use_container_width=True)
     
-        debug_bytes = debug.to_csv(index=False).encode("utf-8-sig")
+        debug_bytes = encode_csv(debug, "utf-8-sig")
         st.download_button(
             label="Download debug_match_report.csv",
             data=debug_bytes,
@@ -1844,6 +1533,20 @@ elif instrument == "Oasis Reminder":
             mime="text/csv",
         )
     
+        if faculty_identities is not None:
+            st.subheader("Faculty identity resolution")
+            st.caption(
+                "Every evaluator ID / email / username combination seen in either file and the faculty_id it "
+                "resolved to. Rows without a faculty_id had no usable identifier and cannot match."
+            )
+            st.dataframe(faculty_identities, use_container_width=True)
+            st.download_button(
+                label="Download faculty_identities.csv",
+                data=encode_csv(faculty_identities, "utf-8-sig"),
+                file_name="faculty_identities.csv",
+                mime="text/csv",
+            )
+    
     with tab4:
         st.subheader("Normalized expected associations")
         st.dataframe(expected, use_container_width=True)
@@ -1853,14 +1556,42 @@ elif instrument == "Oasis Reminder":
     
         st.download_button(
             label="Download normalized_expected_associations.csv",
-            data=expected.to_csv(index=False).encode("utf-8-sig"),
+            data=encode_csv(expected, "utf-8-sig"),
             file_name="normalized_expected_associations.csv",
             mime="text/csv",
         )
         st.download_button(
             label="Download normalized_completed_oasis.csv",
-            data=completed.to_csv(index=False).encode("utf-8-sig"),
+            data=encode_csv(completed, "utf-8-sig"),
             file_name="normalized_completed_oasis.csv",
             mime="text/csv",
         )
     
+        st.caption(
+            "Parquet snapshots keep column types and hold every expected association before the date filter. "
+            "Load them under **Optional: load normalized snapshots** to skip re-parsing the CSVs."
+        )
+        st.download_button(
+            label=f"Download {SNAPSHOT_FILE_NAMES[SNAPSHOT_EXPECTED]}",
+            data=encode_snapshot(all_expected, SNAPSHOT_EXPECTED),
+            file_name=SNAPSHOT_FILE_NAMES[SNAPSHOT_EXPECTED],
+            mime="application/octet-stream",
+        )
+        st.download_button(
+            label=f"Download {SNAPSHOT_FILE_NAMES[SNAPSHOT_COMPLETED]}",
+            data=encode_snapshot(completed, SNAPSHOT_COMPLETED),
+            file_name=SNAPSHOT_FILE_NAMES[SNAPSHOT_COMPLETED],
+            mime="application/octet-stream",
+        )
+    
+
+
+# ─── Performance ────────────────────────────────────────────────────────────
+with st.expander("⏱️ Performance"):
+    st.caption(
+        f"Run took {perf.elapsed:.2f} s, {perf.total_seconds:.2f} s of it in the stages below. "
+        f"Stage cache: {STAGE_CACHE.hits} hit(s), {STAGE_CACHE.misses} miss(es)."
+    )
+    st.dataframe(perf.to_frame(), hide_index=True)
+if log_perf:
+    perf.append_jsonl(app="app2627.py", instrument=instrument)
@@ -0,0 +1,91 @@
+"""
+Compare row-wise Series.apply against the factorized clean_column layer.
+
+Run from the repo root:
+    python -m benchmarks.bench_normalize --forms 5000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from oasis_normalize import (
+    clean_column,
+    clean_email,
+    clean_eval_name,
+    clean_id,
+    clean_name_for_display,
+)
+
+QUESTIONS_PER_FORM = 23
+
+OASIS_COLUMNS = {
+    "Student": clean_name_for_display,
+    "Student Username": clean_id,
+    "Student External ID": clean_id,
+    "Student Email": clean_email,
+    "Evaluator": clean_name_for_display,
+    "Evaluator Username": clean_id,
+    "Evaluator External ID": clean_id,
+    "Evaluator Email": clean_email,
+    "Evaluation": clean_eval_name,
+}
+
+
+def make_oasis_export(n_forms: int, n_students: int, n_faculty: int, seed: int = 0) -> pd.DataFrame:
+    """Question-level export: every form repeats its people/evaluation columns once per question."""
+    rng = np.random.default_rng(seed)
+    evals = ["*Clinical Assessment of Student", "PEDS History Taking & Physical Exam", " Mid-Cycle  Feedback "]
+
+    s = rng.integers(n_students, size=n_forms)
+    f = rng.integers(n_faculty, size=n_forms)
+    e = rng.integers(len(evals), size=n_forms)
+    forms = pd.DataFrame({
+        "Student": [f"Last{i}, First{i}; MD2028" for i in s],
+        "Student Username": [f"s{i:05d}" for i in s],
+        "Student External ID": [f"S{i:05d}" for i in s],
+        "Student Email": [f"S{i}@PSU.edu " for i in s],
+        "Evaluator": [f"Doc{i} - Pat{i}" if i % 3 == 0 else f"Doc{i}, Pat{i}" for i in f],
+        "Evaluator Username": [f"f{i:05d}" for i in f],
+        "Evaluator External ID": [f"F{i:05d}" for i in f],
+        "Evaluator Email": [f"f{i}@pennstatehealth.psu.edu" for i in f],
+        "Evaluation": [evals[i] for i in e],
+    })
+    return forms.loc[forms.index.repeat(QUESTIONS_PER_FORM)].reset_index(drop=True)
+
+
+def timed(fn) -> tuple[float, pd.Series]:
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--forms", type=int, default=5000)
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--faculty", type=int, default=400)
+    args = parser.parse_args()
+
+    df = make_oasis_export(args.forms, args.students, args.faculty)
+    print(f"{len(df):,} rows ({args.forms:,} forms x {QUESTIONS_PER_FORM} questions)\n")
+    print(f"{'column':<24}{'uniques':>9}{'apply s':>10}{'factorized s':>14}{'speedup':>9}")
+
+    total_apply = total_fact = 0.0
+    for col, cleaner in OASIS_COLUMNS.items():
+        t_apply, expected = timed(lambda: df[col].apply(cleaner))
+        t_fact, got = timed(lambda: clean_column(df[col], cleaner))
+        if expected.tolist() != got.tolist():
+            raise SystemExit(f"Output mismatch in {col}")
+        total_apply += t_apply
+        total_fact += t_fact
+        print(f"{col:<24}{df[col].nunique():>9,}{t_apply:>10.3f}{t_fact:>14.3f}{t_apply / t_fact:>8.1f}x")
+
+    print(f"{'total':<24}{'':>9}{total_apply:>10.3f}{total_fact:>14.3f}{total_apply / total_fact:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Wall time and peak memory of each reminder pipeline stage on synthetic inputs.
+
+Sizes are OASIS export rows; associations get one row per 10 OASIS rows. Run from the repo root:
+    python -m benchmarks.bench_reminder --sizes 1000 10000 100000 1000000 --output bench_reminder.csv
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import make_dataset
+from oasis_reminder_core import (
+    EVAL_CONFIGS,
+    build_eval_selection,
+    build_reminder_report_parallel,
+    prepare_completed_oasis,
+    prepare_expected_associations,
+    read_csv_any,
+    read_oasis_export_streaming,
+)
+
+AS_OF = pd.Timestamp("2026-01-15")
+
+
+def measure(fn, track_memory: bool) -> tuple[object, float, float]:
+    """Run fn once; return (result, seconds, peak MiB allocated while it ran)."""
+    if track_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - t0
+    peak = 0.0
+    if track_memory:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return out, seconds, peak
+
+
+def run_size(
+    oasis_rows: int, date_mode: str, stream: bool, track_memory: bool, seed: int, workers: int = 1
+) -> list[dict]:
+    assoc_df, oasis_df = make_dataset(oasis_rows, seed=seed)
+    assoc_bytes = assoc_df.to_csv(index=False).encode("utf-8")
+    oasis_bytes = oasis_df.to_csv(index=False).encode("utf-8")
+    selected_eval_keys, eval_config_by_key = build_eval_selection([c.label for c in EVAL_CONFIGS])
+
+    stages = [
+        ("read associations", lambda: read_csv_any(BytesIO(assoc_bytes))),
+        (
+            "read OASIS export",
+            (lambda: read_oasis_export_streaming(BytesIO(oasis_bytes), selected_eval_keys))
+            if stream
+            else (lambda: read_csv_any(BytesIO(oasis_bytes))),
+        ),
+        (
+            "prepare_expected_associations",
+            lambda: prepare_expected_associations(
+                assoc_raw=results["read associations"],
+                selected_eval_keys=selected_eval_keys,
+                eval_config_by_key=eval_config_by_key,
+                as_of_date=AS_OF,
+                date_mode=date_mode,
+                include_all_students=False,
+            ),
+        ),
+        (
+            "prepare_completed_oasis",
+            lambda: prepare_completed_oasis(
+                oasis_raw=results["read OASIS export"],
+                selected_eval_keys=selected_eval_keys,
+                eval_config_by_key=eval_config_by_key,
+            ),
+        ),
+        (
+            "build_reminder_report",
+            lambda: build_reminder_report_parallel(
+                expected=results["prepare_expected_associations"],
+                completed=results["prepare_completed_oasis"],
+                allow_email_fallback=True,
+                allow_username_fallback=True,
+                eval_config_by_key=eval_config_by_key,
+                sanitize_text_only=False,
+                workers=workers,
+            ),
+        ),
+    ]
+
+    results: dict[str, object] = {}
+    rows = []
+    for stage, fn in stages:
+        out, seconds, peak = measure(fn, track_memory)
+        results[stage] = out
+        n_out = len(out[0]) if isinstance(out, tuple) else len(out)
+        rows.append({
+            "oasis_rows": len(oasis_df),
+            "association_rows": len(assoc_df),
+            "stage": stage,
+            "seconds": round(seconds, 4),
+            "peak_mib": round(peak, 1),
+            "rows_out": n_out,
+        })
+    return rows
+
+
+def markdown_table(df: pd.DataFrame) -> str:
+    lines = ["| " + " | ".join(df.columns) + " |", "|" + "---|" * len(df.columns)]
+    lines += ["| " + " | ".join(str(v) for v in row) + " |" for row in df.itertuples(index=False)]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--date-mode", default="No date filter")
+    parser.add_argument("--stream", action="store_true", help="Read the OASIS export with the streaming reader")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows pandas down)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for build_reminder_report")
+    parser.add_argument("--output", type=Path, help="Write the results table here (.csv or .md)")
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        rows.extend(run_size(size, args.date_mode, args.stream, not args.no_memory, args.seed, args.workers))
+    results = pd.DataFrame(rows)
+
+    print(results.to_string(index=False))
+    if args.output:
+        if args.output.suffix == ".md":
+            args.output.write_text(markdown_table(results))
+        else:
+            results.to_csv(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
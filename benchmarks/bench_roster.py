@@ -0,0 +1,106 @@
+"""
+Compare per-cell Series.apply against the roster_clean column kernels on a synthetic OASIS roster.
+
+Covers what Roster_KP and Roster_Updater clean: text columns (strip), start/end dates parsed to
+datetimes (Roster_KP) and formatted as MM-DD-YYYY (Roster_Updater). Run from the repo root:
+    python -m benchmarks.bench_roster --students 5000
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from roster_clean import _parse_date_text, format_date_column, parse_date_column, strip_column
+
+TERM_START = pd.Timestamp("2025-06-30")
+
+
+# The per-cell helpers Roster_KP / Roster_Updater applied before roster_clean (the reference output).
+def clean_text(x):
+    if pd.isna(x):
+        return ""
+    return str(x).strip()
+
+
+def safe_date(x):
+    x = clean_text(x)
+    if x == "":
+        return pd.NaT
+    return pd.to_datetime(x, errors="coerce")
+
+
+def format_date(x):
+    x = clean_text(x)
+    if x == "":
+        return ""
+    parsed = pd.to_datetime(x, errors="coerce")
+    if pd.isna(parsed):
+        return ""
+    return parsed.strftime("%m-%d-%Y")
+
+
+def make_roster(n_students: int, n_rotations: int = 13, seed: int = 0) -> pd.DataFrame:
+    """OASIS roster export as read with dtype=str: padded text, a few blanks, 4-week rotations."""
+    rng = np.random.default_rng(seed)
+    idx = np.arange(n_students)
+    starts = TERM_START + pd.to_timedelta(rng.integers(n_rotations, size=n_students) * 28, unit="D")
+    start = pd.Series(starts.strftime("%m/%d/%Y"))
+    end = pd.Series((starts + pd.Timedelta(days=27)).strftime("%m/%d/%Y"))
+    # Hand-edited rows: blank or unparseable dates, other date styles.
+    start[idx % 97 == 0] = ""
+    end[idx % 89 == 0] = "TBD"
+    start[idx % 53 == 0] = (starts[idx % 53 == 0]).strftime("%Y-%m-%d")
+    return pd.DataFrame({
+        "External ID": [f" abc{i:05d} " if i % 11 == 0 else f"abc{i:05d}" for i in idx],
+        "Email Address": [f"s{i}@psu.edu" for i in idx],
+        "PSU ID": [f"9{i:08d}" for i in idx],
+        "Track": np.where(idx % 5 == 0, "KPLIC ", "Traditional"),
+        "Location": np.where(idx % 3 == 0, " Hershey", "State College"),
+        "Start Date": start,
+        "End Date": end,
+    }).fillna("")
+
+
+def timed(fn) -> tuple[float, pd.Series]:
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--rotations", type=int, default=13)
+    args = parser.parse_args()
+
+    df = make_roster(args.students, args.rotations)
+    cases = [(col, clean_text, strip_column) for col in ["External ID", "Email Address", "PSU ID", "Track", "Location"]]
+    for col in ["Start Date", "End Date"]:
+        cases.append((col, safe_date, parse_date_column))
+        cases.append((col, format_date, format_date_column))
+
+    print(f"{len(df):,} students, {args.rotations} rotations\n")
+    print(f"{'column':<16}{'cleaner':<18}{'uniques':>9}{'apply s':>10}{'kernel s':>10}{'speedup':>9}")
+    total_apply = total_kernel = 0.0
+    for col, cleaner, kernel in cases:
+        t_apply, expected = timed(lambda: df[col].apply(cleaner))
+        # Time the kernels cold: the date parse is memoized across calls.
+        _parse_date_text.cache_clear()
+        t_kernel, got = timed(lambda: kernel(df[col]))
+        if expected.tolist() != got.tolist():
+            raise SystemExit(f"Output mismatch in {col} ({cleaner.__name__})")
+        total_apply += t_apply
+        total_kernel += t_kernel
+        print(
+            f"{col:<16}{cleaner.__name__:<18}{df[col].nunique():>9,}{t_apply:>10.3f}{t_kernel:>10.3f}"
+            f"{t_apply / t_kernel:>8.1f}x"
+        )
+
+    print(f"{'total':<16}{'':<18}{'':>9}{total_apply:>10.3f}{total_kernel:>10.3f}{total_apply / total_kernel:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
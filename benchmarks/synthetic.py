@@ -0,0 +1,238 @@
+"""
+Seeded synthetic inputs for the reminder pipeline (no PHI).
+
+Produces a raw evaluation-associations file and a question-level OASIS export shaped like the real
+downloads: pipe-separated Manual Evaluations with stray asterisks/spacing, "All Students" rows,
+Delete markers, blank evaluation-period dates, evaluator identity drift (missing external IDs,
+email case) and submissions that do not match any association.
+
+Write a pair of CSVs from the repo root:
+    python -m benchmarks.synthetic --oasis-rows 230000 --out-dir synthetic_data
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+QUESTIONS_PER_FORM = 23
+
+LAST_NAMES = np.array([
+    "Smith", "O'Neil", "García", "Lee", "Nguyen", "Brown", "Khan", "De La Cruz", "Ng", "Park",
+    "Johnson", "Müller", "Patel", "Kowalski", "Okafor", "Rossi", "Haddad", "Chen", "Silva", "Cohen",
+])
+FIRST_NAMES = np.array([
+    "Ann", "Bob", "Chloé", "Dev", "Eve", "Fay", "Gus", "Hal", "Ivy", "Jo",
+    "Kai", "Lena", "Mo", "Nia", "Omar", "Pia", "Quinn", "Raj", "Sol", "Tess",
+])
+TRACKED_EVALS = ["*Clinical Assessment of Student", "PEDS History Taking & Physical Exam"]
+OTHER_EVALS = ["Clinical Teaching Eval", "Mid-Cycle Feedback"]
+MANUAL_EVALUATION_SETS = [
+    ("*Clinical Assessment of Student",),
+    ("*Clinical Assessment of Student", "PEDS History Taking & Physical Exam"),
+    ("PEDS History Taking & Physical Exam",),
+    ("*Clinical Assessment of Student", "Clinical Teaching Eval"),
+    ("Mid-Cycle Feedback",),
+    ("*Clinical Assessment of Student", "PEDS History Taking & Physical Exam", "Mid-Cycle Feedback"),
+]
+TERM_START = pd.Timestamp("2025-07-01")
+
+
+def make_people(rng: np.random.Generator, n: int, prefix: str, students: bool) -> pd.DataFrame:
+    last = LAST_NAMES[rng.integers(len(LAST_NAMES), size=n)]
+    first = FIRST_NAMES[rng.integers(len(FIRST_NAMES), size=n)]
+    idx = np.arange(n)
+    # Suffix most last names so identities are mostly, but not entirely, unique by name.
+    last = np.where(idx % 7 == 0, last, np.char.add(last, (idx % 997).astype(str)))
+
+    if students:
+        name = np.char.add(np.char.add(np.char.add(last, ", "), first), "; MD2028")
+    else:
+        name = np.where(
+            idx % 4 == 0,
+            np.char.add(np.char.add(last, " - "), first),
+            np.char.add(np.char.add(last, ", "), first),
+        )
+    username = np.char.add(prefix, np.char.zfill(idx.astype(str), 6))
+    email_domain = "@psu.edu" if students else "@pennstatehealth.psu.edu"
+    return pd.DataFrame({
+        "name": name,
+        "username": username,
+        "external_id": np.where(rng.random(n) < 0.05, "", np.char.upper(username)),
+        "email": np.char.add(username, email_domain),
+    })
+
+
+def _format_dates(dates: pd.DatetimeIndex, fmt: str) -> np.ndarray:
+    # strftime once per distinct date; synthetic terms only have a few hundred.
+    codes, uniques = pd.factorize(dates)
+    return np.asarray(uniques.strftime(fmt), dtype=object)[codes]
+
+
+def make_associations(
+    n_rows: int,
+    n_students: int | None = None,
+    n_faculty: int | None = None,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Raw evaluation-associations / preceptor matching file with n_rows rows."""
+    rng = np.random.default_rng(seed)
+    n_students = n_students or max(n_rows // 8, 20)
+    n_faculty = n_faculty or max(n_rows // 10, 10)
+    students = make_people(rng, n_students, "s", students=True)
+    faculty = make_people(rng, n_faculty, "f", students=False)
+
+    s = rng.integers(n_students, size=n_rows)
+    f = rng.integers(n_faculty, size=n_rows)
+    block_start = TERM_START + pd.to_timedelta(rng.integers(0, 10, size=n_rows) * 28, unit="D")
+    block_end = block_start + pd.Timedelta(days=27)
+    eval_sets = rng.integers(len(MANUAL_EVALUATION_SETS), size=n_rows)
+    manual = np.array(["|".join(e) for e in MANUAL_EVALUATION_SETS], dtype=object)[eval_sets]
+    manual = np.where(rng.random(n_rows) < 0.05, np.char.add(manual.astype(str), " "), manual)
+    manual = np.where(rng.random(n_rows) < 0.02, "", manual)
+
+    all_students = rng.random(n_rows) < 0.01
+    faculty_email = faculty["email"].to_numpy()[f]
+    faculty_email = np.where(rng.random(n_rows) < 0.3, np.char.upper(faculty_email.astype(str)), faculty_email)
+
+    df = pd.DataFrame({
+        "Delete": np.where(rng.random(n_rows) < 0.03, "x", ""),
+        "Start Date": _format_dates(block_start, "%m/%d/%Y"),
+        "End Date": _format_dates(block_end, "%m/%d/%Y"),
+        "Location": np.where(rng.random(n_rows) < 0.5, "HMC", "Kaiser"),
+        "Faculty Name": faculty["name"].to_numpy()[f],
+        "Faculty Username": np.where(rng.random(n_rows) < 0.1, "", faculty["username"].to_numpy()[f]),
+        "Faculty External ID": np.where(rng.random(n_rows) < 0.1, "", faculty["external_id"].to_numpy()[f]),
+        "Faculty Email": np.where(rng.random(n_rows) < 0.05, "", faculty_email),
+        "Type of Association": "Evaluator",
+        "Student Name": np.where(all_students, "All Students", students["name"].to_numpy()[s]),
+        "Student Username": np.where(all_students, "", students["username"].to_numpy()[s]),
+        "Student External ID": np.where(all_students, "All Students", students["external_id"].to_numpy()[s]),
+        "Student Email": np.where(all_students, "", students["email"].to_numpy()[s]),
+        "Evaluation Period Start Date": np.where(
+            rng.random(n_rows) < 0.3, "", _format_dates(block_start, "%m/%d/%Y")
+        ),
+        "Evaluation Period End Date": np.where(
+            rng.random(n_rows) < 0.3, "", _format_dates(block_end + pd.Timedelta(days=3), "%m/%d/%Y")
+        ),
+        "Classification": "Clerkship",
+        "Student Activity": "Pediatrics",
+        "Manual Evaluations": manual,
+    })
+    return df
+
+
+def make_oasis_export(
+    associations: pd.DataFrame,
+    n_rows: int,
+    questions_per_form: int = QUESTIONS_PER_FORM,
+    completion_rate: float = 0.7,
+    wide_columns: int = 0,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """
+    Question-level OASIS export with about n_rows rows (questions_per_form rows per submission).
+
+    completion_rate of the submissions come from real association/evaluation pairs; the rest pair
+    random students and evaluators. wide_columns adds that many unused filler columns (the real
+    export carries q*_question / answer columns the reminder never reads).
+    """
+    rng = np.random.default_rng(seed + 1)
+    n_forms = max(-(-n_rows // questions_per_form), 1)
+
+    live = associations[
+        associations["Delete"].eq("")
+        & associations["Student External ID"].ne("All Students")
+        & associations["Manual Evaluations"].ne("")
+    ].reset_index(drop=True)
+    if live.empty:
+        live = associations.reset_index(drop=True)
+
+    pick = rng.integers(len(live), size=n_forms)
+    matched = rng.random(n_forms) < completion_rate
+    noise_student = rng.integers(len(live), size=n_forms)
+    rows = live.iloc[pick].reset_index(drop=True)
+    other = live.iloc[noise_student].reset_index(drop=True)
+
+    # One evaluation per submission, taken from the association's own pipe list.
+    items = rows["Manual Evaluations"].str.strip().str.split("|")
+    n_items = items.str.len().fillna(1).astype(int).to_numpy()
+    which = (rng.random(n_forms) * n_items).astype(int)
+    evaluation = np.array([lst[i] if isinstance(lst, list) else lst for lst, i in zip(items, which)], dtype=object)
+    noise_eval = np.array(TRACKED_EVALS + OTHER_EVALS, dtype=object)[rng.integers(4, size=n_forms)]
+    evaluation = np.where(matched, evaluation, noise_eval)
+    # OASIS drops the asterisk and sometimes carries odd spacing.
+    evaluation = pd.Series(evaluation).str.lstrip("*").to_numpy()
+    evaluation = np.where(rng.random(n_forms) < 0.05, np.char.add("  ", evaluation.astype(str)), evaluation)
+
+    student_cols = ["Student Name", "Student Username", "Student External ID", "Student Email"]
+    stud = {c: np.where(matched, rows[c].to_numpy(), other[c].to_numpy()) for c in student_cols}
+
+    start = pd.to_datetime(rows["Start Date"], format="%m/%d/%Y")
+    submit = start + pd.to_timedelta(rng.integers(0, 35 * 24 * 60, size=n_forms), unit="min")
+    submit_text = np.asarray(submit.dt.strftime("%m/%d/%Y %H:%M"), dtype=object)
+    submit_text = np.where(rng.random(n_forms) < 0.01, "", submit_text)
+
+    evaluator_email = rows["Faculty Email"].to_numpy()
+    forms = pd.DataFrame({
+        "Course": "PED 700",
+        "Start Date": rows["Start Date"].to_numpy(),
+        "End Date": rows["End Date"].to_numpy(),
+        "Student": stud["Student Name"],
+        "Student Username": stud["Student Username"],
+        "Student External ID": stud["Student External ID"],
+        "Student Email": stud["Student Email"],
+        "Evaluator": np.where(
+            rng.random(n_forms) < 0.05, np.char.add(rows["Faculty Name"].to_numpy().astype(str), ","), rows["Faculty Name"].to_numpy()
+        ),
+        "Evaluator Username": rows["Faculty Username"].to_numpy(),
+        "Evaluator External ID": np.where(rng.random(n_forms) < 0.15, "", rows["Faculty External ID"].to_numpy()),
+        "Evaluator Email": np.where(rng.random(n_forms) < 0.3, np.char.lower(evaluator_email.astype(str)), evaluator_email),
+        "Evaluation": evaluation,
+        "Form Record": (100000 + np.arange(n_forms)).astype(str),
+        "Submit Date": submit_text,
+    })
+
+    df = forms.loc[forms.index.repeat(questions_per_form)].reset_index(drop=True)
+    question = np.tile(np.arange(1, questions_per_form + 1), n_forms)
+    df["Question Number"] = question.astype(str)
+    df["Question"] = np.char.add("Question ", question.astype(str))
+    df["Answer Text"] = np.where(question % 5 == 0, "Free text answer, with a comma", "")
+    df["Multiple Choice Value"] = (question % 4 + 1).astype(str)
+    for i in range(1, wide_columns + 1):
+        df[f"q{i}_filler"] = "x"
+    return df.iloc[:n_rows] if n_rows >= questions_per_form else df
+
+
+def make_dataset(
+    oasis_rows: int,
+    association_rows: int | None = None,
+    wide_columns: int = 0,
+    seed: int = 0,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """(associations, oasis_export); associations default to one row per 10 OASIS rows."""
+    associations = make_associations(association_rows or max(oasis_rows // 10, 50), seed=seed)
+    oasis = make_oasis_export(associations, oasis_rows, wide_columns=wide_columns, seed=seed)
+    return associations, oasis
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--oasis-rows", type=int, default=23_000)
+    parser.add_argument("--association-rows", type=int, default=None)
+    parser.add_argument("--wide-columns", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", type=Path, default=Path("synthetic_data"))
+    args = parser.parse_args()
+
+    associations, oasis = make_dataset(args.oasis_rows, args.association_rows, args.wide_columns, args.seed)
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    associations.to_csv(args.out_dir / "associations.csv", index=False)
+    oasis.to_csv(args.out_dir / "oasis_export.csv", index=False)
+    print(f"Wrote {len(associations):,} association rows and {len(oasis):,} OASIS rows to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import codecs
+from io import BytesIO
+from typing import Callable
+
+import pandas as pd
+
+# How much of a file the encoding sniffer looks at. OASIS/REDCap exports are UTF-8 or Windows
+# latin-1; a non-ASCII name almost always shows up well inside the first rows.
+SNIFF_BYTES = 64 * 1024
+FALLBACK_ENCODING = "latin-1"
+
+# Rows per to_csv write: large frames are encoded a chunk at a time instead of first being rendered
+# into one str the size of the file and then copied again by .encode().
+CSV_CHUNK_ROWS = 50_000
+
+
+def sniff_encoding(raw: bytes, sample_size: int = SNIFF_BYTES) -> str:
+    """Pick a CSV encoding from the BOM, else from whether a bounded sample decodes as UTF-8."""
+    if raw.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    try:
+        # final=False so a multi-byte character cut by the sample boundary is not an error.
+        codecs.getincrementaldecoder("utf-8")().decode(raw[:sample_size], final=False)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def read_csv_bytes(raw: bytes, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_csv on in-memory bytes, parsed once with the sniffed encoding.
+
+    The encoding used is stored in df.attrs["encoding"]. If a non-UTF-8 byte turns up past the
+    sniffed sample, the file is re-read as latin-1 (which decodes any byte sequence).
+    """
+    encoding = sniff_encoding(raw)
+    try:
+        df = pd.read_csv(BytesIO(raw), encoding=encoding, **kwargs)
+    except UnicodeDecodeError:
+        encoding = FALLBACK_ENCODING
+        df = pd.read_csv(BytesIO(raw), encoding=encoding, **kwargs)
+    df.attrs["encoding"] = encoding
+    return df
+
+
+def write_csv_bytes(df: pd.DataFrame, encoding: str = "utf-8") -> bytes:
+    """Same bytes as df.to_csv(index=False).encode(encoding), written to a buffer in row chunks."""
+    buffer = BytesIO()
+    df.to_csv(buffer, index=False, encoding=encoding, chunksize=CSV_CHUNK_ROWS)
+    return buffer.getvalue()
+
+
+def csv_download(df: pd.DataFrame, encoding: str = "utf-8") -> Callable[[], bytes]:
+    """
+    Deferred st.download_button data for df: Streamlit only calls it when the button is clicked,
+    so reruns no longer encode every download. df must not be modified after the button is drawn.
+    """
+    return lambda: write_csv_bytes(df, encoding)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import re
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+
+# ============================================================
+# Scalar cleaners (shared by the OASIS reminder builders)
+# ============================================================
+def clean_text(x) -> str:
+    return re.sub(r"\s+", " ", str(x or "").strip())
+
+
+def clean_eval_name(x) -> str:
+    """Normalize evaluation names from both files: remove leading asterisks, normalize spacing/case."""
+    s = clean_text(x)
+    s = s.lstrip("*").strip()
+    return re.sub(r"\s+", " ", s).lower()
+
+
+def display_eval_name(x) -> str:
+    """Human-facing evaluation name."""
+    s = clean_text(x).lstrip("*").strip()
+    return re.sub(r"\s+", " ", s)
+
+
+def clean_email(x) -> str:
+    return clean_text(x).lower()
+
+
+def clean_id(x) -> str:
+    return clean_text(x).lower()
+
+
+def clean_name_for_display(x) -> str:
+    """
+    Convert 'Last, First; MD2028' or 'Last - First' to 'First Last'.
+    Leaves already-readable names alone.
+    """
+    s = clean_text(x)
+    s = re.sub(r";\s*MD\d{4}", "", s, flags=re.IGNORECASE).strip()
+
+    if " - " in s:
+        last, first = s.split(" - ", 1)
+        return f"{first.strip()} {last.strip()}".strip()
+
+    if "," in s:
+        last, first = s.split(",", 1)
+        return f"{first.strip()} {last.strip()}".strip()
+
+    return s
+
+
+# ============================================================
+# Vectorized kernels (same output as the scalar cleaners for str input)
+# ============================================================
+def _clean_text_str(s: pd.Series) -> pd.Series:
+    return s.str.strip().str.replace(r"\s+", " ", regex=True)
+
+
+def _clean_lower_str(s: pd.Series) -> pd.Series:
+    return _clean_text_str(s).str.lower()
+
+
+def _clean_eval_name_str(s: pd.Series) -> pd.Series:
+    return _display_eval_name_str(s).str.lower()
+
+
+def _display_eval_name_str(s: pd.Series) -> pd.Series:
+    return _clean_text_str(s).str.lstrip("*").str.strip().str.replace(r"\s+", " ", regex=True)
+
+
+def _swap_around(s: pd.Series, sep: str) -> pd.Series:
+    if s.empty:
+        return s
+    parts = s.str.partition(sep)
+    return (parts[2].str.strip() + " " + parts[0].str.strip()).str.strip()
+
+
+def _clean_name_for_display_str(s: pd.Series) -> pd.Series:
+    s = _clean_text_str(s).str.replace(r";\s*MD\d{4}", "", regex=True, flags=re.IGNORECASE).str.strip()
+    has_dash = s.str.contains(" - ", regex=False)
+    has_comma = s.str.contains(",", regex=False)
+    out = s.copy()
+    out[has_comma] = _swap_around(s[has_comma], ",")
+    out[has_dash] = _swap_around(s[has_dash], " - ")
+    return out
+
+
+VECTOR_KERNELS: dict[Callable, Callable[[pd.Series], pd.Series]] = {
+    clean_text: _clean_text_str,
+    clean_id: _clean_lower_str,
+    clean_email: _clean_lower_str,
+    clean_eval_name: _clean_eval_name_str,
+    display_eval_name: _display_eval_name_str,
+    clean_name_for_display: _clean_name_for_display_str,
+}
+
+
+# ============================================================
+# Factorized normalization layer
+# ============================================================
+def clean_column(values: pd.Series, cleaner: Callable) -> pd.Series:
+    """
+    Same result as values.apply(cleaner), computed once per distinct value.
+
+    The column is factorized, the cleaner runs on the unique values only (through its vectorized
+    kernel when it has one and the uniques are all strings), and the results are mapped back.
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(np.asarray(uniques, dtype=object), dtype=object)
+
+    kernel = VECTOR_KERNELS.get(cleaner)
+    if kernel is not None and pd.api.types.infer_dtype(uniques, skipna=False) == "string":
+        cleaned = kernel(uniques).to_numpy(dtype=object)
+    else:
+        cleaned = np.array([cleaner(v) for v in uniques], dtype=object)
+
+    result = np.append(cleaned, "")[codes]
+    # Missing values (None vs NaN) do not all clean alike, so keep them per cell.
+    missing = codes < 0
+    if missing.any():
+        result[missing] = values[missing].map(cleaner).to_numpy(dtype=object)
+    return pd.Series(result, index=values.index, name=values.name, dtype=object)
+
+
+def datetime_format(values: pd.Series) -> str:
+    """
+    The format pd.to_datetime infers for values, guessed from the first non-blank string; "mixed"
+    (each value parsed on its own) when there is none or it cannot be guessed. Parsing part of a
+    column with the whole column's format gives the same dates as parsing the whole column.
+    """
+    for value in values:
+        if isinstance(value, str) and value.strip():
+            return guess_datetime_format(value) or "mixed"
+    return "mixed"
+
+
+def parse_datetime_column(values: pd.Series, format: str | None = None) -> pd.Series:
+    """Same result as pd.to_datetime(values, errors="coerce", format=format), parsed once per distinct value."""
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(
+        pd.Series(np.asarray(uniques, dtype=object), dtype=object), errors="coerce", format=format
+    )
+    return pd.Series(parsed.reindex(codes).array, index=values.index, name=values.name)
@@ -1,617 +1,37 @@
 from __future__ import annotations
 
-import re
-from dataclasses import dataclass
-from io import BytesIO
-from typing import Iterable
-from urllib.parse import quote_plus
+import os
+from typing import Callable
 
 import pandas as pd
 import streamlit as st
 
-
-# ============================================================
-# Evaluation configuration
-# ============================================================
-@dataclass(frozen=True)
-class EvalConfig:
-    label: str                    # sidebar/display label
-    match_name: str               # raw OASIS / association form name after cleaning
-    output_name: str              # value written to output CSV
-    redcap_base_url: str          # prefilled survey URL base
-    note_style: str               # "cas" or "hp" or "generic"
-
-
-EVAL_CONFIGS: list[EvalConfig] = [
-    EvalConfig(
-        label="Clinical Assessment of Student",
-        match_name="Clinical Assessment of Student",
-        output_name="Clinical Assessment of Student",
-        redcap_base_url="https://redcap.ctsi.psu.edu/surveys/?s=C7EJ3MPDMCMCFJEP",
-        note_style="cas",
-    ),
-    EvalConfig(
-        label="Observed H&P / PEDS History Taking & Physical Exam",
-        match_name="PEDS History Taking & Physical Exam",
-        output_name="PEDS History Taking & Physical Exam",
-        redcap_base_url="https://redcap.ctsi.psu.edu/surveys/?s=8C7DLPNX8LT9HTJP",
-        note_style="hp",
-    ),
-]
-
-
-# ============================================================
-# General helpers
-# ============================================================
-def read_csv_any(uploaded_file) -> pd.DataFrame:
-    """Read a user-uploaded CSV with a few encoding fallbacks."""
-    if uploaded_file is None:
-        return pd.DataFrame()
-
-    raw = uploaded_file.getvalue()
-    last_error = None
-
-    for enc in ("utf-8-sig", "utf-8", "latin-1"):
-        try:
-            return pd.read_csv(BytesIO(raw), dtype=str, encoding=enc).fillna("")
-        except Exception as e:  # pragma: no cover - displayed in Streamlit
-            last_error = e
-
-    raise ValueError(f"Could not read CSV. Last error: {last_error}")
-
-
-def normalize_colnames(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df.columns = [str(c).strip().lstrip("\ufeff") for c in df.columns]
-    return df
-
-
-def first_existing_col(df: pd.DataFrame, candidates: Iterable[str]) -> str | None:
-    for c in candidates:
-        if c in df.columns:
-            return c
-    return None
-
-
-def clean_text(x) -> str:
-    return re.sub(r"\s+", " ", str(x or "").strip())
-
-
-def clean_eval_name(x) -> str:
-    """Normalize evaluation names from both files: remove leading asterisks, normalize spacing/case."""
-    s = clean_text(x)
-    s = s.lstrip("*").strip()
-    return re.sub(r"\s+", " ", s).lower()
-
-
-def display_eval_name(x) -> str:
-    """Human-facing evaluation name."""
-    s = clean_text(x).lstrip("*").strip()
-    return re.sub(r"\s+", " ", s)
-
-
-def clean_email(x) -> str:
-    return clean_text(x).lower()
-
-
-def clean_id(x) -> str:
-    return clean_text(x).lower()
-
-
-def clean_name_for_display(x) -> str:
-    """
-    Convert 'Last, First; MD2028' or 'Last - First' to 'First Last'.
-    Leaves already-readable names alone.
-    """
-    s = clean_text(x)
-    s = re.sub(r";\s*MD\d{4}", "", s, flags=re.IGNORECASE).strip()
-
-    if " - " in s:
-        last, first = s.split(" - ", 1)
-        return f"{first.strip()} {last.strip()}".strip()
-
-    if "," in s:
-        last, first = s.split(",", 1)
-        return f"{first.strip()} {last.strip()}".strip()
-
-    return s
-
-
-def to_date(s: pd.Series) -> pd.Series:
-    return pd.to_datetime(s, errors="coerce").dt.normalize()
-
-
-def make_prefill_link(base_url: str, student_name: str, faculty_name: str, partial: bool = False) -> str:
-    if not base_url:
-        return ""
-
-    url = (
-        f"{base_url}"
-        f"&student={quote_plus(str(student_name).strip())}"
-        f"&preceptor={quote_plus(str(faculty_name).strip())}"
-    )
-
-    if partial:
-        # Existing shortcut values from your prior scripts. Edit/remove if you ever change the REDCap forms.
-        url += "&complete=1&ph=3&ch=3&pp=3&cp=3"
-
-    return url
-
-
-def safe_for_power_automate(value) -> str:
-    """
-    Keep CSV simple for Flow/Power Automate:
-    - no embedded line breaks
-    - replace commas with hyphens, matching your prior scripts
-    - no double quotes
-    """
-    s = str(value or "")
-    s = s.replace(",", " -")
-    s = s.replace('"', "")
-    s = s.replace("\r", " ").replace("\n", " ")
-    return re.sub(r"\s+", " ", s).strip()
-
-
-def config_maps(configs: list[EvalConfig]) -> tuple[dict[str, EvalConfig], dict[str, str]]:
-    """Return maps keyed by normalized raw match names and sidebar labels."""
-    by_key = {clean_eval_name(c.match_name): c for c in configs}
-    label_to_key = {c.label: clean_eval_name(c.match_name) for c in configs}
-    return by_key, label_to_key
-
-
-# ============================================================
-# Data preparation
-# ============================================================
-def prepare_expected_associations(
-    assoc_raw: pd.DataFrame,
-    selected_eval_keys: set[str],
-    eval_config_by_key: dict[str, EvalConfig],
-    as_of_date: pd.Timestamp,
-    date_mode: str,
-    include_all_students: bool,
-) -> pd.DataFrame:
-    """
-    Convert raw evaluation_associations / preceptor matching file to one expected-evaluation row
-    per student/faculty/evaluation association.
-    """
-    df = normalize_colnames(assoc_raw)
-
-    # Support raw OASIS association headers and common REDCap-style lowercase headers.
-    rename_variants = {
-        "faculty_name": "Faculty Name",
-        "faculty_username": "Faculty Username",
-        "faculty_external_id": "Faculty External ID",
-        "faculty_email": "Faculty Email",
-        "student_name": "Student Name",
-        "student_username": "Student Username",
-        "record_id": "Student External ID",
-        "student_email": "Student Email",
-        "manual_evaluations": "Manual Evaluations",
-        "start_date": "Start Date",
-        "end_date": "End Date",
-        "eval_period_start_date": "Evaluation Period Start Date",
-        "eval_period_end_date": "Evaluation Period End Date",
-    }
-    present = {old: new for old, new in rename_variants.items() if old in df.columns and new not in df.columns}
-    if present:
-        df = df.rename(columns=present)
-
-    required = [
-        "Faculty Name",
-        "Faculty Username",
-        "Faculty External ID",
-        "Faculty Email",
-        "Student Name",
-        "Student Username",
-        "Student External ID",
-        "Student Email",
-        "Manual Evaluations",
-    ]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"Association file is missing expected column(s): {missing}")
-
-    # Prefer evaluation-period dates; fall back to course dates.
-    eval_start_col = first_existing_col(df, ["Evaluation Period Start Date", "eval_period_start_date"])
-    eval_end_col = first_existing_col(df, ["Evaluation Period End Date", "eval_period_end_date"])
-    course_start_col = first_existing_col(df, ["Start Date", "start_date"])
-    course_end_col = first_existing_col(df, ["End Date", "end_date"])
-
-    df["expected_start_date"] = df[eval_start_col] if eval_start_col else ""
-    df["expected_end_date"] = df[eval_end_col] if eval_end_col else ""
-
-    if course_start_col:
-        df["expected_start_date"] = df["expected_start_date"].replace("", pd.NA).fillna(df[course_start_col])
-    if course_end_col:
-        df["expected_end_date"] = df["expected_end_date"].replace("", pd.NA).fillna(df[course_end_col])
-
-    # Remove all-student/global rows by default.
-    if not include_all_students:
-        df = df[
-            ~df["Student External ID"].astype(str).str.strip().str.lower().eq("all students")
-        ].copy()
-
-    # Remove rows marked for deletion if present.
-    if "Delete" in df.columns:
-        df = df[df["Delete"].astype(str).str.strip().eq("")].copy()
-
-    # Explode manual evaluations separated by pipes.
-    df["manual_eval_item"] = df["Manual Evaluations"].astype(str).str.split("|")
-    df = df.explode("manual_eval_item").copy()
-    df["evaluation_key"] = df["manual_eval_item"].apply(clean_eval_name)
-
-    # Drop blanks and keep selected tracked evaluations only.
-    df = df[df["evaluation_key"].ne("")].copy()
-    df = df[df["evaluation_key"].isin(selected_eval_keys)].copy()
-
-    df["evaluation_type"] = df["evaluation_key"].map(
-        lambda k: eval_config_by_key.get(k).output_name if k in eval_config_by_key else display_eval_name(k)
-    )
-    df["evaluation_label"] = df["evaluation_key"].map(
-        lambda k: eval_config_by_key.get(k).label if k in eval_config_by_key else display_eval_name(k)
-    )
-
-    # Standard keys.
-    df["record_id"] = df["Student External ID"].apply(clean_id)
-    df["student_username_key"] = df["Student Username"].apply(clean_id)
-    df["student_name"] = df["Student Name"].apply(clean_name_for_display)
-    df["student_email"] = df["Student Email"].apply(clean_email)
-
-    df["faculty_name"] = df["Faculty Name"].apply(clean_name_for_display)
-    df["faculty_username_key"] = df["Faculty Username"].apply(clean_id)
-    df["faculty_external_id_key"] = df["Faculty External ID"].apply(clean_id)
-    df["faculty_email"] = df["Faculty Email"].apply(clean_email)
-
-    df["expected_start"] = to_date(df["expected_start_date"])
-    df["expected_end"] = to_date(df["expected_end_date"])
-
-    # Date filter for reminders.
-    if date_mode == "Active as of selected date":
-        df = df[
-            (df["expected_start"].notna())
-            & (df["expected_end"].notna())
-            & (df["expected_start"] <= as_of_date)
-            & (df["expected_end"] >= as_of_date)
-        ].copy()
-    elif date_mode == "Evaluation period ended on/before selected date":
-        df = df[
-            (df["expected_end"].notna())
-            & (df["expected_end"] <= as_of_date)
-        ].copy()
-    elif date_mode == "No date filter":
-        pass
-    else:
-        raise ValueError(f"Unknown date_mode: {date_mode}")
-
-    keep = [
-        "record_id",
-        "student_username_key",
-        "student_name",
-        "student_email",
-        "faculty_name",
-        "faculty_username_key",
-        "faculty_external_id_key",
-        "faculty_email",
-        "evaluation_key",
-        "evaluation_type",
-        "evaluation_label",
-        "expected_start",
-        "expected_end",
-    ]
-    return df[keep].drop_duplicates().reset_index(drop=True)
-
-
-def prepare_completed_oasis(
-    oasis_raw: pd.DataFrame,
-    selected_eval_keys: set[str],
-    eval_config_by_key: dict[str, EvalConfig],
-) -> pd.DataFrame:
-    """
-    Convert raw OASIS question-level export to one row per submitted evaluation.
-    """
-    df = normalize_colnames(oasis_raw)
-
-    # Normalize common OASIS column variants.
-    rename_variants = {
-        "Answer text": "Answer Text",
-        "answer text": "Answer Text",
-        "Multiple Choice Value": "Mult Choice Value",
-        "Multiple choice value": "Mult Choice Value",
-        "Student external id": "Student External ID",
-        "Evaluator external id": "Evaluator External ID",
-        "Submit date": "Submit Date",
-        "Evaluator email": "Evaluator Email",
-        "Student email": "Student Email",
-    }
-    present = {old: new for old, new in rename_variants.items() if old in df.columns and new not in df.columns}
-    if present:
-        df = df.rename(columns=present)
-
-    required = [
-        "Student",
-        "Student Username",
-        "Student External ID",
-        "Student Email",
-        "Evaluator",
-        "Evaluator Username",
-        "Evaluator External ID",
-        "Evaluator Email",
-        "Evaluation",
-        "Submit Date",
-    ]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"OASIS export is missing expected column(s): {missing}")
-
-    start_col = first_existing_col(df, ["Start Date", "Evaluation Start Date"])
-    end_col = first_existing_col(df, ["End Date", "Evaluation End Date"])
-
-    df["evaluation_key"] = df["Evaluation"].apply(clean_eval_name)
-    df = df[df["evaluation_key"].isin(selected_eval_keys)].copy()
-
-    df["evaluation_type"] = df["evaluation_key"].map(
-        lambda k: eval_config_by_key.get(k).output_name if k in eval_config_by_key else display_eval_name(k)
-    )
-    df["evaluation_label"] = df["evaluation_key"].map(
-        lambda k: eval_config_by_key.get(k).label if k in eval_config_by_key else display_eval_name(k)
-    )
-
-    df["submit_dt"] = pd.to_datetime(df["Submit Date"], errors="coerce")
-    df = df[df["submit_dt"].notna()].copy()
-
-    df["record_id"] = df["Student External ID"].apply(clean_id)
-    df["student_username_key"] = df["Student Username"].apply(clean_id)
-    df["student_name"] = df["Student"].apply(clean_name_for_display)
-    df["student_email"] = df["Student Email"].apply(clean_email)
-
-    df["faculty_name"] = df["Evaluator"].apply(clean_name_for_display)
-    df["faculty_username_key"] = df["Evaluator Username"].apply(clean_id)
-    df["faculty_external_id_key"] = df["Evaluator External ID"].apply(clean_id)
-    df["faculty_email"] = df["Evaluator Email"].apply(clean_email)
-
-    df["oasis_start"] = to_date(df[start_col]) if start_col else pd.NaT
-    df["oasis_end"] = to_date(df[end_col]) if end_col else pd.NaT
-
-    # OASIS is usually question-level. Form Record is best if present.
-    # Include evaluation_key in case Form Record is ever reused unexpectedly.
-    if "Form Record" in df.columns:
-        dedupe_cols = ["Form Record", "evaluation_key"]
-    else:
-        dedupe_cols = [
-            "record_id",
-            "student_username_key",
-            "faculty_username_key",
-            "faculty_external_id_key",
-            "faculty_email",
-            "evaluation_key",
-            "submit_dt",
-        ]
-
-    keep = [
-        "record_id",
-        "student_username_key",
-        "student_name",
-        "student_email",
-        "faculty_name",
-        "faculty_username_key",
-        "faculty_external_id_key",
-        "faculty_email",
-        "evaluation_key",
-        "evaluation_type",
-        "evaluation_label",
-        "submit_dt",
-        "oasis_start",
-        "oasis_end",
-    ]
-    return df.drop_duplicates(subset=dedupe_cols)[keep].reset_index(drop=True)
-
-
-# ============================================================
-# Matching logic
-# ============================================================
-def row_matches(
-    expected_row: pd.Series,
-    completed: pd.DataFrame,
-    allow_email_fallback: bool,
-    allow_username_fallback: bool,
-) -> pd.DataFrame:
-    """
-    Match expected association to completed OASIS submission.
-
-    Important design choice:
-    - Do not require date equality. Raw associations may use evaluation-period dates,
-      while raw OASIS exports often use course dates.
-    - Primary match: student external ID + evaluator external ID + evaluation.
-    - Fallbacks: evaluator email and/or evaluator username when external ID is blank.
-    """
-    c = completed[completed["evaluation_key"].eq(expected_row["evaluation_key"])].copy()
-
-    # Student match: external ID first. If external ID is missing, fall back to username.
-    expected_record_id = expected_row.get("record_id", "")
-    expected_student_username = expected_row.get("student_username_key", "")
-
-    if expected_record_id:
-        c = c[c["record_id"].eq(expected_record_id)].copy()
-    elif expected_student_username:
-        c = c[c["student_username_key"].eq(expected_student_username)].copy()
-    else:
-        return c.iloc[0:0].copy()
-
-    if c.empty:
-        return c
-
-    # Evaluator match priority.
-    expected_ext = expected_row.get("faculty_external_id_key", "")
-    expected_email = expected_row.get("faculty_email", "")
-    expected_username = expected_row.get("faculty_username_key", "")
-
-    masks = []
-
-    if expected_ext:
-        masks.append(c["faculty_external_id_key"].eq(expected_ext))
-
-    if allow_email_fallback and expected_email:
-        masks.append(c["faculty_email"].eq(expected_email))
-
-    if allow_username_fallback and expected_username:
-        masks.append(c["faculty_username_key"].eq(expected_username))
-
-    if not masks:
-        return c.iloc[0:0].copy()
-
-    combined_mask = masks[0]
-    for m in masks[1:]:
-        combined_mask = combined_mask | m
-
-    return c[combined_mask].copy()
-
-
-def build_reminder_note(note_style: str, expected: int, completed: int) -> str:
-    pending = max(expected - completed, 0)
-    if pending <= 0:
-        return ""
-
-    if note_style == "hp":
-        if expected == 1 and completed == 0:
-            return "The student indicated that you observed an H&P encounter with them, but we have not yet received the corresponding formative assessment."
-        if expected > 1 and completed == 0:
-            return f"The student indicated that you observed {expected} H&P encounters with them, but we have not yet received any formative assessments."
-        return f"The student indicated that you observed {expected} H&P encounters with them. We have received {completed} submission(s) so far and are still missing {pending}."
-
-    if note_style == "cas":
-        if expected == 1 and completed == 0:
-            return "The student reported working with you, but we have not yet received the corresponding evaluation."
-        if expected > 1 and completed == 0:
-            return f"The student reported working with you on {expected} occasions, but we have not yet received any completed evaluations."
-        return f"The student reported working with you on {expected} occasions. We have received {completed} completed evaluation(s) so far and are still missing {pending}."
-
-    # Generic fallback.
-    if expected == 1 and completed == 0:
-        return "The student reported working with you, but we have not yet received the corresponding evaluation."
-    return f"The student reported {expected} expected evaluation(s). We have received {completed} submission(s) and are still missing {pending}."
-
-
-def build_reminder_report(
-    expected: pd.DataFrame,
-    completed: pd.DataFrame,
-    allow_email_fallback: bool,
-    allow_username_fallback: bool,
-    eval_config_by_key: dict[str, EvalConfig],
-) -> tuple[pd.DataFrame, pd.DataFrame]:
-    """
-    Return:
-      reminders: Power Automate-ready pending rows across all selected evaluation types
-      debug: all expected rows with matched count/status
-    """
-    rows = []
-
-    for _, e in expected.iterrows():
-        matches = row_matches(e, completed, allow_email_fallback, allow_username_fallback)
-        completed_count = len(matches)
-
-        row = e.to_dict()
-        row["completed_eval_count"] = completed_count
-        row["completed_submit_dates"] = "; ".join(
-            matches["submit_dt"].dt.strftime("%Y-%m-%d %H:%M:%S").dropna().unique().tolist()
-        )
-        row["matched_faculty_names"] = "; ".join(
-            sorted(set(x for x in matches["faculty_name"].astype(str).tolist() if x.strip()))
-        )
-        rows.append(row)
-
-    debug_rows = pd.DataFrame(rows)
-    if debug_rows.empty:
-        return pd.DataFrame(), debug_rows
-
-    # Collapse duplicated expected associations for the same student/faculty/eval.
-    group_cols = [
-        "record_id",
-        "student_email",
-        "student_name",
-        "faculty_email",
-        "faculty_name",
-        "evaluation_key",
-        "evaluation_type",
-        "evaluation_label",
-    ]
-
-    collapsed = (
-        debug_rows.groupby(group_cols, dropna=False)
-        .agg(
-            expected_eval_count=("evaluation_key", "size"),
-            completed_eval_count=("completed_eval_count", "max"),
-            first_expected_start=("expected_start", "min"),
-            last_expected_end=("expected_end", "max"),
-            completed_submit_dates=(
-                "completed_submit_dates",
-                lambda s: "; ".join(sorted(set("; ".join(s).split("; ")) - {""})),
-            ),
-            matched_faculty_names=(
-                "matched_faculty_names",
-                lambda s: "; ".join(sorted(set("; ".join(s).split("; ")) - {""})),
-            ),
-        )
-        .reset_index()
-    )
-
-    collapsed["pending_eval_count"] = (
-        collapsed["expected_eval_count"] - collapsed["completed_eval_count"]
-    ).clip(lower=0)
-
-    collapsed["duplicate_match_flag"] = collapsed["expected_eval_count"].apply(lambda n: "YES" if n > 1 else "")
-    collapsed["needs_reminder"] = collapsed["pending_eval_count"].apply(lambda n: "YES" if n > 0 else "")
-
-    def note_for_row(r: pd.Series) -> str:
-        config = eval_config_by_key.get(r["evaluation_key"])
-        note_style = config.note_style if config else "generic"
-        return build_reminder_note(
-            note_style=note_style,
-            expected=int(r["expected_eval_count"]),
-            completed=int(r["completed_eval_count"]),
-        )
-
-    collapsed["reminder_note"] = collapsed.apply(note_for_row, axis=1)
-
-    def base_for_row(r: pd.Series) -> str:
-        config = eval_config_by_key.get(r["evaluation_key"])
-        return config.redcap_base_url if config else ""
-
-    collapsed["blank_form_link"] = collapsed.apply(
-        lambda r: make_prefill_link(base_for_row(r), r["student_name"], r["faculty_name"], partial=False),
-        axis=1,
-    )
-    collapsed["partial_form_link"] = collapsed.apply(
-        lambda r: make_prefill_link(base_for_row(r), r["student_name"], r["faculty_name"], partial=True),
-        axis=1,
-    )
-
-    reminders = collapsed[collapsed["needs_reminder"].eq("YES")].copy()
-
-    final_cols = [
-        "faculty_email",
-        "faculty_name",
-        "student_name",
-        "student_email",
-        "evaluation_type",
-        "evaluation_label",
-        "expected_eval_count",
-        "completed_eval_count",
-        "pending_eval_count",
-        "duplicate_match_flag",
-        "reminder_note",
-        "blank_form_link",
-        "partial_form_link",
-        "record_id",
-        "first_expected_start",
-        "last_expected_end",
-    ]
-
-    reminders = reminders[final_cols].copy()
-
-    for col in reminders.columns:
-        reminders[col] = reminders[col].apply(safe_for_power_automate)
-
-    return reminders.reset_index(drop=True), collapsed.reset_index(drop=True)
+from file_io import csv_download
+from oasis_reminder_core import (
+    DATE_MODE_ALL,
+    EVAL_CONFIGS,
+    REMINDER_CSV_ENCODING,
+    SNAPSHOT_COMPLETED,
+    SNAPSHOT_EXPECTED,
+    SNAPSHOT_FILE_NAMES,
+    build_eval_selection,
+    build_reminder_report,
+    build_reminder_report_parallel,
+    filter_expected_by_date,
+    match_by_faculty_identity,
+    prepare_completed_oasis,
+    prepare_expected_associations,
+    read_csv_any,
+    read_oasis_export_streaming,
+    read_parquet_snapshot,
+    reminder_file_stem,
+    resolve_faculty_identities,
+    sweep_reminder_counts,
+    to_parquet_snapshot,
+)
+from perf import DEFAULT_LOG_PATH, PerfLog
+from stage_cache import STAGE_CACHE, content_digest
+from submission_store import DEFAULT_STORE_PATH, SubmissionStore
 
 
 # ============================================================
@@ -631,7 +51,6 @@ st.write(
     "Power Automate-ready reminder CSV."
 )
 
-EVAL_CONFIG_BY_KEY, LABEL_TO_KEY = config_maps(EVAL_CONFIGS)
 DEFAULT_LABELS = [c.label for c in EVAL_CONFIGS]
 
 with st.sidebar:
@@ -648,6 +67,26 @@ with st.sidebar:
         type=["csv"],
         key="oasis_file",
     )
+    stream_oasis = st.checkbox(
+        "Stream large OASIS export",
+        value=False,
+        help="Read only the columns the reminder needs, in chunks, keeping one row per submission.",
+    )
+    use_store = st.checkbox(
+        "Keep submissions in a local store",
+        value=False,
+        help="Upsert each OASIS upload into a local SQLite file and match against every submission stored "
+        "so far, so earlier terms stay available. The OASIS upload becomes optional.",
+    )
+    if use_store:
+        store_path = st.text_input("Store file", value=str(DEFAULT_STORE_PATH))
+    with st.expander("Optional: load normalized snapshots"):
+        st.caption(
+            "Parquet snapshots from an earlier run's **Raw normalized inputs** tab. Each one replaces "
+            "its CSV upload and skips re-parsing it."
+        )
+        expected_snapshot = st.file_uploader("Expected associations snapshot", type=["parquet"], key="expected_snapshot")
+        completed_snapshot = st.file_uploader("Completed OASIS snapshot", type=["parquet"], key="completed_snapshot")
 
     st.header("Evaluation types to track")
     selected_labels = st.multiselect(
@@ -679,20 +118,58 @@ with st.sidebar:
     include_all_students = st.checkbox("Include 'All Students' rows", value=False)
     allow_email_fallback = st.checkbox("Allow evaluator email fallback", value=True)
     allow_username_fallback = st.checkbox("Allow evaluator username fallback", value=True)
+    resolve_faculty = st.checkbox(
+        "Resolve faculty identities across files",
+        value=False,
+        help="Link evaluator IDs, emails and usernames that co-occur anywhere in either file into one faculty "
+        "identity before matching, so e.g. a blank external ID still matches through a linked email. "
+        "Adds a faculty identity table to the debug view. Not used with the local store.",
+    )
+    sanitize_text_only = st.checkbox(
+        "Only sanitize text columns",
+        value=False,
+        help="Keep counts and dates as typed values in the reminder CSV instead of passing them through the text sanitizer.",
+    )
+    match_workers = st.number_input(
+        "Matching worker processes",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=1,
+        help="Split matching by evaluation and student across this many processes. Output is identical; "
+        "only large exports gain from more than one.",
+    )
+    sweep_dates = st.checkbox(
+        "Sweep reminder counts over weekdays",
+        value=False,
+        help="Also count reminders for every weekday in a range (e.g. a term) to plan reminder cadence.",
+    )
+    if sweep_dates:
+        sweep_range = st.date_input(
+            "Sweep from / to",
+            value=(as_of_date.date(), (as_of_date + pd.Timedelta(days=90)).date()),
+        )
+
+    with st.expander("⏱️ Performance"):
+        trace_memory = st.checkbox("Trace Python allocations (slower)", value=False)
+        log_perf = st.checkbox(f"Append timings to {DEFAULT_LOG_PATH}", value=False)
+
+perf = PerfLog(trace_memory=trace_memory)
+
+
+def encode_csv(df: pd.DataFrame) -> Callable[[], bytes]:
+    """to_csv_bytes as download data, encoded only when the button is clicked."""
+    return csv_download(df, REMINDER_CSV_ENCODING)
+
+
+def encode_snapshot(df: pd.DataFrame, kind: str) -> Callable[[], bytes]:
+    """to_parquet_snapshot as download data, encoded (and timed) only when the button is clicked."""
+    return lambda: perf.run(f"encode {kind} snapshot", lambda: to_parquet_snapshot(df, kind), rows_in=len(df))
+
 
 # Build final config map including optional custom evaluation.
-selected_eval_keys = {LABEL_TO_KEY[label] for label in selected_labels}
-if custom_eval_name.strip():
-    custom_config = EvalConfig(
-        label=custom_output_name.strip() or custom_eval_name.strip(),
-        match_name=custom_eval_name.strip(),
-        output_name=custom_output_name.strip() or display_eval_name(custom_eval_name),
-        redcap_base_url=custom_redcap_url.strip(),
-        note_style="generic",
-    )
-    custom_key = clean_eval_name(custom_config.match_name)
-    EVAL_CONFIG_BY_KEY = {**EVAL_CONFIG_BY_KEY, custom_key: custom_config}
-    selected_eval_keys.add(custom_key)
+selected_eval_keys, EVAL_CONFIG_BY_KEY = build_eval_selection(
+    selected_labels, custom_eval_name, custom_output_name, custom_redcap_url
+)
 
 run_clicked = st.button("Build reminder CSV", type="primary")
 
@@ -700,7 +177,9 @@ if not run_clicked:
     st.info("Upload both CSV files, confirm the evaluation types, then click **Build reminder CSV**.")
     st.stop()
 
-if assoc_file is None or oasis_file is None:
+if (assoc_file is None and expected_snapshot is None) or (
+    oasis_file is None and completed_snapshot is None and not use_store
+):
     st.error("Please upload both the raw association file and the raw OASIS evaluation export.")
     st.stop()
 
@@ -709,31 +188,201 @@ if not selected_eval_keys:
     st.stop()
 
 try:
-    assoc_raw = read_csv_any(assoc_file)
-    oasis_raw = read_csv_any(oasis_file)
-
-    expected = prepare_expected_associations(
-        assoc_raw=assoc_raw,
-        selected_eval_keys=selected_eval_keys,
-        eval_config_by_key=EVAL_CONFIG_BY_KEY,
-        as_of_date=as_of_date,
-        date_mode=date_mode,
-        include_all_students=include_all_students,
+    # Every stage is keyed by the upload digests plus only the settings it depends on, so a rerun
+    # after e.g. moving the as-of date reuses the parsed files and the OASIS submissions.
+    assoc_digest = None if assoc_file is None else content_digest(assoc_file.getvalue())
+    oasis_digest = None if oasis_file is None else content_digest(oasis_file.getvalue())
+    eval_keys = tuple(sorted(selected_eval_keys))
+    config_key = tuple(sorted(EVAL_CONFIG_BY_KEY.items()))
+
+    # Parsed uploads are only read by the prepare_* functions, so they are shared without copying.
+    # A snapshot replaces its CSV, which is then not parsed at all.
+    if expected_snapshot is not None:
+        assoc_raw = None
+    else:
+        assoc_raw = perf.run(
+            "read associations",
+            lambda: STAGE_CACHE.get_or_compute(
+                "reminder_assoc_csv", assoc_digest, lambda: read_csv_any(assoc_file), copy=False
+            ),
+        )
+    if oasis_file is None or (completed_snapshot is not None and not use_store):
+        oasis_raw = None
+    elif stream_oasis and not use_store:
+        oasis_raw = perf.run(
+            "read OASIS export (streamed)",
+            lambda: STAGE_CACHE.get_or_compute(
+                "reminder_oasis_stream",
+                (oasis_digest, eval_keys),
+                lambda: read_oasis_export_streaming(oasis_file, selected_eval_keys),
+                copy=False,
+            ),
+        )
+    else:
+        oasis_raw = perf.run(
+            "read OASIS export",
+            lambda: STAGE_CACHE.get_or_compute(
+                "reminder_oasis_csv", oasis_digest, lambda: read_csv_any(oasis_file), copy=False
+            ),
+        )
+    st.caption(
+        f"Read associations as {'(none)' if assoc_raw is None else assoc_raw.attrs.get('encoding')}, "
+        f"OASIS export as {'(none)' if oasis_raw is None else oasis_raw.attrs.get('encoding')}."
     )
 
-    completed = prepare_completed_oasis(
-        oasis_raw=oasis_raw,
-        selected_eval_keys=selected_eval_keys,
-        eval_config_by_key=EVAL_CONFIG_BY_KEY,
+    # Expected rows are prepared once without a date filter; moving the as-of date or switching the
+    # date mode only re-filters them.
+    if expected_snapshot is not None:
+        all_expected_key = ("snapshot", content_digest(expected_snapshot.getvalue()), eval_keys, config_key)
+        all_expected = perf.run(
+            "load expected snapshot",
+            lambda: STAGE_CACHE.get_or_compute(
+                "reminder_expected",
+                all_expected_key,
+                lambda: read_parquet_snapshot(
+                    expected_snapshot, SNAPSHOT_EXPECTED, selected_eval_keys, EVAL_CONFIG_BY_KEY
+                ),
+            ),
+        )
+    else:
+        all_expected_key = (assoc_digest, eval_keys, config_key, include_all_students)
+        all_expected = perf.run(
+            "prepare expected associations",
+            lambda: STAGE_CACHE.get_or_compute(
+                "reminder_expected",
+                all_expected_key,
+                lambda: prepare_expected_associations(
+                    assoc_raw=assoc_raw,
+                    selected_eval_keys=selected_eval_keys,
+                    eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                    as_of_date=as_of_date,
+                    date_mode=DATE_MODE_ALL,
+                    include_all_students=include_all_students,
+                ),
+            ),
+            rows_in=len(assoc_raw),
+        )
+    expected_key = (all_expected_key, as_of_date, date_mode)
+    expected = perf.run(
+        "filter by date",
+        lambda: filter_expected_by_date(all_expected, as_of_date, date_mode),
+        rows_in=len(all_expected),
     )
 
-    reminders, debug = build_reminder_report(
-        expected=expected,
-        completed=completed,
-        allow_email_fallback=allow_email_fallback,
-        allow_username_fallback=allow_username_fallback,
-        eval_config_by_key=EVAL_CONFIG_BY_KEY,
-    )
+    faculty_identities = None
+    if use_store:
+        # The store changes between runs, so its stages are not cached; later stages key on what it returned.
+        with SubmissionStore(store_path) as store:
+            if oasis_raw is not None:
+                written = perf.run("upsert OASIS into store", lambda: store.upsert_export(oasis_raw))
+                st.caption(f"Upserted {written} new or changed submission(s); {len(store)} stored in {store_path}.")
+            matched, pairs = perf.run(
+                "match in store",
+                lambda: store.match(expected, allow_email_fallback, allow_username_fallback, EVAL_CONFIG_BY_KEY),
+                rows_in=len(expected),
+            )
+            completed = perf.run(
+                "load completed from store",
+                lambda: store.load_completed(selected_eval_keys, EVAL_CONFIG_BY_KEY),
+            )
+        completed_digest = content_digest(pd.util.hash_pandas_object(completed, index=False).to_numpy().tobytes())
+        completed_key = ("store", completed_digest)
+        reminders, debug = perf.run(
+            "match and build reminders",
+            lambda: build_reminder_report(
+                expected=expected,
+                completed=matched,
+                allow_email_fallback=allow_email_fallback,
+                allow_username_fallback=allow_username_fallback,
+                eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                sanitize_text_only=sanitize_text_only,
+                pairs=pairs,
+            ),
+            rows_in=len(expected),
+        )
+    else:
+        if completed_snapshot is not None:
+            completed_key = ("snapshot", content_digest(completed_snapshot.getvalue()), eval_keys, config_key)
+            completed = perf.run(
+                "load completed snapshot",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_completed",
+                    completed_key,
+                    lambda: read_parquet_snapshot(
+                        completed_snapshot, SNAPSHOT_COMPLETED, selected_eval_keys, EVAL_CONFIG_BY_KEY
+                    ),
+                ),
+            )
+        else:
+            completed_key = (oasis_digest, stream_oasis, eval_keys, config_key)
+            completed = perf.run(
+                "prepare completed OASIS",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_completed",
+                    completed_key,
+                    lambda: prepare_completed_oasis(
+                        oasis_raw=oasis_raw,
+                        selected_eval_keys=selected_eval_keys,
+                        eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                    ),
+                ),
+                rows_in=len(oasis_raw),
+            )
+
+        if resolve_faculty:
+            faculty_identities = perf.run(
+                "resolve faculty identities",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_faculty_identities",
+                    (expected_key, completed_key, allow_email_fallback, allow_username_fallback),
+                    lambda: resolve_faculty_identities(
+                        expected, completed, allow_email_fallback, allow_username_fallback
+                    ),
+                ),
+                rows_in=len(expected) + len(completed),
+            )
+            reminders, debug = perf.run(
+                "match and build reminders",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_report",
+                    (
+                        expected_key,
+                        completed_key,
+                        allow_email_fallback,
+                        allow_username_fallback,
+                        sanitize_text_only,
+                        "faculty_identity",
+                    ),
+                    lambda: build_reminder_report(
+                        expected=expected,
+                        completed=completed,
+                        allow_email_fallback=allow_email_fallback,
+                        allow_username_fallback=allow_username_fallback,
+                        eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                        sanitize_text_only=sanitize_text_only,
+                        pairs=match_by_faculty_identity(expected, completed, faculty_identities),
+                    ),
+                ),
+                rows_in=len(expected),
+            )
+        else:
+            reminders, debug = perf.run(
+                "match and build reminders",
+                lambda: STAGE_CACHE.get_or_compute(
+                    "reminder_report",
+                    (expected_key, completed_key, allow_email_fallback, allow_username_fallback, sanitize_text_only),
+                    lambda: build_reminder_report_parallel(
+                        expected=expected,
+                        completed=completed,
+                        allow_email_fallback=allow_email_fallback,
+                        allow_username_fallback=allow_username_fallback,
+                        eval_config_by_key=EVAL_CONFIG_BY_KEY,
+                        sanitize_text_only=sanitize_text_only,
+                        workers=int(match_workers),
+                    ),
+                ),
+                rows_in=len(expected),
+            )
 
 except Exception as e:  # pragma: no cover - shown in Streamlit
     st.exception(e)
@@ -761,6 +410,34 @@ if not expected.empty:
         counts[c] = counts[c].astype(int)
     st.dataframe(counts, use_container_width=True)
 
+if sweep_dates and len(sweep_range) == 2:
+    st.subheader("Reminder cadence sweep")
+    st.caption(f"Reminder rows on every weekday from {sweep_range[0]} to {sweep_range[1]} ({date_mode.lower()}).")
+    sweep = perf.run(
+        "reminder sweep",
+        lambda: STAGE_CACHE.get_or_compute(
+            "reminder_sweep",
+            (all_expected_key, completed_key, date_mode, allow_email_fallback, allow_username_fallback, tuple(sweep_range)),
+            lambda: sweep_reminder_counts(
+                expected=all_expected,
+                completed=completed,
+                dates=pd.bdate_range(*sweep_range),
+                date_mode=date_mode,
+                allow_email_fallback=allow_email_fallback,
+                allow_username_fallback=allow_username_fallback,
+            ),
+        ),
+        rows_in=len(all_expected),
+    )
+    st.line_chart(sweep.pivot(index="as_of_date", columns="evaluation_type", values="reminder_rows"))
+    st.dataframe(sweep, use_container_width=True)
+    st.download_button(
+        label="Download reminder_sweep.csv",
+        data=encode_csv(sweep),
+        file_name="reminder_sweep.csv",
+        mime="text/csv",
+    )
+
 tab1, tab2, tab3, tab4 = st.tabs([
     "Combined Power Automate CSV",
     "Separate downloads",
@@ -772,7 +449,7 @@ with tab1:
     st.subheader("Combined Power Automate-ready reminder file")
     st.dataframe(reminders, use_container_width=True)
 
-    csv_bytes = reminders.to_csv(index=False).encode("utf-8-sig")
+    csv_bytes = encode_csv(reminders)
     st.download_button(
         label="Download combined_preceptor_eval_reminders.csv",
         data=csv_bytes,
@@ -787,12 +464,12 @@ with tab2:
     else:
         for eval_type in sorted(reminders["evaluation_type"].dropna().unique().tolist()):
             sub = reminders[reminders["evaluation_type"].eq(eval_type)].copy()
-            safe_name = re.sub(r"[^a-z0-9]+", "_", eval_type.lower()).strip("_") or "evaluation"
+            safe_name = reminder_file_stem(eval_type)
             st.write(f"**{eval_type}** — {len(sub)} reminder row(s)")
             st.dataframe(sub, use_container_width=True)
             st.download_button(
                 label=f"Download {safe_name}_reminders.csv",
-                data=sub.to_csv(index=False).encode("utf-8-sig"),
+                data=encode_csv(sub),
                 file_name=f"{safe_name}_reminders.csv",
                 mime="text/csv",
                 key=f"download_{safe_name}",
@@ -806,7 +483,7 @@ with tab3:
     )
     st.dataframe(debug, use_container_width=True)
 
-    debug_bytes = debug.to_csv(index=False).encode("utf-8-sig")
+    debug_bytes = encode_csv(debug)
     st.download_button(
         label="Download debug_match_report.csv",
         data=debug_bytes,
@@ -814,6 +491,20 @@ with tab3:
         mime="text/csv",
     )
 
+    if faculty_identities is not None:
+        st.subheader("Faculty identity resolution")
+        st.caption(
+            "Every evaluator ID / email / username combination seen in either file and the faculty_id it "
+            "resolved to. Rows without a faculty_id had no usable identifier and cannot match."
+        )
+        st.dataframe(faculty_identities, use_container_width=True)
+        st.download_button(
+            label="Download faculty_identities.csv",
+            data=encode_csv(faculty_identities),
+            file_name="faculty_identities.csv",
+            mime="text/csv",
+        )
+
 with tab4:
     st.subheader("Normalized expected associations")
     st.dataframe(expected, use_container_width=True)
@@ -823,13 +514,39 @@ with tab4:
 
     st.download_button(
         label="Download normalized_expected_associations.csv",
-        data=expected.to_csv(index=False).encode("utf-8-sig"),
+        data=encode_csv(expected),
         file_name="normalized_expected_associations.csv",
         mime="text/csv",
     )
     st.download_button(
         label="Download normalized_completed_oasis.csv",
-        data=completed.to_csv(index=False).encode("utf-8-sig"),
+        data=encode_csv(completed),
         file_name="normalized_completed_oasis.csv",
         mime="text/csv",
     )
+
+    st.caption(
+        "Parquet snapshots keep column types and hold every expected association before the date filter. "
+        "Load them under **Optional: load normalized snapshots** to skip re-parsing the CSVs."
+    )
+    st.download_button(
+        label=f"Download {SNAPSHOT_FILE_NAMES[SNAPSHOT_EXPECTED]}",
+        data=encode_snapshot(all_expected, SNAPSHOT_EXPECTED),
+        file_name=SNAPSHOT_FILE_NAMES[SNAPSHOT_EXPECTED],
+        mime="application/octet-stream",
+    )
+    st.download_button(
+        label=f"Download {SNAPSHOT_FILE_NAMES[SNAPSHOT_COMPLETED]}",
+        data=encode_snapshot(completed, SNAPSHOT_COMPLETED),
+        file_name=SNAPSHOT_FILE_NAMES[SNAPSHOT_COMPLETED],
+        mime="application/octet-stream",
+    )
+
+with st.expander("⏱️ Performance"):
+    st.caption(
+        f"Run took {perf.elapsed:.2f} s, {perf.total_seconds:.2f} s of it in the stages below. "
+        f"Stage cache: {STAGE_CACHE.hits} hit(s), {STAGE_CACHE.misses} miss(es)."
+    )
+    st.dataframe(perf.to_frame(), hide_index=True)
+if log_perf:
+    perf.append_jsonl(app="oasis_preceptor_reminder_MULTI_FORM_v2.py", selected_evals=sorted(selected_eval_keys))
@@ -0,0 +1,360 @@
+"""
+Build OASIS preceptor reminder CSVs without Streamlit (for cron / scheduled runs).
+
+Example:
+    python oasis_reminder_cli.py --associations assoc.csv --oasis oasis_export.csv \
+        --as-of 2026-03-01 --date-mode active --out-dir reminders/ --state reminders/state.pkl
+
+    # Keep submissions across terms in a local store; --oasis is optional once it is filled.
+    python oasis_reminder_cli.py --associations assoc.csv --oasis oasis_export.csv --store oasis.sqlite
+
+    # Save typed snapshots of the normalized inputs, then rebuild from them without re-parsing.
+    python oasis_reminder_cli.py --associations assoc.csv --oasis oasis_export.csv --snapshots --out-dir run1/
+    python oasis_reminder_cli.py --expected-snapshot run1/expected_associations_snapshot.parquet \
+        --completed-snapshot run1/completed_oasis_snapshot.parquet --as-of 2026-04-01
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from oasis_reminder_core import (
+    DATE_MODE_ACTIVE,
+    DATE_MODE_ALL,
+    DATE_MODE_ENDED,
+    EVAL_CONFIGS,
+    SNAPSHOT_COMPLETED,
+    SNAPSHOT_EXPECTED,
+    SNAPSHOT_FILE_NAMES,
+    build_eval_selection,
+    build_output_files,
+    build_reminder_report,
+    build_reminder_report_parallel,
+    filter_expected_by_date,
+    match_by_faculty_identity,
+    prepare_completed_oasis,
+    prepare_expected_associations,
+    read_csv_any,
+    read_oasis_export_streaming,
+    read_parquet_snapshot,
+    resolve_faculty_identities,
+    sweep_reminder_counts,
+    to_csv_bytes,
+    to_parquet_snapshot,
+)
+from oasis_reminder_state import load_state, run_incremental, save_state, undated_expected
+from perf import PerfLog
+from submission_store import SubmissionStore
+
+DATE_MODES = {
+    "active": DATE_MODE_ACTIVE,
+    "ended": DATE_MODE_ENDED,
+    "all": DATE_MODE_ALL,
+}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.strip().splitlines()[1:]),
+    )
+    parser.add_argument("--associations", type=Path, help="Raw evaluation associations CSV")
+    parser.add_argument("--oasis", type=Path, help="Raw OASIS evaluation submission export CSV")
+    parser.add_argument("--out-dir", type=Path, default=Path("."), help="Where to write the CSVs (default: .)")
+    parser.add_argument(
+        "--as-of",
+        type=pd.Timestamp,
+        default=pd.Timestamp.today(),
+        help="As-of date, e.g. 2026-03-01 (default: today)",
+    )
+    parser.add_argument("--date-mode", choices=DATE_MODES, default="active", help="Which associations to consider")
+    parser.add_argument(
+        "--eval",
+        dest="evals",
+        action="append",
+        choices=[c.label for c in EVAL_CONFIGS],
+        help="Evaluation type to track; repeat for several (default: all)",
+    )
+    parser.add_argument("--custom-eval-name", default="", help="Custom raw OASIS/association evaluation name")
+    parser.add_argument("--custom-output-name", default="", help="Custom output name")
+    parser.add_argument("--custom-redcap-url", default="", help="Custom REDCap survey base URL")
+    parser.add_argument("--include-all-students", action="store_true", help="Include 'All Students' rows")
+    parser.add_argument("--no-email-fallback", action="store_true", help="Disable evaluator email fallback")
+    parser.add_argument("--no-username-fallback", action="store_true", help="Disable evaluator username fallback")
+    parser.add_argument(
+        "--resolve-faculty",
+        action="store_true",
+        help="Link evaluator IDs/emails/usernames across both files into one identity before matching, "
+        "and write faculty_identities.csv",
+    )
+    parser.add_argument("--sanitize-text-only", action="store_true", help="Only sanitize text columns")
+    parser.add_argument("--stream", action="store_true", help="Stream the OASIS export (large files)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for matching, partitioned by evaluation and student (default: 1)",
+    )
+    parser.add_argument(
+        "--sweep",
+        nargs=2,
+        type=pd.Timestamp,
+        metavar=("FROM", "TO"),
+        help="Also write reminder_sweep.csv: reminder counts for every weekday from FROM to TO",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        help="State file from the previous run: only changed rows are re-processed, and "
+        "reminder_delta.csv lists reminders changed since then (created if missing)",
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        help="SQLite submission store: --oasis is upserted into it and reminders are matched against "
+        "everything stored so far (created if missing)",
+    )
+    parser.add_argument(
+        "--snapshots",
+        action="store_true",
+        help="Also write Parquet snapshots of the normalized expected (before the date filter) and completed rows",
+    )
+    parser.add_argument(
+        "--expected-snapshot", type=Path, help="Load normalized expected rows from a snapshot instead of --associations"
+    )
+    parser.add_argument(
+        "--completed-snapshot", type=Path, help="Load normalized completed rows from a snapshot instead of --oasis"
+    )
+    parser.add_argument("--perf-log", type=Path, help="Append per-stage timings to this JSONL run log")
+    args = parser.parse_args(argv)
+    if args.associations is None and args.expected_snapshot is None:
+        parser.error("--associations is required unless --expected-snapshot is given")
+    if args.oasis is None and args.store is None and args.completed_snapshot is None:
+        parser.error("--oasis is required unless --store or --completed-snapshot is given")
+    if args.state and (args.store or args.expected_snapshot or args.completed_snapshot):
+        parser.error("--state cannot be combined with --store or snapshot inputs")
+    if args.store and args.completed_snapshot:
+        parser.error("--store and --completed-snapshot cannot be combined")
+    if args.resolve_faculty and (args.store or args.state):
+        parser.error("--resolve-faculty cannot be combined with --store or --state")
+    if args.workers > 1 and (args.state or args.store or args.resolve_faculty):
+        parser.error("--workers cannot be combined with --state, --store or --resolve-faculty")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+
+    selected_labels = args.evals or [c.label for c in EVAL_CONFIGS]
+    selected_eval_keys, eval_config_by_key = build_eval_selection(
+        selected_labels, args.custom_eval_name, args.custom_output_name, args.custom_redcap_url
+    )
+
+    perf = PerfLog()
+    assoc_raw = None
+    if not args.expected_snapshot:
+        assoc_raw = perf.run("read associations", lambda: read_csv_any(BytesIO(args.associations.read_bytes())))
+    oasis_raw = None
+    if args.oasis and not args.completed_snapshot:
+        oasis_upload = BytesIO(args.oasis.read_bytes())
+        if args.stream and not args.store:
+            oasis_raw = perf.run(
+                "read OASIS export (streamed)", lambda: read_oasis_export_streaming(oasis_upload, selected_eval_keys)
+            )
+        else:
+            # The store keeps every evaluation, so it needs the whole export.
+            oasis_raw = perf.run("read OASIS export", lambda: read_csv_any(oasis_upload))
+
+    as_of_date = args.as_of.normalize()
+    date_mode = DATE_MODES[args.date_mode]
+    delta = None
+    faculty_identities = None
+    if args.state:
+        previous = load_state(args.state)
+        reminders, debug, delta, state, stats = perf.run(
+            "incremental run",
+            lambda: run_incremental(
+                assoc_raw=assoc_raw,
+                oasis_raw=oasis_raw,
+                previous=previous,
+                selected_eval_keys=selected_eval_keys,
+                eval_config_by_key=eval_config_by_key,
+                as_of_date=as_of_date,
+                date_mode=date_mode,
+                include_all_students=args.include_all_students,
+                allow_email_fallback=not args.no_email_fallback,
+                allow_username_fallback=not args.no_username_fallback,
+                sanitize_text_only=args.sanitize_text_only,
+            ),
+        )
+        expected, completed, all_expected = state.expected, state.completed, undated_expected(state)
+        save_state(args.state, state)
+        if stats.full_rebuild:
+            print(f"No usable state in {args.state}: full rebuild.")
+        else:
+            print(
+                f"Normalized {stats.new_association_rows} new association row(s) and {stats.new_oasis_rows} new "
+                f"OASIS row(s); re-matched {stats.affected_groups} of {stats.total_groups} group(s)."
+            )
+    else:
+        if args.expected_snapshot:
+            all_expected = perf.run(
+                "load expected snapshot",
+                lambda: read_parquet_snapshot(
+                    BytesIO(args.expected_snapshot.read_bytes()),
+                    SNAPSHOT_EXPECTED,
+                    selected_eval_keys,
+                    eval_config_by_key,
+                ),
+            )
+        else:
+            all_expected = perf.run(
+                "prepare expected associations",
+                lambda: prepare_expected_associations(
+                    assoc_raw=assoc_raw,
+                    selected_eval_keys=selected_eval_keys,
+                    eval_config_by_key=eval_config_by_key,
+                    as_of_date=as_of_date,
+                    date_mode=DATE_MODE_ALL,
+                    include_all_students=args.include_all_students,
+                ),
+                rows_in=len(assoc_raw),
+            )
+        expected = perf.run(
+            "filter by date",
+            lambda: filter_expected_by_date(all_expected, as_of_date, date_mode),
+            rows_in=len(all_expected),
+        )
+        pairs = None
+        if args.store:
+            with SubmissionStore(args.store) as store:
+                if oasis_raw is not None:
+                    written = perf.run("upsert OASIS into store", lambda: store.upsert_export(oasis_raw))
+                    print(f"Upserted {written} new or changed submission(s) into {args.store}.")
+                matched, pairs = perf.run(
+                    "match in store",
+                    lambda: store.match(
+                        expected,
+                        allow_email_fallback=not args.no_email_fallback,
+                        allow_username_fallback=not args.no_username_fallback,
+                        eval_config_by_key=eval_config_by_key,
+                    ),
+                    rows_in=len(expected),
+                )
+                completed = perf.run(
+                    "load completed from store",
+                    lambda: store.load_completed(selected_eval_keys, eval_config_by_key),
+                )
+        elif args.completed_snapshot:
+            completed = perf.run(
+                "load completed snapshot",
+                lambda: read_parquet_snapshot(
+                    BytesIO(args.completed_snapshot.read_bytes()),
+                    SNAPSHOT_COMPLETED,
+                    selected_eval_keys,
+                    eval_config_by_key,
+                ),
+            )
+            matched = completed
+        else:
+            completed = perf.run(
+                "prepare completed OASIS",
+                lambda: prepare_completed_oasis(
+                    oasis_raw=oasis_raw,
+                    selected_eval_keys=selected_eval_keys,
+                    eval_config_by_key=eval_config_by_key,
+                ),
+                rows_in=len(oasis_raw),
+            )
+            matched = completed
+        if args.resolve_faculty:
+            faculty_identities = perf.run(
+                "resolve faculty identities",
+                lambda: resolve_faculty_identities(
+                    expected, completed, not args.no_email_fallback, not args.no_username_fallback
+                ),
+                rows_in=len(expected) + len(completed),
+            )
+            pairs = match_by_faculty_identity(expected, completed, faculty_identities)
+        if pairs is None:
+            reminders, debug = perf.run(
+                "match and build reminders",
+                lambda: build_reminder_report_parallel(
+                    expected=expected,
+                    completed=matched,
+                    allow_email_fallback=not args.no_email_fallback,
+                    allow_username_fallback=not args.no_username_fallback,
+                    eval_config_by_key=eval_config_by_key,
+                    sanitize_text_only=args.sanitize_text_only,
+                    workers=args.workers,
+                ),
+                rows_in=len(expected),
+            )
+        else:
+            reminders, debug = perf.run(
+                "match and build reminders",
+                lambda: build_reminder_report(
+                    expected=expected,
+                    completed=matched,
+                    allow_email_fallback=not args.no_email_fallback,
+                    allow_username_fallback=not args.no_username_fallback,
+                    eval_config_by_key=eval_config_by_key,
+                    sanitize_text_only=args.sanitize_text_only,
+                    pairs=pairs,
+                ),
+                rows_in=len(expected),
+            )
+
+    args.out_dir.mkdir(parents=True, exist_ok=True)
+    for file_name, df in build_output_files(reminders, debug, expected, completed).items():
+        (args.out_dir / file_name).write_bytes(perf.run("encode CSV", lambda: to_csv_bytes(df), rows_in=len(df)))
+        print(f"{file_name}: {len(df)} row(s)")
+    if faculty_identities is not None:
+        (args.out_dir / "faculty_identities.csv").write_bytes(to_csv_bytes(faculty_identities))
+        print(f"faculty_identities.csv: {len(faculty_identities)} row(s)")
+    if delta is not None:
+        (args.out_dir / "reminder_delta.csv").write_bytes(to_csv_bytes(delta))
+        print(f"reminder_delta.csv: {len(delta)} row(s) changed since the last run")
+
+    if args.snapshots:
+        for kind, df in ((SNAPSHOT_EXPECTED, all_expected), (SNAPSHOT_COMPLETED, completed)):
+            (args.out_dir / SNAPSHOT_FILE_NAMES[kind]).write_bytes(
+                perf.run(f"encode {kind} snapshot", lambda: to_parquet_snapshot(df, kind), rows_in=len(df))
+            )
+            print(f"{SNAPSHOT_FILE_NAMES[kind]}: {len(df)} row(s)")
+
+    if args.sweep:
+        sweep = perf.run(
+            "reminder sweep",
+            lambda: sweep_reminder_counts(
+                expected=all_expected,
+                completed=completed,
+                dates=pd.bdate_range(*args.sweep),
+                date_mode=date_mode,
+                allow_email_fallback=not args.no_email_fallback,
+                allow_username_fallback=not args.no_username_fallback,
+            ),
+            rows_in=len(all_expected),
+        )
+        (args.out_dir / "reminder_sweep.csv").write_bytes(to_csv_bytes(sweep))
+        print(f"reminder_sweep.csv: {len(sweep)} row(s)")
+
+    assoc_encoding = "(none)" if assoc_raw is None else assoc_raw.attrs.get("encoding")
+    oasis_encoding = "(none)" if oasis_raw is None else oasis_raw.attrs.get("encoding")
+    print(
+        f"Read associations as {assoc_encoding}, OASIS export as {oasis_encoding}. "
+        f"{len(expected)} expected association(s), {len(completed)} submitted evaluation(s), "
+        f"{len(reminders)} reminder row(s)."
+    )
+    if args.perf_log:
+        perf.append_jsonl(args.perf_log, app="oasis_reminder_cli.py", selected_evals=sorted(selected_eval_keys))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
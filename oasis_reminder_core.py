@@ -0,0 +1,1327 @@
+from __future__ import annotations
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+from string import Formatter
+from typing import Iterable
+from urllib.parse import quote_plus
+
+import numpy as np
+import pandas as pd
+
+from file_io import FALLBACK_ENCODING, read_csv_bytes, sniff_encoding, write_csv_bytes
+from oasis_normalize import (
+    clean_column,
+    clean_email,
+    clean_eval_name,
+    clean_id,
+    clean_name_for_display,
+    datetime_format,
+    display_eval_name,
+    parse_datetime_column,
+)
+
+
+# ============================================================
+# Evaluation configuration
+# ============================================================
+@dataclass(frozen=True)
+class EvalConfig:
+    label: str                    # sidebar/display label
+    match_name: str               # raw OASIS / association form name after cleaning
+    output_name: str              # value written to output CSV
+    redcap_base_url: str          # prefilled survey URL base
+    note_style: str               # "cas" or "hp" or "generic"
+
+
+EVAL_CONFIGS: list[EvalConfig] = [
+    EvalConfig(
+        label="Clinical Assessment of Student",
+        match_name="Clinical Assessment of Student",
+        output_name="Clinical Assessment of Student",
+        redcap_base_url="https://redcap.ctsi.psu.edu/surveys/?s=C7EJ3MPDMCMCFJEP",
+        note_style="cas",
+    ),
+    EvalConfig(
+        label="Observed H&P / PEDS History Taking & Physical Exam",
+        match_name="PEDS History Taking & Physical Exam",
+        output_name="PEDS History Taking & Physical Exam",
+        redcap_base_url="https://redcap.ctsi.psu.edu/surveys/?s=8C7DLPNX8LT9HTJP",
+        note_style="hp",
+    ),
+]
+
+
+# ============================================================
+# General helpers
+# ============================================================
+def read_csv_any(uploaded_file) -> pd.DataFrame:
+    """Read a user-uploaded CSV in one parse; the sniffed encoding is in df.attrs["encoding"]."""
+    if uploaded_file is None:
+        return pd.DataFrame()
+
+    try:
+        return read_csv_bytes(uploaded_file.getvalue(), dtype=str).fillna("")
+    except Exception as e:  # pragma: no cover - displayed in Streamlit
+        raise ValueError(f"Could not read CSV. Last error: {e}")
+
+
+def normalize_colnames(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df.columns = [str(c).strip().lstrip("\ufeff") for c in df.columns]
+    return df
+
+
+def first_existing_col(df: pd.DataFrame, candidates: Iterable[str]) -> str | None:
+    for c in candidates:
+        if c in df.columns:
+            return c
+    return None
+
+
+def to_date(s: pd.Series, format: str | None = None) -> pd.Series:
+    return pd.to_datetime(s, errors="coerce", format=format).dt.normalize()
+
+
+# Existing shortcut values from your prior scripts. Edit/remove if you ever change the REDCap forms.
+PARTIAL_PREFILL_PARAMS = "&complete=1&ph=3&ch=3&pp=3&cp=3"
+
+
+def make_prefill_link(base_url: str, student_name: str, faculty_name: str, partial: bool = False) -> str:
+    if not base_url:
+        return ""
+
+    url = (
+        f"{base_url}"
+        f"&student={quote_plus(str(student_name).strip())}"
+        f"&preceptor={quote_plus(str(faculty_name).strip())}"
+    )
+
+    if partial:
+        url += PARTIAL_PREFILL_PARAMS
+
+    return url
+
+
+def safe_for_power_automate(value) -> str:
+    """
+    Keep CSV simple for Flow/Power Automate:
+    - no embedded line breaks
+    - replace commas with hyphens, matching your prior scripts
+    - no double quotes
+    """
+    s = str(value or "")
+    s = s.replace(",", " -")
+    s = s.replace('"', "")
+    s = s.replace("\r", " ").replace("\n", " ")
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def sanitize_for_power_automate(df: pd.DataFrame, text_only: bool = False) -> pd.DataFrame:
+    """
+    Column-level safe_for_power_automate.
+
+    All-string columns are cleaned with vectorized .str operations; any other column is cleaned
+    once per distinct value. With text_only=True, non-text columns (counts, dates) are left as-is
+    instead of being stringified.
+    """
+    out = df.copy()
+    for col in out.columns:
+        values = out[col]
+        is_text = pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+        if text_only and not is_text:
+            continue
+
+        if pd.api.types.infer_dtype(values, skipna=False) == "string":
+            out[col] = (
+                values.str.replace(",", " -", regex=False)
+                .str.replace('"', "", regex=False)
+                .str.replace(r"\s+", " ", regex=True)
+                .str.strip()
+            )
+        else:
+            codes, uniques = pd.factorize(values)
+            cleaned = np.array([safe_for_power_automate(v) for v in uniques] + [""], dtype=object)[codes]
+            # Missing values (None, NaN, NaT) do not all sanitize alike, so keep them per cell.
+            missing = codes < 0
+            if missing.any():
+                cleaned[missing] = values[missing].apply(safe_for_power_automate).to_numpy()
+            out[col] = cleaned
+    return out
+
+
+def evaluation_names(keys: pd.Series, eval_config_by_key: dict[str, EvalConfig]) -> tuple[pd.Series, pd.Series]:
+    """(evaluation_type, evaluation_label) for evaluation keys; unconfigured keys use their display name."""
+    evaluation_type = keys.map(
+        lambda k: eval_config_by_key.get(k).output_name if k in eval_config_by_key else display_eval_name(k)
+    )
+    evaluation_label = keys.map(
+        lambda k: eval_config_by_key.get(k).label if k in eval_config_by_key else display_eval_name(k)
+    )
+    return evaluation_type, evaluation_label
+
+
+def config_maps(configs: list[EvalConfig]) -> tuple[dict[str, EvalConfig], dict[str, str]]:
+    """Return maps keyed by normalized raw match names and sidebar labels."""
+    by_key = {clean_eval_name(c.match_name): c for c in configs}
+    label_to_key = {c.label: clean_eval_name(c.match_name) for c in configs}
+    return by_key, label_to_key
+
+
+# ============================================================
+# Data preparation
+# ============================================================
+DATE_MODE_ACTIVE = "Active as of selected date"
+DATE_MODE_ENDED = "Evaluation period ended on/before selected date"
+DATE_MODE_ALL = "No date filter"
+DATE_MODE_OPTIONS = [DATE_MODE_ACTIVE, DATE_MODE_ENDED, DATE_MODE_ALL]
+
+
+class ExpectedIntervals:
+    """
+    expected_start/expected_end of expected rows as a closed IntervalIndex, for date-mode queries.
+
+    A row is active on D when start <= D <= end (rows with a missing or inverted period never are),
+    and ended by D when end <= D. rows_by_date answers either question for many dates at once.
+    """
+
+    def __init__(self, expected: pd.DataFrame):
+        start = pd.DatetimeIndex(expected["expected_start"])
+        end = pd.DatetimeIndex(expected["expected_end"])
+        self.n_rows = len(expected)
+        valid = np.asarray(start.notna() & end.notna() & (start <= end))
+        self.interval_rows = np.flatnonzero(valid)
+        self.intervals = pd.IntervalIndex.from_arrays(start[valid], end[valid], closed="both")
+        self.end = end
+
+    def mask_on(self, date: pd.Timestamp, date_mode: str) -> np.ndarray:
+        """Boolean row mask for one as-of date."""
+        if date_mode == DATE_MODE_ACTIVE:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            mask[self.interval_rows] = self.intervals.contains(date)
+            return mask
+        if date_mode == DATE_MODE_ENDED:
+            return np.asarray(self.end.notna() & (self.end <= date))
+        return np.ones(self.n_rows, dtype=bool)
+
+    def rows_by_date(self, dates: pd.DatetimeIndex, date_mode: str) -> pd.DataFrame:
+        """
+        Every (date_pos, expected_row) pair where the row passes the date filter on dates[date_pos].
+
+        dates must be sorted; each row's matching dates are one contiguous run found by binary search.
+        """
+        if date_mode == DATE_MODE_ACTIVE:
+            rows = self.interval_rows
+            lo = dates.searchsorted(self.intervals.left, side="left")
+            hi = dates.searchsorted(self.intervals.right, side="right")
+        elif date_mode == DATE_MODE_ENDED:
+            has_end = np.asarray(self.end.notna())
+            rows = np.flatnonzero(has_end)
+            lo = dates.searchsorted(self.end[has_end], side="left")
+            hi = np.full(len(rows), len(dates))
+        else:
+            rows = np.arange(self.n_rows)
+            lo = np.zeros(len(rows), dtype=int)
+            hi = np.full(len(rows), len(dates))
+
+        counts = np.clip(hi - lo, 0, None)
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        date_pos = np.repeat(lo, counts) + np.arange(counts.sum()) - run_start
+        return pd.DataFrame({"date_pos": date_pos, "expected_row": np.repeat(rows, counts)})
+
+
+def filter_expected_by_date(expected: pd.DataFrame, as_of_date: pd.Timestamp, date_mode: str) -> pd.DataFrame:
+    """Apply the date_mode filter to already prepared expected rows (prepared with DATE_MODE_ALL)."""
+    if date_mode not in DATE_MODE_OPTIONS:
+        raise ValueError(f"Unknown date_mode: {date_mode}")
+    if date_mode == DATE_MODE_ALL:
+        return expected
+    return expected[ExpectedIntervals(expected).mask_on(as_of_date, date_mode)].reset_index(drop=True)
+
+
+# Raw OASIS association headers and common REDCap-style lowercase headers.
+ASSOCIATION_RENAME_VARIANTS = {
+
+    "faculty_name": "Faculty Name",
+    "faculty_username": "Faculty Username",
+    "faculty_external_id": "Faculty External ID",
+    "faculty_email": "Faculty Email",
+    "student_name": "Student Name",
+    "student_username": "Student Username",
+    "record_id": "Student External ID",
+    "student_email": "Student Email",
+    "manual_evaluations": "Manual Evaluations",
+    "start_date": "Start Date",
+    "end_date": "End Date",
+    "eval_period_start_date": "Evaluation Period Start Date",
+    "eval_period_end_date": "Evaluation Period End Date",
+}
+
+
+def rename_association_variants(df: pd.DataFrame) -> pd.DataFrame:
+    present = {
+        old: new for old, new in ASSOCIATION_RENAME_VARIANTS.items() if old in df.columns and new not in df.columns
+    }
+    return df.rename(columns=present) if present else df
+
+
+def expected_date_text(df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    """Expected start / end date text per association row: evaluation-period dates, else course dates."""
+    eval_start_col = first_existing_col(df, ["Evaluation Period Start Date", "eval_period_start_date"])
+    eval_end_col = first_existing_col(df, ["Evaluation Period End Date", "eval_period_end_date"])
+    course_start_col = first_existing_col(df, ["Start Date", "start_date"])
+    course_end_col = first_existing_col(df, ["End Date", "end_date"])
+
+    start = df[eval_start_col] if eval_start_col else pd.Series("", index=df.index, dtype=object)
+    end = df[eval_end_col] if eval_end_col else pd.Series("", index=df.index, dtype=object)
+    if course_start_col:
+        start = start.replace("", pd.NA).fillna(df[course_start_col])
+    if course_end_col:
+        end = end.replace("", pd.NA).fillna(df[course_end_col])
+    return start, end
+
+
+def association_date_formats(assoc: pd.DataFrame) -> dict[str, str]:
+    """
+    The formats prepare_expected_associations parses the expected start / end dates of a
+    column-normalized association export with, inferred from every row of it.
+    """
+    start, end = expected_date_text(rename_association_variants(assoc))
+    return {"expected_start_date": datetime_format(start), "expected_end_date": datetime_format(end)}
+
+
+def prepare_expected_associations(
+    assoc_raw: pd.DataFrame,
+    selected_eval_keys: set[str],
+    eval_config_by_key: dict[str, EvalConfig],
+    as_of_date: pd.Timestamp,
+    date_mode: str,
+    include_all_students: bool,
+    keep_columns: Iterable[str] = (),
+    date_formats: dict[str, str] | None = None,
+) -> pd.DataFrame:
+    """
+    Convert raw evaluation_associations / preceptor matching file to one expected-evaluation row
+    per student/faculty/evaluation association.
+
+    keep_columns are raw columns carried through unchanged (e.g. a source-row hash).
+    date_formats are the date formats to parse with (association_date_formats); callers that
+    prepare only part of an export pass the full export's, so the part parses as it would in full.
+    """
+    df = normalize_colnames(assoc_raw)
+
+    df = rename_association_variants(df)
+
+    required = [
+        "Faculty Name",
+        "Faculty Username",
+        "Faculty External ID",
+        "Faculty Email",
+        "Student Name",
+        "Student Username",
+        "Student External ID",
+        "Student Email",
+        "Manual Evaluations",
+    ]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Association file is missing expected column(s): {missing}")
+
+    # Prefer evaluation-period dates; fall back to course dates.
+    df["expected_start_date"], df["expected_end_date"] = expected_date_text(df)
+    # Date formats come from every row, before any filter, so a subset of the rows parses alike.
+    if date_formats is None:
+        date_formats = association_date_formats(df)
+
+    # Remove all-student/global rows by default.
+    if not include_all_students:
+        df = df[
+            ~df["Student External ID"].astype(str).str.strip().str.lower().eq("all students")
+        ].copy()
+
+    # Remove rows marked for deletion if present.
+    if "Delete" in df.columns:
+        df = df[df["Delete"].astype(str).str.strip().eq("")].copy()
+
+    # Explode manual evaluations separated by pipes.
+    df["manual_eval_item"] = df["Manual Evaluations"].astype(str).str.split("|")
+    df = df.explode("manual_eval_item").copy()
+    df["evaluation_key"] = clean_column(df["manual_eval_item"], clean_eval_name)
+
+    # Drop blanks and keep selected tracked evaluations only.
+    df = df[df["evaluation_key"].ne("")].copy()
+    df = df[df["evaluation_key"].isin(selected_eval_keys)].copy()
+
+    df["evaluation_type"], df["evaluation_label"] = evaluation_names(df["evaluation_key"], eval_config_by_key)
+
+    # Standard keys.
+    df["record_id"] = clean_column(df["Student External ID"], clean_id)
+    df["student_username_key"] = clean_column(df["Student Username"], clean_id)
+    df["student_name"] = clean_column(df["Student Name"], clean_name_for_display)
+    df["student_email"] = clean_column(df["Student Email"], clean_email)
+
+    df["faculty_name"] = clean_column(df["Faculty Name"], clean_name_for_display)
+    df["faculty_username_key"] = clean_column(df["Faculty Username"], clean_id)
+    df["faculty_external_id_key"] = clean_column(df["Faculty External ID"], clean_id)
+    df["faculty_email"] = clean_column(df["Faculty Email"], clean_email)
+
+    df["expected_start"] = to_date(df["expected_start_date"], date_formats["expected_start_date"])
+    df["expected_end"] = to_date(df["expected_end_date"], date_formats["expected_end_date"])
+
+    # Date filter for reminders.
+    if date_mode not in DATE_MODE_OPTIONS:
+        raise ValueError(f"Unknown date_mode: {date_mode}")
+    if date_mode != DATE_MODE_ALL:
+        df = df[ExpectedIntervals(df).mask_on(as_of_date, date_mode)].copy()
+
+    keep = [
+        "record_id",
+        "student_username_key",
+        "student_name",
+        "student_email",
+        "faculty_name",
+        "faculty_username_key",
+        "faculty_external_id_key",
+        "faculty_email",
+        "evaluation_key",
+        "evaluation_type",
+        "evaluation_label",
+        "expected_start",
+        "expected_end",
+    ] + list(keep_columns)
+    return df[keep].drop_duplicates().reset_index(drop=True)
+
+
+# OASIS export layout: header variants seen across exports, and the columns the reminder reads.
+OASIS_RENAME_VARIANTS = {
+    "Answer text": "Answer Text",
+    "answer text": "Answer Text",
+    "Multiple Choice Value": "Mult Choice Value",
+    "Multiple choice value": "Mult Choice Value",
+    "Student external id": "Student External ID",
+    "Evaluator external id": "Evaluator External ID",
+    "Submit date": "Submit Date",
+    "Evaluator email": "Evaluator Email",
+    "Student email": "Student Email",
+}
+OASIS_REQUIRED_COLUMNS = [
+    "Student",
+    "Student Username",
+    "Student External ID",
+    "Student Email",
+    "Evaluator",
+    "Evaluator Username",
+    "Evaluator External ID",
+    "Evaluator Email",
+    "Evaluation",
+    "Submit Date",
+]
+OASIS_START_COLUMNS = ["Start Date", "Evaluation Start Date"]
+OASIS_END_COLUMNS = ["End Date", "Evaluation End Date"]
+
+
+def rename_oasis_variants(df: pd.DataFrame) -> pd.DataFrame:
+    present = {old: new for old, new in OASIS_RENAME_VARIANTS.items() if old in df.columns and new not in df.columns}
+    return df.rename(columns=present) if present else df
+
+
+def oasis_date_formats(oasis: pd.DataFrame) -> dict[str, str]:
+    """
+    The formats prepare_completed_oasis parses the dates of a column-normalized OASIS export with
+    (Submit Date and the evaluation start / end), inferred from every row of it.
+    """
+    df = rename_oasis_variants(oasis)
+    columns = ["Submit Date", first_existing_col(df, OASIS_START_COLUMNS), first_existing_col(df, OASIS_END_COLUMNS)]
+    return {c: datetime_format(df[c]) for c in columns if c in df.columns}
+
+
+def check_oasis_columns(columns: Iterable[str]) -> None:
+    missing = [c for c in OASIS_REQUIRED_COLUMNS if c not in set(columns)]
+    if missing:
+        raise ValueError(f"OASIS export is missing expected column(s): {missing}")
+
+
+def read_oasis_export_streaming(
+    uploaded_file,
+    selected_eval_keys: set[str],
+    chunksize: int = 50_000,
+) -> pd.DataFrame:
+    """
+    Read only the OASIS columns prepare_completed_oasis uses, in chunks.
+
+    Each chunk is filtered to the selected evaluations and collapsed to one row per submission
+    (Form Record + Evaluation + Submit Date), so memory follows the number of submissions instead
+    of question rows x export columns. prepare_completed_oasis returns the same result for this
+    frame as for the full export.
+    """
+    if uploaded_file is None:
+        return pd.DataFrame()
+
+    raw = uploaded_file.getvalue()
+    wanted = set(OASIS_REQUIRED_COLUMNS + OASIS_START_COLUMNS + OASIS_END_COLUMNS + ["Form Record"])
+    last_error = None
+
+    # Sniffed encoding first; latin-1 only if a bad byte turns up past the sniffed sample.
+    for enc in dict.fromkeys([sniff_encoding(raw), FALLBACK_ENCODING]):
+        try:
+            header = pd.read_csv(BytesIO(raw), dtype=str, encoding=enc, nrows=0).columns
+        except Exception as e:  # pragma: no cover - displayed in Streamlit
+            last_error = e
+            continue
+
+        usecols = [
+            c for c in header
+            if str(c).strip().lstrip("\ufeff") in wanted
+            or OASIS_RENAME_VARIANTS.get(str(c).strip().lstrip("\ufeff")) in wanted
+        ]
+        columns = rename_oasis_variants(normalize_colnames(pd.DataFrame(columns=usecols))).columns
+        check_oasis_columns(columns)
+
+        if "Form Record" in columns:
+            dedupe_cols = ["Form Record", "Evaluation", "Submit Date"]
+        else:
+            dedupe_cols = [
+                "Student External ID",
+                "Student Username",
+                "Evaluator Username",
+                "Evaluator External ID",
+                "Evaluator Email",
+                "Evaluation",
+                "Submit Date",
+            ]
+
+        parts = []
+        try:
+            for chunk in pd.read_csv(BytesIO(raw), dtype=str, encoding=enc, usecols=usecols, chunksize=chunksize):
+                chunk = rename_oasis_variants(normalize_colnames(chunk.fillna("")))
+                chunk = chunk[clean_column(chunk["Evaluation"], clean_eval_name).isin(selected_eval_keys)]
+                parts.append(chunk.drop_duplicates(subset=dedupe_cols))
+        except UnicodeDecodeError as e:
+            last_error = e
+            continue
+
+        if not parts:
+            df = pd.DataFrame(columns=columns)
+        else:
+            # A submission can straddle a chunk boundary, so dedupe once more across chunks.
+            df = pd.concat(parts, ignore_index=True).drop_duplicates(subset=dedupe_cols).reset_index(drop=True)
+        df.attrs["encoding"] = enc
+        return df
+
+    raise ValueError(f"Could not read CSV. Last error: {last_error}")
+
+
+# Cleaned columns that identify one submission when the export has no Form Record.
+SUBMISSION_KEY_COLUMNS = [
+    "record_id",
+    "student_username_key",
+    "faculty_username_key",
+    "faculty_external_id_key",
+    "faculty_email",
+    "evaluation_key",
+    "submit_dt",
+]
+
+
+def prepare_completed_oasis(
+    oasis_raw: pd.DataFrame,
+    selected_eval_keys: set[str],
+    eval_config_by_key: dict[str, EvalConfig],
+    keep_columns: Iterable[str] = (),
+    dedupe: bool = True,
+    date_formats: dict[str, str] | None = None,
+) -> pd.DataFrame:
+    """
+    Convert raw OASIS question-level export to one row per submitted evaluation.
+
+    keep_columns are raw columns carried through unchanged (e.g. Form Record or a source-row hash).
+    dedupe=False skips collapsing to one row per submission, for callers that dedupe later.
+    date_formats are the date formats to parse with (oasis_date_formats); callers that prepare only
+    part of an export pass the full export's, so the part parses as it would in full.
+    """
+    df = normalize_colnames(oasis_raw)
+
+    # Normalize common OASIS column variants.
+    df = rename_oasis_variants(df)
+    check_oasis_columns(df.columns)
+
+    start_col = first_existing_col(df, OASIS_START_COLUMNS)
+    end_col = first_existing_col(df, OASIS_END_COLUMNS)
+    # Date formats come from every row, before any filter, so a subset of the rows parses alike.
+    if date_formats is None:
+        date_formats = oasis_date_formats(df)
+
+    # Filter and collapse to one row per submission before any per-row cleaning:
+    # each submitted form repeats its identity columns on every question row.
+    df["evaluation_key"] = clean_column(df["Evaluation"], clean_eval_name)
+    df = df[df["evaluation_key"].isin(selected_eval_keys)]
+
+    df = df.assign(submit_dt=parse_datetime_column(df["Submit Date"], date_formats["Submit Date"]))
+    df = df[df["submit_dt"].notna()]
+
+    # OASIS is usually question-level. Form Record is best if present.
+    # Include evaluation_key in case Form Record is ever reused unexpectedly.
+    if not dedupe:
+        dedupe_cols = None
+    elif "Form Record" in df.columns:
+        df = df.drop_duplicates(subset=["Form Record", "evaluation_key"])
+        dedupe_cols = None
+    else:
+        # Rows that are identical before cleaning are identical after it, so dropping them here
+        # keeps the same first row per submission as the cleaned dedupe below.
+        df = df.drop_duplicates(
+            subset=[
+                "Student External ID",
+                "Student Username",
+                "Evaluator Username",
+                "Evaluator External ID",
+                "Evaluator Email",
+                "evaluation_key",
+                "submit_dt",
+            ]
+        )
+        dedupe_cols = SUBMISSION_KEY_COLUMNS
+    df = df.copy()
+
+    df["evaluation_type"], df["evaluation_label"] = evaluation_names(df["evaluation_key"], eval_config_by_key)
+
+    df["record_id"] = clean_column(df["Student External ID"], clean_id)
+    df["student_username_key"] = clean_column(df["Student Username"], clean_id)
+    df["student_name"] = clean_column(df["Student"], clean_name_for_display)
+    df["student_email"] = clean_column(df["Student Email"], clean_email)
+
+    df["faculty_name"] = clean_column(df["Evaluator"], clean_name_for_display)
+    df["faculty_username_key"] = clean_column(df["Evaluator Username"], clean_id)
+    df["faculty_external_id_key"] = clean_column(df["Evaluator External ID"], clean_id)
+    df["faculty_email"] = clean_column(df["Evaluator Email"], clean_email)
+
+    df["oasis_start"] = to_date(df[start_col], date_formats[start_col]) if start_col else pd.NaT
+    df["oasis_end"] = to_date(df[end_col], date_formats[end_col]) if end_col else pd.NaT
+
+    if dedupe_cols:
+        df = df.drop_duplicates(subset=dedupe_cols)
+
+    keep = [
+        "record_id",
+        "student_username_key",
+        "student_name",
+        "student_email",
+        "faculty_name",
+        "faculty_username_key",
+        "faculty_external_id_key",
+        "faculty_email",
+        "evaluation_key",
+        "evaluation_type",
+        "evaluation_label",
+        "submit_dt",
+        "oasis_start",
+        "oasis_end",
+    ] + list(keep_columns)
+    return df[keep].reset_index(drop=True)
+
+
+# ============================================================
+# Matching logic
+# ============================================================
+def row_matches(
+    expected_row: pd.Series,
+    completed: pd.DataFrame,
+    allow_email_fallback: bool,
+    allow_username_fallback: bool,
+) -> pd.DataFrame:
+    """
+    Match expected association to completed OASIS submission.
+
+    Important design choice:
+    - Do not require date equality. Raw associations may use evaluation-period dates,
+      while raw OASIS exports often use course dates.
+    - Primary match: student external ID + evaluator external ID + evaluation.
+    - Fallbacks: evaluator email and/or evaluator username when external ID is blank.
+    """
+    c = completed[completed["evaluation_key"].eq(expected_row["evaluation_key"])].copy()
+
+    # Student match: external ID first. If external ID is missing, fall back to username.
+    expected_record_id = expected_row.get("record_id", "")
+    expected_student_username = expected_row.get("student_username_key", "")
+
+    if expected_record_id:
+        c = c[c["record_id"].eq(expected_record_id)].copy()
+    elif expected_student_username:
+        c = c[c["student_username_key"].eq(expected_student_username)].copy()
+    else:
+        return c.iloc[0:0].copy()
+
+    if c.empty:
+        return c
+
+    # Evaluator match priority.
+    expected_ext = expected_row.get("faculty_external_id_key", "")
+    expected_email = expected_row.get("faculty_email", "")
+    expected_username = expected_row.get("faculty_username_key", "")
+
+    masks = []
+
+    if expected_ext:
+        masks.append(c["faculty_external_id_key"].eq(expected_ext))
+
+    if allow_email_fallback and expected_email:
+        masks.append(c["faculty_email"].eq(expected_email))
+
+    if allow_username_fallback and expected_username:
+        masks.append(c["faculty_username_key"].eq(expected_username))
+
+    if not masks:
+        return c.iloc[0:0].copy()
+
+    combined_mask = masks[0]
+    for m in masks[1:]:
+        combined_mask = combined_mask | m
+
+    return c[combined_mask].copy()
+
+
+def match_submission_pairs(
+    expected: pd.DataFrame,
+    completed: pd.DataFrame,
+    allow_email_fallback: bool,
+    allow_username_fallback: bool,
+) -> pd.DataFrame:
+    """
+    Match every expected row at once with keyed joins instead of one row_matches scan per row.
+
+    Same rules as row_matches:
+    - Student key: record_id, or student username when the expected record_id is blank.
+    - Evaluator key: external ID, plus email and/or username when those fallbacks are allowed.
+
+    Returns one row per match with positional indexes into `expected` and `completed`
+    (columns expected_row / completed_row), sorted by expected_row then completed_row.
+    """
+    e = expected.reset_index(drop=True)
+    c = completed.reset_index(drop=True)
+
+    evaluator_cols = ["faculty_external_id_key", "faculty_email", "faculty_username_key"]
+    e_keys = e[["evaluation_key", "record_id", "student_username_key"] + evaluator_cols].copy()
+    e_keys["expected_row"] = range(len(e_keys))
+    c_keys = c[["evaluation_key", "record_id", "student_username_key"] + evaluator_cols].copy()
+    c_keys["completed_row"] = range(len(c_keys))
+
+    # Student match: external ID first. If external ID is missing, fall back to username.
+    by_record_id = e_keys[e_keys["record_id"].ne("")].merge(
+        c_keys.drop(columns=["student_username_key"]),
+        on=["evaluation_key", "record_id"],
+        suffixes=("", "_c"),
+    )
+    by_username = e_keys[e_keys["record_id"].eq("") & e_keys["student_username_key"].ne("")].merge(
+        c_keys.drop(columns=["record_id"]),
+        on=["evaluation_key", "student_username_key"],
+        suffixes=("", "_c"),
+    )
+    candidates = pd.concat([by_record_id, by_username], ignore_index=True)
+
+    # Evaluator match priority, OR-ed together exactly like row_matches.
+    mask = candidates["faculty_external_id_key"].ne("") & candidates["faculty_external_id_key"].eq(
+        candidates["faculty_external_id_key_c"]
+    )
+    if allow_email_fallback:
+        mask |= candidates["faculty_email"].ne("") & candidates["faculty_email"].eq(candidates["faculty_email_c"])
+    if allow_username_fallback:
+        mask |= candidates["faculty_username_key"].ne("") & candidates["faculty_username_key"].eq(
+            candidates["faculty_username_key_c"]
+        )
+
+    return (
+        candidates.loc[mask, ["expected_row", "completed_row"]]
+        .sort_values(["expected_row", "completed_row"])
+        .reset_index(drop=True)
+    )
+
+
+FACULTY_KEY_COLUMNS = ["faculty_external_id_key", "faculty_email", "faculty_username_key"]
+
+
+def _union_find_roots(node_lists: list[list[str]]) -> list[str | None]:
+    """Connected-component root per node list (None for an empty list); lists sharing a node are joined."""
+    parent: dict[str, str] = {}
+
+    def find(node: str) -> str:
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    for nodes in node_lists:
+        for node in nodes:
+            parent.setdefault(node, node)
+        for node in nodes[1:]:
+            a, b = find(nodes[0]), find(node)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+    return [find(nodes[0]) if nodes else None for nodes in node_lists]
+
+
+def resolve_faculty_identities(
+    expected: pd.DataFrame,
+    completed: pd.DataFrame,
+    allow_email_fallback: bool,
+    allow_username_fallback: bool,
+) -> pd.DataFrame:
+    """
+    One canonical faculty_id for every evaluator key triple (external ID, email, username) seen in
+    either file.
+
+    Triples sharing a non-blank external ID, or email / username when that fallback is allowed, get
+    the same faculty_id, transitively. That is looser than match_submission_pairs, which needs the
+    two rows themselves to share an identifier. Triples with no usable identifier get no faculty_id
+    and match nothing.
+
+    Returns one row per triple, ordered by faculty_id, with the names and row counts seen in each
+    file, so the table can be exported for auditing.
+    """
+    usable = ["faculty_external_id_key"]
+    if allow_email_fallback:
+        usable.append("faculty_email")
+    if allow_username_fallback:
+        usable.append("faculty_username_key")
+
+    both = pd.concat(
+        [
+            expected[FACULTY_KEY_COLUMNS + ["faculty_name"]].assign(_side="expected_rows"),
+            completed[FACULTY_KEY_COLUMNS + ["faculty_name"]].assign(_side="completed_rows"),
+        ],
+        ignore_index=True,
+    )
+    grouped = both.groupby(FACULTY_KEY_COLUMNS, sort=True)
+    table = grouped["_side"].value_counts().unstack(fill_value=0)
+    table = table.reindex(columns=["expected_rows", "completed_rows"], fill_value=0).reset_index()
+    table.columns.name = None
+    has_name = both["faculty_name"].str.strip().ne("")
+    table["faculty_names"] = join_unique_sorted(
+        pd.Series(grouped.ngroup().to_numpy()[has_name]), both.loc[has_name, "faculty_name"], len(table)
+    )
+
+    node_lists = [
+        [f"{col}\x1f{value}" for col, value in zip(usable, values) if value]
+        for values in table[usable].itertuples(index=False, name=None)
+    ]
+    roots = pd.Series(_union_find_roots(node_lists), dtype=object)
+    codes, _ = pd.factorize(roots)
+    table.insert(0, "faculty_id", pd.array(np.where(codes < 0, pd.NA, codes), dtype="Int64"))
+    return table.sort_values(["faculty_id"] + FACULTY_KEY_COLUMNS, kind="mergesort").reset_index(drop=True)
+
+
+def match_by_faculty_identity(
+    expected: pd.DataFrame, completed: pd.DataFrame, identities: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    match_submission_pairs with the evaluator OR-conditions replaced by one equi-join on the
+    resolve_faculty_identities faculty_id (student keys unchanged). Same output layout.
+    """
+    faculty_ids = identities.set_index(FACULTY_KEY_COLUMNS)["faculty_id"]
+
+    def keys(df: pd.DataFrame, position_col: str) -> pd.DataFrame:
+        out = df[["evaluation_key", "record_id", "student_username_key"]].reset_index(drop=True)
+        out["faculty_id"] = faculty_ids.reindex(pd.MultiIndex.from_frame(df[FACULTY_KEY_COLUMNS])).to_numpy()
+        out[position_col] = range(len(out))
+        return out[out["faculty_id"].notna()]
+
+    e_keys = keys(expected, "expected_row")
+    c_keys = keys(completed, "completed_row")
+    by_record_id = e_keys[e_keys["record_id"].ne("")].merge(
+        c_keys.drop(columns=["student_username_key"]), on=["evaluation_key", "record_id", "faculty_id"]
+    )
+    by_username = e_keys[e_keys["record_id"].eq("") & e_keys["student_username_key"].ne("")].merge(
+        c_keys.drop(columns=["record_id"]), on=["evaluation_key", "student_username_key", "faculty_id"]
+    )
+    return (
+        pd.concat([by_record_id, by_username], ignore_index=True)[["expected_row", "completed_row"]]
+        .sort_values(["expected_row", "completed_row"])
+        .reset_index(drop=True)
+    )
+
+
+def summarize_matches(
+    expected: pd.DataFrame, completed: pd.DataFrame, pairs: pd.DataFrame
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Add completed_eval_count to each expected row and return it with the long match table.
+
+    The match table has one row per (expected_row, completed_row) pair plus the submission's
+    formatted submit time and faculty name, so later aggregations never round-trip through
+    joined strings.
+    """
+    debug_rows = expected.reset_index(drop=True).copy()
+    n = len(debug_rows)
+
+    matches = pairs.copy()
+    matches["submit"] = completed["submit_dt"].dt.strftime("%Y-%m-%d %H:%M:%S").to_numpy()[matches["completed_row"]]
+    matches["faculty"] = completed["faculty_name"].astype(str).to_numpy()[matches["completed_row"]]
+
+    debug_rows["completed_eval_count"] = matches.groupby("expected_row").size().reindex(range(n), fill_value=0).to_numpy()
+    return debug_rows, matches
+
+
+def join_unique_sorted(keys: pd.Series, values: pd.Series, n_groups: int) -> np.ndarray:
+    """ "; "-joined sorted distinct values per group key 0..n_groups-1 ("" for groups with none)."""
+    long = pd.DataFrame({"key": keys.to_numpy(), "value": values.to_numpy()}).drop_duplicates()
+    joined = long.sort_values(["key", "value"]).groupby("key")["value"].agg("; ".join)
+    return joined.reindex(range(n_groups), fill_value="").to_numpy()
+
+
+# Note wording per note_style. "single_missing" = 1 expected / 0 received,
+# "none_received" = several expected / 0 received, "partial" = everything else still pending.
+REMINDER_NOTE_TEMPLATES: dict[str, dict[str, str]] = {
+    "hp": {
+        "single_missing": "The student indicated that you observed an H&P encounter with them, but we have not yet received the corresponding formative assessment.",
+        "none_received": "The student indicated that you observed {expected} H&P encounters with them, but we have not yet received any formative assessments.",
+        "partial": "The student indicated that you observed {expected} H&P encounters with them. We have received {completed} submission(s) so far and are still missing {pending}.",
+    },
+    "cas": {
+        "single_missing": "The student reported working with you, but we have not yet received the corresponding evaluation.",
+        "none_received": "The student reported working with you on {expected} occasions, but we have not yet received any completed evaluations.",
+        "partial": "The student reported working with you on {expected} occasions. We have received {completed} completed evaluation(s) so far and are still missing {pending}.",
+    },
+    # Generic fallback.
+    "generic": {
+        "single_missing": "The student reported working with you, but we have not yet received the corresponding evaluation.",
+        "none_received": "The student reported {expected} expected evaluation(s). We have received {completed} submission(s) and are still missing {pending}.",
+        "partial": "The student reported {expected} expected evaluation(s). We have received {completed} submission(s) and are still missing {pending}.",
+    },
+}
+
+
+def build_reminder_note(note_style: str, expected: int, completed: int) -> str:
+    pending = max(expected - completed, 0)
+    if pending <= 0:
+        return ""
+
+    templates = REMINDER_NOTE_TEMPLATES.get(note_style, REMINDER_NOTE_TEMPLATES["generic"])
+    if expected == 1 and completed == 0:
+        case = "single_missing"
+    elif expected > 1 and completed == 0:
+        case = "none_received"
+    else:
+        case = "partial"
+    return templates[case].format(expected=expected, completed=completed, pending=pending)
+
+
+def fill_template(template: str, values: dict[str, pd.Series], index: pd.Index) -> pd.Series:
+    """Column-wise str.format: concatenate the literal pieces of `template` with string columns."""
+    out = pd.Series("", index=index, dtype=object)
+    for literal, field, _, _ in Formatter().parse(template):
+        if literal:
+            out = out + literal
+        if field is not None:
+            out = out + values[field].astype(str)
+    return out
+
+
+def build_reminder_notes(collapsed: pd.DataFrame, eval_config_by_key: dict[str, EvalConfig]) -> pd.Series:
+    """Vectorized build_reminder_note for every collapsed row, using masks per note_style and case."""
+    expected = collapsed["expected_eval_count"].astype(int)
+    completed = collapsed["completed_eval_count"].astype(int)
+    pending = (expected - completed).clip(lower=0)
+
+    style = collapsed["evaluation_key"].map({k: c.note_style for k, c in eval_config_by_key.items()})
+    style = style.where(style.isin(list(REMINDER_NOTE_TEMPLATES)), "generic")
+    case = pd.Series(
+        np.select(
+            [expected.eq(1) & completed.eq(0), expected.gt(1) & completed.eq(0)],
+            ["single_missing", "none_received"],
+            default="partial",
+        ),
+        index=collapsed.index,
+    )
+
+    notes = pd.Series("", index=collapsed.index, dtype=object)
+    values = {"expected": expected, "completed": completed, "pending": pending}
+    for note_style, templates in REMINDER_NOTE_TEMPLATES.items():
+        for case_name, template in templates.items():
+            mask = pending.gt(0) & style.eq(note_style) & case.eq(case_name)
+            if mask.any():
+                notes[mask] = fill_template(template, {k: v[mask] for k, v in values.items()}, notes.index[mask])
+    return notes
+
+
+def build_prefill_links(
+    collapsed: pd.DataFrame,
+    eval_config_by_key: dict[str, EvalConfig],
+) -> tuple[pd.Series, pd.Series]:
+    """
+    Vectorized make_prefill_link for every collapsed row.
+
+    Each distinct student/faculty name is URL-encoded once; links are then concatenated column-wise.
+    Returns (blank_form_link, partial_form_link).
+    """
+    base = collapsed["evaluation_key"].map({k: c.redcap_base_url for k, c in eval_config_by_key.items()}).fillna("")
+
+    names = pd.concat([collapsed["student_name"], collapsed["faculty_name"]]).astype(str).str.strip()
+    encoded = {name: quote_plus(name) for name in names.unique()}
+    student = collapsed["student_name"].astype(str).str.strip().map(encoded)
+    faculty = collapsed["faculty_name"].astype(str).str.strip().map(encoded)
+
+    has_base = base.ne("")
+    blank = (base + "&student=" + student + "&preceptor=" + faculty).where(has_base, "")
+    partial = (blank + PARTIAL_PREFILL_PARAMS).where(has_base, "")
+    return blank, partial
+
+
+# One reminder row per student/faculty/evaluation; duplicated expected associations collapse into it.
+COLLAPSE_COLS = [
+    "record_id",
+    "student_email",
+    "student_name",
+    "faculty_email",
+    "faculty_name",
+    "evaluation_key",
+    "evaluation_type",
+    "evaluation_label",
+]
+
+
+def build_reminder_report(
+    expected: pd.DataFrame,
+    completed: pd.DataFrame,
+    allow_email_fallback: bool,
+    allow_username_fallback: bool,
+    eval_config_by_key: dict[str, EvalConfig],
+    sanitize_text_only: bool = False,
+    pairs: pd.DataFrame | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Return:
+      reminders: Power Automate-ready pending rows across all selected evaluation types
+      debug: all expected rows with matched count/status
+
+    sanitize_text_only keeps count/date columns typed instead of stringifying them for Power Automate.
+    pairs are precomputed matches in match_submission_pairs' layout (e.g. from SubmissionStore.match);
+    `completed` then only needs the rows they point at.
+    """
+    if expected.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    if pairs is None:
+        pairs = match_submission_pairs(expected, completed, allow_email_fallback, allow_username_fallback)
+    debug_rows, matches = summarize_matches(expected, completed.reset_index(drop=True), pairs)
+
+    # Collapse duplicated expected associations for the same student/faculty/eval.
+    grouped = debug_rows.groupby(COLLAPSE_COLS, dropna=False)
+    collapsed = grouped.agg(
+        expected_eval_count=("evaluation_key", "size"),
+        completed_eval_count=("completed_eval_count", "max"),
+        first_expected_start=("expected_start", "min"),
+        last_expected_end=("expected_end", "max"),
+    ).reset_index()
+
+    # Unique sorted submit dates / faculty names per collapsed row, straight from the match table.
+    match_group = pd.Series(grouped.ngroup().to_numpy()[matches["expected_row"]], index=matches.index)
+    has_submit = matches["submit"].notna()
+    has_faculty = matches["faculty"].str.strip().ne("")
+    collapsed["completed_submit_dates"] = join_unique_sorted(
+        match_group[has_submit], matches.loc[has_submit, "submit"], len(collapsed)
+    )
+    collapsed["matched_faculty_names"] = join_unique_sorted(
+        match_group[has_faculty], matches.loc[has_faculty, "faculty"], len(collapsed)
+    )
+
+    collapsed["pending_eval_count"] = (
+        collapsed["expected_eval_count"] - collapsed["completed_eval_count"]
+    ).clip(lower=0)
+
+    collapsed["duplicate_match_flag"] = collapsed["expected_eval_count"].apply(lambda n: "YES" if n > 1 else "")
+    collapsed["needs_reminder"] = collapsed["pending_eval_count"].apply(lambda n: "YES" if n > 0 else "")
+
+    collapsed["reminder_note"] = build_reminder_notes(collapsed, eval_config_by_key)
+    collapsed["blank_form_link"], collapsed["partial_form_link"] = build_prefill_links(collapsed, eval_config_by_key)
+
+    reminders = select_reminders(collapsed, sanitize_text_only)
+    return reminders, collapsed.reset_index(drop=True)
+
+
+REMINDER_COLUMNS = [
+    "faculty_email",
+    "faculty_name",
+    "student_name",
+    "student_email",
+    "evaluation_type",
+    "evaluation_label",
+    "expected_eval_count",
+    "completed_eval_count",
+    "pending_eval_count",
+    "duplicate_match_flag",
+    "reminder_note",
+    "blank_form_link",
+    "partial_form_link",
+    "record_id",
+    "first_expected_start",
+    "last_expected_end",
+]
+
+
+def select_reminders(collapsed: pd.DataFrame, sanitize_text_only: bool = False) -> pd.DataFrame:
+    """Power Automate-ready reminder rows (needs_reminder == "YES") from a collapsed report."""
+    reminders = collapsed[collapsed["needs_reminder"].eq("YES")]
+    reminders = sanitize_for_power_automate(reminders[REMINDER_COLUMNS], text_only=sanitize_text_only)
+    return reminders.reset_index(drop=True)
+
+
+# ============================================================
+# Partitioned / parallel reminder build
+# ============================================================
+def partition_keys(df: pd.DataFrame) -> pd.Series:
+    """record_id + evaluation_key per row; every collapsed row falls inside one such partition."""
+    return df["record_id"].astype(str) + "\x1f" + df["evaluation_key"].astype(str)
+
+
+def partition_inputs(
+    expected: pd.DataFrame, completed: pd.DataFrame, n_partitions: int
+) -> list[tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Split (expected, completed) into n_partitions independent build_reminder_report inputs by a
+    hash of (evaluation_key, record_id).
+
+    Expected rows with a blank record_id match on student username instead, so a completed row is
+    also sent to the blank-record_id partition of its evaluation when one of those rows uses its
+    username. Rows keep their original order inside each partition.
+    """
+    e_part = pd.util.hash_array(partition_keys(expected).to_numpy(dtype=object)) % n_partitions
+    c_part = pd.util.hash_array(partition_keys(completed).to_numpy(dtype=object)) % n_partitions
+
+    blank = expected[expected["record_id"].eq("")]
+    e_user = blank["student_username_key"].astype(str) + "\x1f" + blank["evaluation_key"].astype(str)
+    c_user = completed["student_username_key"].astype(str) + "\x1f" + completed["evaluation_key"].astype(str)
+    c_by_username = c_user.isin(e_user).to_numpy()
+    c_blank_key = "\x1f" + completed["evaluation_key"].astype(str)
+    c_blank_part = pd.util.hash_array(c_blank_key.to_numpy(dtype=object)) % n_partitions
+
+    return [
+        (expected[e_part == i], completed[(c_part == i) | (c_by_username & (c_blank_part == i))])
+        for i in range(n_partitions)
+    ]
+
+
+def merge_partition_reports(parts: list[tuple[pd.DataFrame, pd.DataFrame]]) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Combine (reminders, collapsed) results from disjoint partitions into the single
+    build_reminder_report result, in its row order.
+    """
+    parts = [(r, c) for r, c in parts if not c.empty]
+    if not parts:
+        return pd.DataFrame(), pd.DataFrame()
+    reminders = pd.concat([r for r, _ in parts], ignore_index=True)
+    collapsed = pd.concat([c for _, c in parts], ignore_index=True)
+
+    # build_reminder_report's groupby sorts by the collapse keys; put both frames in that order.
+    # Reminder rows are reordered through their collapsed rows (sanitizing may change sort keys).
+    order = collapsed.sort_values(COLLAPSE_COLS, kind="mergesort").index.to_numpy()
+    needs = collapsed["needs_reminder"].eq("YES").to_numpy()
+    reminder_pos = np.full(len(collapsed), -1)
+    reminder_pos[needs] = np.arange(needs.sum())
+    return (
+        reminders.iloc[reminder_pos[order][needs[order]]].reset_index(drop=True),
+        collapsed.iloc[order].reset_index(drop=True),
+    )
+
+
+def _build_partition(args: tuple) -> tuple[pd.DataFrame, pd.DataFrame]:
+    return build_reminder_report(*args)
+
+
+def build_reminder_report_parallel(
+    expected: pd.DataFrame,
+    completed: pd.DataFrame,
+    allow_email_fallback: bool,
+    allow_username_fallback: bool,
+    eval_config_by_key: dict[str, EvalConfig],
+    sanitize_text_only: bool = False,
+    workers: int = 1,
+    n_partitions: int | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    build_reminder_report over partition_inputs, run in a pool of `workers` processes.
+
+    The result is identical to build_reminder_report. n_partitions defaults to 4 per worker so
+    unevenly sized partitions still spread across the pool; workers <= 1 runs in-process.
+    """
+    if workers <= 1 or expected.empty:
+        return build_reminder_report(
+            expected, completed, allow_email_fallback, allow_username_fallback, eval_config_by_key, sanitize_text_only
+        )
+    jobs = [
+        (e, c, allow_email_fallback, allow_username_fallback, eval_config_by_key, sanitize_text_only)
+        for e, c in partition_inputs(expected, completed, n_partitions or 4 * workers)
+        if not e.empty
+    ]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge_partition_reports(list(pool.map(_build_partition, jobs)))
+
+
+def sweep_reminder_counts(
+    expected: pd.DataFrame,
+    completed: pd.DataFrame,
+    dates: Iterable[pd.Timestamp],
+    date_mode: str,
+    allow_email_fallback: bool,
+    allow_username_fallback: bool,
+) -> pd.DataFrame:
+    """
+    Reminder counts per as-of date and evaluation type, as build_reminder_report would give them
+    after filtering `expected` (prepared with DATE_MODE_ALL) for each date in turn.
+
+    Matching does not depend on the date, so submissions are matched once; each date then only
+    re-collapses the rows that pass its filter.
+    Returns as_of_date, evaluation_type, expected_rows, reminder_rows, pending_eval_count.
+    """
+    dates = pd.DatetimeIndex(dates).normalize().unique().sort_values()
+    columns = ["as_of_date", "evaluation_type", "expected_rows", "reminder_rows", "pending_eval_count"]
+    if expected.empty or dates.empty:
+        return pd.DataFrame(columns=columns)
+
+    e = expected.reset_index(drop=True)
+    pairs = match_submission_pairs(e, completed, allow_email_fallback, allow_username_fallback)
+    debug_rows, _ = summarize_matches(e, completed.reset_index(drop=True), pairs)
+    grouped = debug_rows.groupby(COLLAPSE_COLS, dropna=False)
+    group = grouped.ngroup().to_numpy()
+    group_type = grouped["evaluation_type"].first().to_numpy()
+
+    hits = ExpectedIntervals(e).rows_by_date(dates, date_mode)
+    hits["group"] = group[hits["expected_row"]]
+    hits["completed"] = debug_rows["completed_eval_count"].to_numpy()[hits["expected_row"]]
+
+    per_group = hits.groupby(["date_pos", "group"]).agg(
+        expected=("expected_row", "size"), completed=("completed", "max")
+    ).reset_index()
+    per_group["pending_eval_count"] = (per_group["expected"] - per_group["completed"]).clip(lower=0)
+    per_group["needs_reminder"] = per_group["pending_eval_count"].gt(0)
+    per_group["evaluation_type"] = group_type[per_group["group"]]
+
+    counts = per_group.groupby(["date_pos", "evaluation_type"]).agg(
+        expected_rows=("group", "size"),
+        reminder_rows=("needs_reminder", "sum"),
+        pending_eval_count=("pending_eval_count", "sum"),
+    )
+    full = pd.MultiIndex.from_product(
+        [range(len(dates)), sorted(pd.unique(group_type))], names=["date_pos", "evaluation_type"]
+    )
+    counts = counts.reindex(full, fill_value=0).astype(int).reset_index()
+    counts.insert(0, "as_of_date", dates[counts.pop("date_pos")])
+    return counts[columns]
+
+
+def build_eval_selection(
+    selected_labels: Iterable[str],
+    custom_eval_name: str = "",
+    custom_output_name: str = "",
+    custom_redcap_url: str = "",
+    configs: list[EvalConfig] = EVAL_CONFIGS,
+) -> tuple[set[str], dict[str, EvalConfig]]:
+    """Selected evaluation keys and the config map, including an optional custom evaluation type."""
+    eval_config_by_key, label_to_key = config_maps(configs)
+    selected_eval_keys = {label_to_key[label] for label in selected_labels}
+
+    if custom_eval_name.strip():
+        custom_config = EvalConfig(
+            label=custom_output_name.strip() or custom_eval_name.strip(),
+            match_name=custom_eval_name.strip(),
+            output_name=custom_output_name.strip() or display_eval_name(custom_eval_name),
+            redcap_base_url=custom_redcap_url.strip(),
+            note_style="generic",
+        )
+        custom_key = clean_eval_name(custom_config.match_name)
+        eval_config_by_key = {**eval_config_by_key, custom_key: custom_config}
+        selected_eval_keys.add(custom_key)
+
+    return selected_eval_keys, eval_config_by_key
+
+
+# ============================================================
+# Output files
+# ============================================================
+def reminder_file_stem(eval_type: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", eval_type.lower()).strip("_") or "evaluation"
+
+
+def build_output_files(
+    reminders: pd.DataFrame,
+    debug: pd.DataFrame,
+    expected: pd.DataFrame,
+    completed: pd.DataFrame,
+) -> dict[str, pd.DataFrame]:
+    """
+    Every CSV the reminder builder offers, keyed by file name: combined, one per evaluation type,
+    debug, and the two normalized inputs.
+    """
+    files = {"combined_preceptor_eval_reminders.csv": reminders}
+    if not reminders.empty:
+        for eval_type in sorted(reminders["evaluation_type"].dropna().unique().tolist()):
+            sub = reminders[reminders["evaluation_type"].eq(eval_type)]
+            files[f"{reminder_file_stem(eval_type)}_reminders.csv"] = sub
+    files["debug_match_report.csv"] = debug
+    files["normalized_expected_associations.csv"] = expected
+    files["normalized_completed_oasis.csv"] = completed
+    return files
+
+
+# utf-8-sig so Excel opens the reminder CSVs cleanly.
+REMINDER_CSV_ENCODING = "utf-8-sig"
+
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    """Bytes written for every reminder CSV."""
+    return write_csv_bytes(df, REMINDER_CSV_ENCODING)
+
+
+# ============================================================
+# Parquet snapshots of the normalized frames
+# ============================================================
+SNAPSHOT_EXPECTED = "expected"
+SNAPSHOT_COMPLETED = "completed"
+SNAPSHOT_FILE_NAMES = {
+    SNAPSHOT_EXPECTED: "expected_associations_snapshot.parquet",
+    SNAPSHOT_COMPLETED: "completed_oasis_snapshot.parquet",
+}
+SNAPSHOT_VERSION = 1
+
+
+def to_parquet_snapshot(df: pd.DataFrame, kind: str) -> bytes:
+    """
+    Typed Parquet snapshot of a normalized expected/completed frame (needs pyarrow).
+
+    Dates keep their datetime type and text columns are written as categoricals, i.e. dictionary
+    encoded, since names and keys repeat across rows.
+    """
+    out = df.astype({c: "category" for c in df.columns if not pd.api.types.is_datetime64_any_dtype(df[c])})
+    out.attrs = {"snapshot": kind, "snapshot_version": SNAPSHOT_VERSION}
+    buf = BytesIO()
+    out.to_parquet(buf, index=False)
+    return buf.getvalue()
+
+
+def read_parquet_snapshot(
+    uploaded_file,
+    kind: str,
+    selected_eval_keys: set[str],
+    eval_config_by_key: dict[str, EvalConfig],
+) -> pd.DataFrame:
+    """
+    Load a to_parquet_snapshot file in place of prepare_expected_associations (DATE_MODE_ALL) or
+    prepare_completed_oasis.
+
+    Rows are limited to the selected evaluations and their type/label follow the current config;
+    every other setting (e.g. include_all_students) is whatever the snapshot was built with.
+    """
+    try:
+        df = pd.read_parquet(BytesIO(uploaded_file.getvalue()))
+    except Exception as e:  # pragma: no cover - displayed in Streamlit
+        raise ValueError(f"Could not read Parquet snapshot. Last error: {e}")
+    if df.attrs.get("snapshot") != kind or df.attrs.get("snapshot_version") != SNAPSHOT_VERSION:
+        raise ValueError(f"This file is not a normalized {kind} snapshot from this version of the reminder builder.")
+    df.attrs = {}
+    for c in df.select_dtypes("category").columns:
+        df[c] = df[c].astype(df[c].cat.categories.dtype)
+    df = df[df["evaluation_key"].isin(selected_eval_keys)].reset_index(drop=True)
+    df["evaluation_type"], df["evaluation_label"] = evaluation_names(df["evaluation_key"], eval_config_by_key)
+    return df
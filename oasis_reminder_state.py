@@ -0,0 +1,329 @@
+"""
+Incremental reminder runs: persist the last run's normalized frames and only redo what changed.
+
+A weekly run usually adds a few dozen OASIS submissions. With the previous ReminderState:
+- only association / OASIS rows whose content hash is new are normalized,
+- only (record_id, evaluation_key) groups touched by an added/removed expected or completed row
+  are re-matched; every other collapsed row is reused as-is,
+- the reminder rows that appeared, changed or disappeared since the last run come back as a delta.
+
+Reading and hashing the exports is still linear in their size, but that is C-speed pandas work;
+cleaning and matching follow the size of the change. New rows are parsed with the date formats of
+the whole export, so they get the dates a full rebuild would give them. Any change in the run
+settings (evaluation types, fallbacks, sanitizing, ...) falls back to a full rebuild.
+
+The state file is a pickle: only load state files this tool wrote.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from oasis_reminder_core import (
+    DATE_MODE_ALL,
+    OASIS_END_COLUMNS,
+    OASIS_REQUIRED_COLUMNS,
+    OASIS_START_COLUMNS,
+    REMINDER_COLUMNS,
+    SUBMISSION_KEY_COLUMNS,
+    EvalConfig,
+    association_date_formats,
+    build_reminder_report,
+    filter_expected_by_date,
+    merge_partition_reports,
+    normalize_colnames,
+    oasis_date_formats,
+    partition_keys,
+    prepare_completed_oasis,
+    prepare_expected_associations,
+    rename_oasis_variants,
+)
+
+STATE_VERSION = 1
+HASH_COL = "_source_hash"
+FORM_RECORD_COL = "Form Record"
+
+# Columns that identify a reminder row for the delta; the rest are compared for "changed".
+DELTA_KEY_COLS = ["record_id", "student_email", "student_name", "faculty_email", "faculty_name", "evaluation_type"]
+
+
+@dataclass
+class ReminderState:
+    """
+    Everything a later run needs to diff against.
+
+    assoc_hashes/oasis_hashes are every raw row hash seen, including rows that were filtered out.
+    expected_rows/completed_rows are the normalized rows per raw hash (with HASH_COL, before
+    dropping duplicates); expected/completed are what the matcher saw.
+    """
+
+    settings_key: tuple
+    assoc_hashes: np.ndarray
+    oasis_hashes: np.ndarray
+    expected_rows: pd.DataFrame
+    completed_rows: pd.DataFrame
+    expected: pd.DataFrame
+    completed: pd.DataFrame
+    collapsed: pd.DataFrame
+    reminders: pd.DataFrame
+    version: int = STATE_VERSION
+
+
+@dataclass
+class IncrementalStats:
+    full_rebuild: bool
+    new_association_rows: int = 0
+    new_oasis_rows: int = 0
+    affected_groups: int = 0
+    total_groups: int = 0
+
+
+def load_state(path: Path) -> ReminderState | None:
+    if not Path(path).exists():
+        return None
+    state = pd.read_pickle(path)
+    if not isinstance(state, ReminderState) or state.version != STATE_VERSION:
+        return None
+    return state
+
+
+def save_state(path: Path, state: ReminderState) -> None:
+    pd.to_pickle(state, path)
+
+
+def undated_expected(state: ReminderState) -> pd.DataFrame:
+    """The state's expected rows before the date filter, as prepare_expected_associations(DATE_MODE_ALL) gives them."""
+    return state.expected_rows.drop(columns=[HASH_COL]).drop_duplicates().reset_index(drop=True)
+
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    """uint64 content hash per row (column order as given, index ignored)."""
+    return pd.util.hash_pandas_object(df, index=False)
+
+
+def reduce_oasis_rows(oasis_raw: pd.DataFrame) -> pd.DataFrame:
+    """The OASIS columns prepare_completed_oasis reads, one row per distinct raw row, plus HASH_COL."""
+    df = rename_oasis_variants(normalize_colnames(oasis_raw))
+    wanted = OASIS_REQUIRED_COLUMNS + OASIS_START_COLUMNS + OASIS_END_COLUMNS + [FORM_RECORD_COL]
+    df = df[[c for c in dict.fromkeys(wanted) if c in df.columns]]
+    # Question rows of one submission repeat the same identity columns, so they hash alike.
+    df = df.assign(**{HASH_COL: row_hashes(df).to_numpy()})
+    return df.drop_duplicates(subset=[HASH_COL])
+
+
+def _reused_and_new(
+    raw: pd.DataFrame, previous: pd.DataFrame | None, seen: np.ndarray | None
+) -> tuple[pd.DataFrame | None, pd.DataFrame]:
+    """Split raw rows into (previous normalized rows still present, raw rows never seen before)."""
+    if previous is None:
+        return None, raw
+    return previous[previous[HASH_COL].isin(raw[HASH_COL])], raw[~raw[HASH_COL].isin(seen)]
+
+
+def _changed_rows(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """Rows present in exactly one of the two frames (compared on all of current's columns)."""
+    cols = list(current.columns)
+    prev_hash = row_hashes(previous[cols])
+    cur_hash = row_hashes(current)
+    return pd.concat([previous.loc[~prev_hash.isin(cur_hash).to_numpy(), cols], current[~cur_hash.isin(prev_hash)]])
+
+
+def reminder_delta(previous: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reminder rows that are new, changed or resolved since the previous run.
+
+    Rows are identified by student/faculty/evaluation; "changed" means any other column differs
+    (e.g. a received evaluation lowered pending_eval_count). A change column leads the output.
+    """
+    columns = ["change"] + REMINDER_COLUMNS
+    if previous.empty and current.empty:
+        return pd.DataFrame(columns=columns)
+    prev = previous.reindex(columns=REMINDER_COLUMNS).astype(str)
+    cur = current.reindex(columns=REMINDER_COLUMNS).astype(str)
+
+    merged = cur.merge(prev, on=DELTA_KEY_COLS, how="outer", suffixes=("", "_prev"), indicator=True)
+    value_cols = [c for c in REMINDER_COLUMNS if c not in DELTA_KEY_COLS]
+    differs = pd.Series(False, index=merged.index)
+    for c in value_cols:
+        differs |= merged[c].ne(merged[f"{c}_prev"])
+
+    merged["change"] = ""
+    merged.loc[merged["_merge"].eq("left_only"), "change"] = "new"
+    merged.loc[merged["_merge"].eq("both") & differs, "change"] = "changed"
+    resolved = merged["_merge"].eq("right_only")
+    merged.loc[resolved, "change"] = "resolved"
+    for c in value_cols:
+        merged.loc[resolved, c] = merged.loc[resolved, f"{c}_prev"]
+
+    delta = merged[merged["change"].ne("")]
+    return delta[columns].sort_values(["change"] + DELTA_KEY_COLS, kind="mergesort").reset_index(drop=True)
+
+
+def run_incremental(
+    assoc_raw: pd.DataFrame,
+    oasis_raw: pd.DataFrame,
+    previous: ReminderState | None,
+    selected_eval_keys: set[str],
+    eval_config_by_key: dict[str, EvalConfig],
+    as_of_date: pd.Timestamp,
+    date_mode: str,
+    include_all_students: bool,
+    allow_email_fallback: bool,
+    allow_username_fallback: bool,
+    sanitize_text_only: bool = False,
+) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, ReminderState, IncrementalStats]:
+    """
+    Same reminders/debug as prepare_* + build_reminder_report on the full exports, reusing `previous`.
+
+    Returns (reminders, debug, delta, new_state, stats). delta is reminder_delta against the
+    previous run's reminders (every reminder is "new" on a first run).
+    """
+    settings_key = (
+        tuple(sorted(selected_eval_keys)),
+        tuple(sorted(eval_config_by_key.items())),
+        include_all_students,
+        allow_email_fallback,
+        allow_username_fallback,
+        sanitize_text_only,
+    )
+    if previous is not None and previous.settings_key != settings_key:
+        previous = None
+    stats = IncrementalStats(full_rebuild=previous is None)
+
+    # Expected side: normalize only association rows with an unseen content hash.
+    assoc = normalize_colnames(assoc_raw)
+    assoc = assoc.assign(**{HASH_COL: row_hashes(assoc).to_numpy()})
+    reused, new_rows = _reused_and_new(
+        assoc,
+        previous.expected_rows if previous else None,
+        previous.assoc_hashes if previous else None,
+    )
+    stats.new_association_rows = len(new_rows)
+    fresh = prepare_expected_associations(
+        assoc_raw=new_rows,
+        selected_eval_keys=selected_eval_keys,
+        eval_config_by_key=eval_config_by_key,
+        as_of_date=as_of_date,
+        date_mode=DATE_MODE_ALL,
+        include_all_students=include_all_students,
+        keep_columns=[HASH_COL],
+        date_formats=association_date_formats(assoc),
+    )
+    # The state keeps one normalized row set per raw row hash; duplicates are only dropped on the
+    # derived frames, so a row hidden behind a duplicate reappears if its twin leaves the export.
+    expected_rows = fresh if reused is None else pd.concat([reused, fresh], ignore_index=True)
+    expected = expected_rows.drop(columns=[HASH_COL]).drop_duplicates().reset_index(drop=True)
+    expected = filter_expected_by_date(expected, as_of_date, date_mode)
+
+    # Completed side: same idea on the distinct raw submission rows.
+    oasis = reduce_oasis_rows(oasis_raw)
+    reused, new_rows = _reused_and_new(
+        oasis,
+        previous.completed_rows if previous else None,
+        previous.oasis_hashes if previous else None,
+    )
+    stats.new_oasis_rows = len(new_rows)
+    has_form_record = FORM_RECORD_COL in oasis.columns
+    keep = [FORM_RECORD_COL, HASH_COL] if has_form_record else [HASH_COL]
+    fresh = prepare_completed_oasis(
+        new_rows,
+        selected_eval_keys,
+        eval_config_by_key,
+        keep_columns=keep,
+        dedupe=False,
+        date_formats=oasis_date_formats(oasis),
+    )
+    completed_rows = fresh if reused is None else pd.concat([reused, fresh], ignore_index=True)
+    dedupe_cols = [FORM_RECORD_COL, "evaluation_key"] if has_form_record else SUBMISSION_KEY_COLUMNS
+    completed = (
+        completed_rows.drop_duplicates(subset=dedupe_cols)
+        .drop(columns=keep)
+        .reset_index(drop=True)
+    )
+
+    if previous is None:
+        reminders, collapsed = build_reminder_report(
+            expected, completed, allow_email_fallback, allow_username_fallback, eval_config_by_key, sanitize_text_only
+        )
+        previous_reminders = pd.DataFrame(columns=REMINDER_COLUMNS)
+        stats.affected_groups = stats.total_groups = len(collapsed)
+    else:
+        reminders, collapsed = _rematch_affected(
+            previous,
+            expected,
+            completed,
+            allow_email_fallback,
+            allow_username_fallback,
+            eval_config_by_key,
+            sanitize_text_only,
+            stats,
+        )
+        previous_reminders = previous.reminders
+
+    delta = reminder_delta(previous_reminders, reminders)
+    state = ReminderState(
+        settings_key=settings_key,
+        assoc_hashes=assoc[HASH_COL].unique(),
+        oasis_hashes=oasis[HASH_COL].unique(),
+        expected_rows=expected_rows,
+        completed_rows=completed_rows,
+        expected=expected,
+        completed=completed,
+        collapsed=collapsed,
+        reminders=reminders,
+    )
+    return reminders, collapsed, delta, state, stats
+
+
+def _rematch_affected(
+    previous: ReminderState,
+    expected: pd.DataFrame,
+    completed: pd.DataFrame,
+    allow_email_fallback: bool,
+    allow_username_fallback: bool,
+    eval_config_by_key: dict[str, EvalConfig],
+    sanitize_text_only: bool,
+    stats: IncrementalStats,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Re-run matching for the (record_id, evaluation_key) partitions touched since `previous`.
+
+    Every collapsed row lives in exactly one partition. A completed row can also reach expected
+    rows with a blank record_id through the username fallback, so a changed submission also
+    marks its evaluation's blank-record_id partition.
+    """
+    changed_expected = _changed_rows(previous.expected, expected)
+    changed_completed = _changed_rows(previous.completed, completed)
+
+    affected = set(partition_keys(changed_expected)) | set(partition_keys(changed_completed))
+    affected |= set("\x1f" + changed_completed["evaluation_key"].astype(str))
+
+    prev_collapsed = previous.collapsed
+    if prev_collapsed.empty:
+        prev_kept = np.zeros(0, dtype=bool)
+    else:
+        prev_kept = ~partition_keys(prev_collapsed).isin(affected).to_numpy()
+    keep_prev = prev_collapsed[prev_kept]
+    # previous.reminders holds the needs_reminder rows of previous.collapsed, in the same order.
+    if prev_collapsed.empty:
+        keep_prev_reminders = previous.reminders
+    else:
+        keep_prev_reminders = previous.reminders[prev_kept[prev_collapsed["needs_reminder"].eq("YES").to_numpy()]]
+
+    e_sub = expected[partition_keys(expected).isin(affected)]
+    blank = e_sub[e_sub["record_id"].eq("")]
+    c_user = completed["student_username_key"].astype(str) + "\x1f" + completed["evaluation_key"].astype(str)
+    e_user = blank["student_username_key"].astype(str) + "\x1f" + blank["evaluation_key"].astype(str)
+    c_sub = completed[partition_keys(completed).isin(affected) | c_user.isin(e_user)]
+
+    redone_reminders, redone = build_reminder_report(
+        e_sub, c_sub, allow_email_fallback, allow_username_fallback, eval_config_by_key, sanitize_text_only
+    )
+    stats.affected_groups = len(redone)
+
+    reminders, collapsed = merge_partition_reports([(keep_prev_reminders, keep_prev), (redone_reminders, redone)])
+    stats.total_groups = len(collapsed)
+    return reminders, collapsed
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterator, TypeVar
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+T = TypeVar("T")
+
+DEFAULT_LOG_PATH = Path("perf_runs.jsonl")
+
+
+def count_rows(value) -> int | None:
+    """Row count of a frame, or of the first frame in a tuple of results; None for anything else."""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+
+def _max_rss_mib() -> float | None:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux (bytes on macOS, where this overstates by 1024x; fine for deltas).
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class StageRecord:
+    """One timed stage. Set rows_out inside the `with` block (or let PerfLog.run fill it in)."""
+
+    def __init__(self, name: str, rows_in: int | None = None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out: int | None = None
+        self.seconds = 0.0
+        self.rss_growth_mib: float | None = None
+        self.traced_peak_mib: float | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "seconds": round(self.seconds, 4),
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "rss_growth_mib": None if self.rss_growth_mib is None else round(self.rss_growth_mib, 1),
+            "traced_peak_mib": None if self.traced_peak_mib is None else round(self.traced_peak_mib, 1),
+        }
+
+
+class PerfLog:
+    """
+    Per-stage wall time, row counts and memory for one script run.
+
+    Create a fresh PerfLog per Streamlit rerun. Peak RSS comes from getrusage, so it only moves when
+    a stage pushes the process past its previous high-water mark. trace_memory=True also records
+    the tracemalloc peak of each stage; it slows pandas down noticeably, and stages should not nest
+    while it is on because they share one tracemalloc peak.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.records: list[StageRecord] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None) -> Iterator[StageRecord]:
+        record = StageRecord(name, rows_in)
+        started_tracing = False
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracing = True
+            tracemalloc.reset_peak()
+            traced_before = tracemalloc.get_traced_memory()[0]
+        rss_before = _max_rss_mib()
+        t0 = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - t0
+            rss_after = _max_rss_mib()
+            if rss_before is not None and rss_after is not None:
+                record.rss_growth_mib = rss_after - rss_before
+            if self.trace_memory:
+                record.traced_peak_mib = (tracemalloc.get_traced_memory()[1] - traced_before) / 2**20
+                if started_tracing:
+                    tracemalloc.stop()
+            self.records.append(record)
+
+    def run(self, name: str, fn: Callable[[], T], rows_in: int | None = None) -> T:
+        """Time fn() as one stage and take rows_out from its result."""
+        with self.stage(name, rows_in) as record:
+            result = fn()
+            record.rows_out = count_rows(result)
+        return result
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [r.as_dict() for r in self.records],
+            columns=["stage", "seconds", "rows_in", "rows_out", "rss_growth_mib", "traced_peak_mib"],
+        )
+
+    @property
+    def total_seconds(self) -> float:
+        """Time spent inside recorded stages."""
+        return sum(r.seconds for r in self.records)
+
+    @property
+    def elapsed(self) -> float:
+        """Time since this PerfLog was created, i.e. the whole run so far."""
+        return time.perf_counter() - self._started
+
+    def append_jsonl(self, path: Path = DEFAULT_LOG_PATH, **run_info) -> None:
+        """Append this run as one JSON line: a UTC timestamp, run_info (app, instrument, ...) and the stages."""
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **run_info,
+            "run_seconds": round(self.elapsed, 4),
+            "stages": [r.as_dict() for r in self.records],
+        }
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
@@ -0,0 +1,202 @@
+"""
+Rotation calendar and due dates for the roster formatters.
+
+Every distinct rotation start date in a roster becomes a rotation: rot_date_N one-hot columns for
+REDCap, a per-student rotation code and the rotation_start_dates.txt reference. All three come from
+one factorize of the start_date column, so the cost no longer grows with dates x students.
+
+Due dates are rules (anchor date, optional weekday roll, offset, time of day) evaluated for the
+whole roster in one NumPy datetime64 pass, so every roster branch of a term, and the roster
+updater, produce the same deadlines. Rules can also be rolled off the closure days of a local
+holiday calendar with np.busday_offset.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+ROSTER_DATE_FORMAT = "%m-%d-%Y"
+SUNDAY = 6
+# np.busday_offset weekmask: only the holiday calendar closes days, weekends stay open.
+EVERY_DAY = "1111111"
+
+
+def rotation_calendar(
+    start_date: pd.Series, code_format: str = "r{:02}"
+) -> tuple[pd.DataFrame, pd.Series, pd.DataFrame]:
+    """
+    Rotations of a datetime start_date column, numbered oldest first.
+
+    Returns (rot_date_N columns, rotation code per student, reference). rot_date_N holds the
+    MM-DD-YYYY start date for students of rotation N and "" for everyone else. Students without a
+    start date get "" in every rot_date column and a missing rotation code. The reference has one
+    rotation_code / start_date row per rotation.
+    """
+    codes, dates = pd.factorize(start_date, sort=True)
+    labels = np.asarray(dates.strftime(ROSTER_DATE_FORMAT), dtype=object)
+    rotation_codes = np.array([code_format.format(n) for n in range(1, len(dates) + 1)], dtype=object)
+
+    one_hot = np.full((len(codes), len(dates)), "", dtype=object)
+    rows = np.flatnonzero(codes >= 0)
+    one_hot[rows, codes[rows]] = labels[codes[rows]]
+    rot_dates = pd.DataFrame(
+        one_hot, index=start_date.index, columns=[f"rot_date_{n}" for n in range(1, len(dates) + 1)]
+    )
+
+    # codes is -1 for a missing start date, which the map leaves as a missing rotation code.
+    student_codes = pd.Series(codes, index=start_date.index).map(dict(enumerate(rotation_codes)))
+    reference = pd.DataFrame({"rotation_code": rotation_codes, "start_date": labels})
+    return rot_dates, student_codes, reference
+
+
+def rotation_reference_text(reference: pd.DataFrame) -> str:
+    """rotation_start_dates.txt: one "code, MM-DD-YYYY" line per rotation."""
+    return "\n".join(reference["rotation_code"] + ", " + reference["start_date"])
+
+
+@dataclass(frozen=True)
+class DueDateRule:
+    """
+    One due-date column: the anchor date ("start_date" or "end_date"), rolled forward to the next
+    `weekday` on or after it (0 = Monday, None = no roll), plus `weeks` and `days`. Written as
+    MM-DD-YYYY followed by `time`, or the bare date when time is None.
+
+    With a holiday calendar, a date that lands on a closed day moves to the next ("forward") or
+    previous ("backward") open day; roll=None ignores the calendar. `weekmask` marks the weekdays
+    that count as open besides the holidays.
+    """
+
+    column: str
+    anchor: str
+    weekday: int | None = None
+    weeks: int = 0
+    days: int = 0
+    time: str | None = "23:59"
+    roll: str | None = None
+    weekmask: str = EVERY_DAY
+
+
+# 2025-26 (app.py Roster_HMC / Roster_KP): weekly quizzes from the first Sunday of the rotation,
+# mid-point and final assignments with the 2nd and 4th quiz, grades 6 weeks after the rotation.
+DUE_DATE_RULES_2025_26 = [
+    *(DueDateRule(f"quiz_due_{n}", "start_date", weekday=SUNDAY, weeks=n - 1) for n in range(1, 5)),
+    DueDateRule("ass_middue_date", "start_date", weekday=SUNDAY, weeks=1),
+    DueDateRule("ass_due_date", "start_date", weekday=SUNDAY, weeks=3),
+    DueDateRule("docass_due_date_1", "start_date", weekday=SUNDAY, weeks=1),
+    DueDateRule("docass_due_date_2", "start_date", weekday=SUNDAY, weeks=3),
+    DueDateRule("grade_due_date", "end_date", weeks=6, roll="forward"),
+]
+
+# 2026-27 (app2627.py Roster_HMC / Roster_KP / Roster_Updater): one assignment, due with what was
+# the 4th quiz, and the grade deadline.
+DUE_DATE_RULES_2026_27 = [
+    DueDateRule("ass_due_date", "start_date", weekday=SUNDAY, weeks=3),
+    DueDateRule("grade_due_date", "end_date", weeks=6, roll="forward"),
+]
+# Only the grade deadlines roll off holidays: the weekly student deadlines stay on their Sundays so
+# that a closure cannot push one onto the next week's.
+
+
+def _calendar_days(values: pd.Series) -> np.ndarray:
+    # Calendar files are typed by hand, so each entry may use its own date format.
+    parsed = pd.to_datetime(values, format="mixed", errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]")
+
+
+class HolidayCalendar:
+    """
+    Closure days from a local academic calendar, for rolling due dates off them.
+
+    `version` identifies the file the calendar came from (its content digest). The NumPy
+    business-day calendars are built once per weekmask and kept on the instance, so a calendar
+    cached by version is not rebuilt on reruns.
+    """
+
+    def __init__(self, dates, version: str = ""):
+        days = np.asarray(dates, dtype="datetime64[D]")
+        self.dates = np.unique(days[~np.isnat(days)])
+        self.version = version
+        self._busday_calendars: dict[str, np.busdaycalendar] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, version: str = "") -> HolidayCalendar:
+        """
+        Read a calendar file: one closure per row, either a `date` column or a `start_date` /
+        `end_date` range (end optional). Column names are matched case-insensitively; other columns
+        such as the holiday name are ignored, as are rows whose date does not parse.
+        """
+        columns = {str(c).strip().lower(): c for c in df.columns}
+        start_col = columns.get("date", columns.get("start_date"))
+        if start_col is None:
+            raise ValueError("The holiday calendar needs a 'date' column (or 'start_date' / 'end_date').")
+        start = _calendar_days(df[start_col])
+        end_col = columns.get("end_date") if "date" not in columns else None
+        if end_col is None:
+            return cls(start, version)
+
+        end = _calendar_days(df[end_col])
+        end = np.where(np.isnat(end), start, end)
+        ok = ~np.isnat(start) & (end >= start)
+        lengths = (end[ok] - start[ok]).astype(np.int64) + 1
+        # Expand every range at once: each day is its range's start plus its position in the range.
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return cls(np.repeat(start[ok], lengths) + offsets.astype("timedelta64[D]"), version)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def busday_calendar(self, weekmask: str = EVERY_DAY) -> np.busdaycalendar:
+        if weekmask not in self._busday_calendars:
+            self._busday_calendars[weekmask] = np.busdaycalendar(weekmask=weekmask, holidays=self.dates)
+        return self._busday_calendars[weekmask]
+
+    def roll(self, dates: np.ndarray, roll: str, weekmask: str = EVERY_DAY) -> np.ndarray:
+        """datetime64[D] dates (any shape) moved off closed days; NaT stays NaT."""
+        return np.busday_offset(dates, 0, roll=roll, busdaycal=self.busday_calendar(weekmask))
+
+
+def due_dates(
+    start_date: pd.Series,
+    end_date: pd.Series,
+    rules: list[DueDateRule],
+    holidays: HolidayCalendar | None = None,
+) -> pd.DataFrame:
+    """
+    One formatted column per rule, indexed like start_date; "" where the anchor date is missing.
+
+    start_date / end_date are datetime columns; any time of day is ignored. With `holidays`, the
+    rules that have a roll are moved off its closure days.
+    """
+    anchors = {
+        "start_date": start_date.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]"),
+        "end_date": end_date.to_numpy(dtype="datetime64[ns]").astype("datetime64[D]"),
+    }
+    unknown = {r.anchor for r in rules} - anchors.keys()
+    if unknown:
+        raise ValueError(f"Unknown due-date anchor(s): {sorted(unknown)}")
+
+    # rules x students: every rule's anchor, weekday roll and offset in one array expression.
+    base = np.stack([anchors[r.anchor] for r in rules]) if rules else np.empty((0, len(start_date)), "M8[D]")
+    weekday = np.array([-1 if r.weekday is None else r.weekday for r in rules], dtype=np.int64)[:, None]
+    offset = np.array([7 * r.weeks + r.days for r in rules], dtype=np.int64)[:, None]
+    # 1970-01-01 was a Thursday, so Monday = 0 is (days since epoch + 3) % 7.
+    base_weekday = (base.astype(np.int64) + 3) % 7
+    roll = np.where(weekday >= 0, (weekday - base_weekday) % 7, 0)
+    due = base + (roll + offset).astype("timedelta64[D]")
+
+    if holidays is not None:
+        # One busday_offset call per (roll, weekmask) over all the rules that share it.
+        for mode, weekmask in {(r.roll, r.weekmask) for r in rules if r.roll is not None}:
+            rows = [i for i, r in enumerate(rules) if (r.roll, r.weekmask) == (mode, weekmask)]
+            due[rows] = holidays.roll(due[rows], mode, weekmask)
+
+    columns = {}
+    for rule, values in zip(rules, due):
+        # Deadlines repeat across a cohort: format each distinct date once.
+        codes, dates = pd.factorize(values)
+        fmt = ROSTER_DATE_FORMAT if rule.time is None else f"{ROSTER_DATE_FORMAT} {rule.time}"
+        labels = np.append(np.asarray(pd.DatetimeIndex(dates).strftime(fmt), dtype=object), "")
+        columns[rule.column] = labels[codes]  # codes == -1 (missing) picks the trailing ""
+    return pd.DataFrame(columns, index=start_date.index, columns=[r.column for r in rules])
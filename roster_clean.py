@@ -0,0 +1,66 @@
+"""
+Column cleaners for the roster formatters (Roster_KP, Roster_Updater).
+
+Same results as the per-cell clean_text / safe_date / format_date helpers the roster branches
+used to .apply, but text is stripped for the whole column at once and each distinct date string is
+parsed once: the column is factorized (oasis_normalize.clean_column) and the parse itself is
+memoized, so the same rotation dates are not re-parsed on every rerun either.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+import pandas as pd
+
+from oasis_normalize import clean_column
+from roster_calendar import ROSTER_DATE_FORMAT
+
+
+# ============================================================
+# Scalar rules (one roster cell)
+# ============================================================
+def strip_text(x) -> str:
+    """Missing -> "", anything else str(x).strip(); inner spacing is kept."""
+    if pd.isna(x):
+        return ""
+    return str(x).strip()
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_text(text: str) -> pd.Timestamp:
+    # pd.to_datetime infers the format of each string on its own, as the per-cell helpers did.
+    return pd.to_datetime(text, errors="coerce")
+
+
+def roster_date(x) -> pd.Timestamp:
+    """The cell as a Timestamp; NaT when it is blank or does not parse."""
+    text = strip_text(x)
+    if text == "":
+        return pd.NaT
+    return _parse_date_text(text)
+
+
+def roster_date_text(x) -> str:
+    """The cell as MM-DD-YYYY; "" when it is blank or does not parse."""
+    parsed = roster_date(x)
+    if pd.isna(parsed):
+        return ""
+    return parsed.strftime(ROSTER_DATE_FORMAT)
+
+
+# ============================================================
+# Column kernels
+# ============================================================
+def strip_column(values: pd.Series) -> pd.Series:
+    """Same result as values.apply(strip_text), as whole-column string operations."""
+    return values.fillna("").astype(str).str.strip()
+
+
+def parse_date_column(values: pd.Series) -> pd.Series:
+    """Same result as values.apply(roster_date), parsed once per distinct date string."""
+    return clean_column(strip_column(values), roster_date).infer_objects()
+
+
+def format_date_column(values: pd.Series) -> pd.Series:
+    """Same result as values.apply(roster_date_text), parsed once per distinct date string."""
+    return clean_column(strip_column(values), roster_date_text)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, TypeVar
+
+import pandas as pd
+
+T = TypeVar("T")
+
+# Streamlit reruns the page script on every widget change, but imported modules stay loaded, so a
+# module-level cache survives reruns (and is shared by every session of the server process).
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def content_digest(data: bytes) -> str:
+    """SHA-256 of uploaded bytes: the cache key for anything derived from a file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def estimate_nbytes(value) -> int:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def _copy_result(value):
+    # Callers are free to mutate what they get back; the cached original must stay untouched.
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy_result(v) for v in value)
+    return value
+
+
+class StageCache:
+    """
+    LRU cache of pipeline stage results, bounded by an approximate memory budget.
+
+    Keys are (stage, key) where key holds the content digests of the inputs plus the stage's
+    parameters, so changing a widget only recomputes the stages whose key changed.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str, Hashable], tuple[object, int]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, stage: str, key: Hashable, compute: Callable[[], T], copy: bool = True) -> T:
+        """
+        Return the cached result for (stage, key), computing and storing it on a miss.
+
+        copy=False hands out the cached object itself; only use it for results the caller never mutates.
+        """
+        full_key = (stage, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return _copy_result(entry[0]) if copy else entry[0]
+
+        # Compute outside the lock so one slow stage does not block other sessions.
+        value = compute()
+        size = estimate_nbytes(value)
+
+        with self._lock:
+            self.misses += 1
+            if size <= self.max_bytes:
+                if full_key in self._entries:
+                    self._nbytes -= self._entries.pop(full_key)[1]
+                self._entries[full_key] = (value, size)
+                self._nbytes += size
+                while self._nbytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._nbytes -= evicted
+
+        return _copy_result(value) if copy else value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+STAGE_CACHE = StageCache()
@@ -0,0 +1,101 @@
+"""
+One student identity index shared by every instrument.
+
+Instruments key students differently: OASIS exports carry External ID and Username, REDCap reports
+carry email_2, Canvas quiz exports carry sis_id as an email. StudentIndex maps every alias a roster
+knows for a student (record_id, username, roster email and the derived PSU email) to the roster's
+record_id, so each instrument resolves its student column with one lookup instead of its own
+string handling.
+
+The OASIS preceptor reminder does not use the index: its expected and completed rows both come from
+OASIS exports keyed on record_id / username, and rekeying them through a roster would change which
+submissions match and so change the reminder output.
+"""
+from __future__ import annotations
+
+import pandas as pd
+
+PSU_EMAIL_DOMAIN = "@psu.edu"
+
+# Roster columns holding each alias, raw OASIS export header first, then the formatted roster name.
+ROSTER_RECORD_ID_COLUMNS = ["External ID", "record_id"]
+ROSTER_ALIAS_COLUMNS = [
+    ["Username", "username"],
+    ["Email Address", "email"],
+    ["email_2"],
+]
+
+
+def psu_email(record_id: pd.Series) -> pd.Series:
+    """The PSU address (REDCap email_2) for each record_id."""
+    return record_id + PSU_EMAIL_DOMAIN
+
+
+def strip_psu_email(values: pd.Series) -> pd.Series:
+    """record_id from a PSU address such as Canvas' sis_id; other values are returned unchanged."""
+    return values.str.replace(r"@psu\.edu", "", regex=True)
+
+
+def alias_key(values: pd.Series) -> pd.Series:
+    """Lookup form of an alias: trimmed and lower-cased. Missing values stay missing."""
+    return values.str.strip().str.lower()
+
+
+def _first_column(df: pd.DataFrame, candidates: list[str]) -> str | None:
+    return next((c for c in candidates if c in df.columns), None)
+
+
+class StudentIndex:
+    """
+    alias -> record_id lookup.
+
+    An alias claimed by more than one record_id is left out of the lookup and listed in
+    `ambiguous` (alias_key, record_id) instead, so it can never resolve to the wrong student.
+    """
+
+    def __init__(self, aliases: pd.DataFrame):
+        """aliases: `alias` / `record_id` columns; alias spelling and case do not matter."""
+        df = pd.DataFrame({
+            "alias_key": alias_key(aliases["alias"]).to_numpy(),
+            "record_id": aliases["record_id"].str.strip().to_numpy(),
+        })
+        df = df[df["alias_key"].fillna("").ne("") & df["record_id"].fillna("").ne("")].drop_duplicates()
+        claims = df.groupby("alias_key")["record_id"].transform("nunique")
+        self.ambiguous = df[claims > 1].sort_values(["alias_key", "record_id"]).reset_index(drop=True)
+        self.lookup = df[claims == 1].set_index("alias_key")["record_id"]
+
+    @classmethod
+    def from_roster(cls, roster: pd.DataFrame) -> StudentIndex:
+        """Index a roster, either the raw OASIS export or the formatted Roster_HMC/KP output."""
+        df = roster.rename(columns=lambda c: str(c).strip())
+        record_col = _first_column(df, ROSTER_RECORD_ID_COLUMNS)
+        if record_col is None:
+            raise ValueError("The roster needs an 'External ID' or 'record_id' column.")
+        record_id = df[record_col].fillna("").str.strip()
+
+        alias_parts = [record_id, psu_email(record_id)]
+        for candidates in ROSTER_ALIAS_COLUMNS:
+            col = _first_column(df, candidates)
+            if col is not None:
+                alias_parts.append(df[col])
+        return cls(pd.DataFrame({
+            "alias": pd.concat(alias_parts, ignore_index=True),
+            "record_id": pd.concat([record_id] * len(alias_parts), ignore_index=True),
+        }))
+
+    def __len__(self) -> int:
+        return len(self.lookup)
+
+    def resolve(self, values: pd.Series, fallback: pd.Series | None = None) -> pd.Series:
+        """record_id for each value; values the roster does not know keep `fallback` (default: the value)."""
+        found = pd.Series(self.lookup.reindex(alias_key(values).to_numpy()).to_numpy(), index=values.index)
+        return found.where(found.notna(), values if fallback is None else fallback)
+
+
+def resolve_record_ids(
+    values: pd.Series, index: StudentIndex | None, fallback: pd.Series | None = None
+) -> pd.Series:
+    """StudentIndex.resolve, or just the fallback (default: the values) when no roster was given."""
+    if index is None:
+        return values if fallback is None else fallback
+    return index.resolve(values, fallback)
@@ -0,0 +1,231 @@
+"""
+Local SQLite store of normalized OASIS submissions, kept across sessions and terms.
+
+Each upload is upserted: raw rows whose content hash is already stored are skipped, the rest are
+normalized once (for every evaluation in the export, not just the tracked ones) and written with
+Form Record + evaluation as the unique key. Matching runs as indexed SQL joins, and only the
+matched submissions come back as a DataFrame for build_reminder_report.
+
+Within one upload the first row of a submission wins, like prepare_completed_oasis; a later upload
+of the same submission replaces the stored row. Nothing is ever deleted, so earlier terms stay
+available after OASIS drops them from the export.
+"""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from oasis_normalize import clean_column, clean_eval_name
+from oasis_reminder_core import (
+    SUBMISSION_KEY_COLUMNS,
+    EvalConfig,
+    evaluation_names,
+    oasis_date_formats,
+    prepare_completed_oasis,
+)
+from oasis_reminder_state import FORM_RECORD_COL, HASH_COL, reduce_oasis_rows, row_hashes
+
+DEFAULT_STORE_PATH = Path("oasis_submissions.sqlite")
+
+TEXT_COLUMNS = [
+    "record_id",
+    "student_username_key",
+    "student_name",
+    "student_email",
+    "faculty_name",
+    "faculty_username_key",
+    "faculty_external_id_key",
+    "faculty_email",
+    "evaluation_key",
+]
+DATE_COLUMNS = ["submit_dt", "oasis_start", "oasis_end"]
+# Dates are stored as ISO 8601 text (SQLite's own date format) and read back with format="ISO8601",
+# so they never go through pandas' format inference.
+SQL_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    submission_key TEXT NOT NULL UNIQUE,
+    form_record TEXT,
+    source_hash INTEGER NOT NULL,
+    record_id TEXT NOT NULL,
+    student_username_key TEXT NOT NULL,
+    student_name TEXT NOT NULL,
+    student_email TEXT NOT NULL,
+    faculty_name TEXT NOT NULL,
+    faculty_username_key TEXT NOT NULL,
+    faculty_external_id_key TEXT NOT NULL,
+    faculty_email TEXT NOT NULL,
+    evaluation_key TEXT NOT NULL,
+    submit_dt TEXT,
+    oasis_start TEXT,
+    oasis_end TEXT,
+    loaded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS submissions_by_record
+    ON submissions (evaluation_key, record_id, faculty_external_id_key);
+CREATE INDEX IF NOT EXISTS submissions_by_username
+    ON submissions (evaluation_key, student_username_key);
+CREATE INDEX IF NOT EXISTS submissions_by_source ON submissions (source_hash);
+"""
+
+# Same rules as match_submission_pairs: student by record_id (username when the expected record_id
+# is blank), then evaluator external ID, OR email / username when those fallbacks are allowed.
+EVALUATOR_MATCH = """
+    (e.faculty_external_id_key <> '' AND s.faculty_external_id_key = e.faculty_external_id_key)
+    OR (:email AND e.faculty_email <> '' AND s.faculty_email = e.faculty_email)
+    OR (:username AND e.faculty_username_key <> '' AND s.faculty_username_key = e.faculty_username_key)
+"""
+MATCH_SQL = f"""
+SELECT e.expected_row, s.id FROM expected_keys e
+JOIN submissions s ON s.evaluation_key = e.evaluation_key AND s.record_id = e.record_id
+WHERE e.record_id <> '' AND ({EVALUATOR_MATCH})
+UNION ALL
+SELECT e.expected_row, s.id FROM expected_keys e
+JOIN submissions s ON s.evaluation_key = e.evaluation_key AND s.student_username_key = e.student_username_key
+WHERE e.record_id = '' AND e.student_username_key <> '' AND ({EVALUATOR_MATCH})
+"""
+
+
+def _as_sql_dates(values: pd.Series) -> list[str | None]:
+    text = values.dt.strftime(SQL_DATE_FORMAT)
+    return [None if pd.isna(v) else v for v in text]
+
+
+class SubmissionStore:
+    """SQLite-backed normalized OASIS submissions. Use as a context manager to close the connection."""
+
+    def __init__(self, path: Path | str = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self) -> SubmissionStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+
+    def upsert_export(self, oasis_raw: pd.DataFrame) -> int:
+        """Normalize and upsert the submissions of a raw OASIS export; returns rows written."""
+        rows = reduce_oasis_rows(oasis_raw)
+        if rows.empty:
+            return 0
+        date_formats = oasis_date_formats(rows)
+        hashes = rows[HASH_COL].to_numpy().view(np.int64)
+        known = pd.read_sql_query("SELECT DISTINCT source_hash FROM submissions", self.conn)["source_hash"]
+        rows = rows[~np.isin(hashes, known.to_numpy())]
+        if rows.empty:
+            return 0
+
+        all_keys = set(clean_column(rows["Evaluation"], clean_eval_name))
+        has_form_record = FORM_RECORD_COL in rows.columns
+        keep = [FORM_RECORD_COL, HASH_COL] if has_form_record else [HASH_COL]
+        df = prepare_completed_oasis(rows, all_keys, {}, keep_columns=keep, dedupe=False, date_formats=date_formats)
+        if has_form_record:
+            df = df.drop_duplicates(subset=[FORM_RECORD_COL, "evaluation_key"])
+            form_record = df[FORM_RECORD_COL].astype(str)
+            submission_key = form_record + "|" + df["evaluation_key"]
+        else:
+            df = df.drop_duplicates(subset=SUBMISSION_KEY_COLUMNS)
+            form_record = pd.Series([None] * len(df), index=df.index, dtype=object)
+            submission_key = "h:" + row_hashes(df[SUBMISSION_KEY_COLUMNS]).astype(str)
+        if df.empty:
+            return 0
+
+        columns = ["submission_key", "form_record", "source_hash"] + TEXT_COLUMNS + DATE_COLUMNS + ["loaded_at"]
+        loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        values = zip(
+            submission_key,
+            form_record,
+            df[HASH_COL].to_numpy().view(np.int64).tolist(),
+            *(df[c].astype(str) for c in TEXT_COLUMNS),
+            *(_as_sql_dates(df[c]) for c in DATE_COLUMNS),
+            [loaded_at] * len(df),
+        )
+        updates = ", ".join(f"{c} = excluded.{c}" for c in columns[1:])
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT INTO submissions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT (submission_key) DO UPDATE SET {updates}",
+                values,
+            )
+        return len(df)
+
+    def _frame(self, query: str, params=()) -> pd.DataFrame:
+        df = pd.read_sql_query(query, self.conn, params=params)
+        for c in DATE_COLUMNS:
+            df[c] = pd.to_datetime(df[c], format="ISO8601")
+        return df
+
+    def _with_names(self, df: pd.DataFrame, eval_config_by_key: dict[str, EvalConfig]) -> pd.DataFrame:
+        df["evaluation_type"], df["evaluation_label"] = evaluation_names(df["evaluation_key"], eval_config_by_key)
+        return df[TEXT_COLUMNS + ["evaluation_type", "evaluation_label"] + DATE_COLUMNS]
+
+    def load_completed(
+        self, selected_eval_keys: set[str], eval_config_by_key: dict[str, EvalConfig]
+    ) -> pd.DataFrame:
+        """Stored submissions for the selected evaluations, in prepare_completed_oasis' layout."""
+        keys = sorted(selected_eval_keys)
+        df = self._frame(
+            f"SELECT * FROM submissions WHERE evaluation_key IN ({', '.join('?' * len(keys))}) ORDER BY id",
+            keys,
+        )
+        return self._with_names(df, eval_config_by_key)
+
+    def match(
+        self,
+        expected: pd.DataFrame,
+        allow_email_fallback: bool,
+        allow_username_fallback: bool,
+        eval_config_by_key: dict[str, EvalConfig],
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Match expected rows against the store.
+
+        Returns (matched submissions, pairs) for build_reminder_report(..., pairs=pairs): pairs has
+        expected_row / completed_row positions into `expected` and the matched submissions.
+        """
+        key_cols = [
+            "evaluation_key",
+            "record_id",
+            "student_username_key",
+            "faculty_external_id_key",
+            "faculty_email",
+            "faculty_username_key",
+        ]
+        e = expected.reset_index(drop=True)
+        with self.conn:
+            self.conn.execute("DROP TABLE IF EXISTS temp.expected_keys")
+            self.conn.execute(f"CREATE TEMP TABLE expected_keys (expected_row INTEGER, {', '.join(key_cols)})")
+            self.conn.executemany(
+                f"INSERT INTO expected_keys VALUES ({', '.join('?' * (len(key_cols) + 1))})",
+                zip(range(len(e)), *(e[c].astype(str) for c in key_cols)),
+            )
+        pairs = pd.read_sql_query(
+            MATCH_SQL,
+            self.conn,
+            params={"email": allow_email_fallback, "username": allow_username_fallback},
+        ).rename(columns={"id": "submission_id"})
+
+        ids = sorted(pairs["submission_id"].unique().tolist())
+        self.conn.execute("DROP TABLE IF EXISTS temp.matched_ids")
+        self.conn.execute("CREATE TEMP TABLE matched_ids (id INTEGER PRIMARY KEY)")
+        self.conn.executemany("INSERT INTO matched_ids VALUES (?)", ((i,) for i in ids))
+        matched = self._frame("SELECT s.* FROM submissions s JOIN matched_ids m ON s.id = m.id ORDER BY s.id")
+
+        position = pd.Series(range(len(ids)), index=ids)
+        pairs["completed_row"] = position.reindex(pairs["submission_id"]).to_numpy()
+        pairs = pairs[["expected_row", "completed_row"]].sort_values(["expected_row", "completed_row"])
+        return self._with_names(matched, eval_config_by_key), pairs.reset_index(drop=True)
@@ -0,0 +1,120 @@
+"""
+Every reminder path gives the same result as the plain one on the seeded synthetic exports: the
+keyed-join matcher as the per-row row_matches scan, and the parallel, incremental and store runs
+as prepare_* + build_reminder_report on the CSV exports.
+"""
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_dataset
+from oasis_reminder_core import (
+    DATE_MODE_ALL,
+    EVAL_CONFIGS,
+    build_eval_selection,
+    build_reminder_report,
+    build_reminder_report_parallel,
+    match_submission_pairs,
+    prepare_completed_oasis,
+    prepare_expected_associations,
+    row_matches,
+)
+from oasis_reminder_state import run_incremental
+from submission_store import SubmissionStore
+
+AS_OF = pd.Timestamp("2025-10-01")
+SELECTED_EVAL_KEYS, EVAL_CONFIG_BY_KEY = build_eval_selection([c.label for c in EVAL_CONFIGS])
+
+
+@pytest.fixture(scope="module")
+def dataset() -> tuple[pd.DataFrame, pd.DataFrame]:
+    assoc, oasis = make_dataset(3000, seed=7)
+    return assoc.astype(str), oasis.astype(str)
+
+
+def prepare_expected(assoc: pd.DataFrame) -> pd.DataFrame:
+    return prepare_expected_associations(
+        assoc, SELECTED_EVAL_KEYS, EVAL_CONFIG_BY_KEY, AS_OF, DATE_MODE_ALL, include_all_students=False
+    )
+
+
+@pytest.fixture(scope="module")
+def prepared(dataset) -> tuple[pd.DataFrame, pd.DataFrame]:
+    assoc, oasis = dataset
+    return prepare_expected(assoc), prepare_completed_oasis(oasis, SELECTED_EVAL_KEYS, EVAL_CONFIG_BY_KEY)
+
+
+def full_rebuild(assoc: pd.DataFrame, oasis: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    completed = prepare_completed_oasis(oasis, SELECTED_EVAL_KEYS, EVAL_CONFIG_BY_KEY)
+    return build_reminder_report(prepare_expected(assoc), completed, True, True, EVAL_CONFIG_BY_KEY)
+
+
+def incremental(assoc: pd.DataFrame, oasis: pd.DataFrame, previous=None):
+    return run_incremental(
+        assoc, oasis, previous, SELECTED_EVAL_KEYS, EVAL_CONFIG_BY_KEY, AS_OF, DATE_MODE_ALL, False, True, True
+    )
+
+
+def assert_same_frames(got: pd.DataFrame, expected: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), expected.reset_index(drop=True), check_dtype=False)
+
+
+@pytest.mark.parametrize("allow_email_fallback", [True, False])
+@pytest.mark.parametrize("allow_username_fallback", [True, False])
+def test_keyed_join_matches_row_scan(prepared, allow_email_fallback, allow_username_fallback):
+    expected, completed = prepared
+    completed = completed.reset_index(drop=True)
+    scanned = [
+        (i, j)
+        for i, (_, row) in enumerate(expected.iterrows())
+        for j in row_matches(row, completed, allow_email_fallback, allow_username_fallback).index
+    ]
+    pairs = match_submission_pairs(expected, completed, allow_email_fallback, allow_username_fallback)
+
+    assert len(scanned) > 0
+    assert list(pairs.itertuples(index=False, name=None)) == sorted(scanned)
+
+
+def test_parallel_matches_serial(prepared):
+    expected, completed = prepared
+    serial = build_reminder_report(expected, completed, True, True, EVAL_CONFIG_BY_KEY)
+    parallel = build_reminder_report_parallel(expected, completed, True, True, EVAL_CONFIG_BY_KEY, workers=2)
+    assert_same_frames(parallel[0], serial[0])
+    assert_same_frames(parallel[1], serial[1])
+
+
+@pytest.mark.parametrize("new_submit_format", ["%m/%d/%Y %H:%M", "%Y-%m-%d %H:%M:%S"])
+def test_incremental_matches_full_rebuild(dataset, new_submit_format):
+    assoc, oasis = dataset
+    forms = oasis["Form Record"].unique()
+    new = oasis["Form Record"].isin(forms[-60:])
+    # The new submissions may come in another date format than the rest of the export; they must
+    # be parsed as a full rebuild parses them, not by what their own first row looks like.
+    submit = pd.to_datetime(oasis.loc[new, "Submit Date"], format="%m/%d/%Y %H:%M")
+    oasis = oasis.copy()
+    oasis.loc[new, "Submit Date"] = submit.dt.strftime(new_submit_format)
+
+    _, _, _, state, _ = incremental(assoc.iloc[:-20], oasis[~new])
+    reminders, debug, _, _, stats = incremental(assoc, oasis, state)
+
+    assert not stats.full_rebuild and stats.new_oasis_rows > 0
+    full_reminders, full_debug = full_rebuild(assoc, oasis)
+    assert_same_frames(reminders, full_reminders)
+    assert_same_frames(debug, full_debug)
+
+
+def test_store_matches_csv(dataset, tmp_path):
+    assoc, oasis = dataset
+    expected = prepare_expected(assoc)
+    forms = oasis["Form Record"].unique()
+    with SubmissionStore(tmp_path / "submissions.sqlite") as store:
+        # A first upload without the latest forms, then the full export on top of it.
+        store.upsert_export(oasis[~oasis["Form Record"].isin(forms[-60:])])
+        store.upsert_export(oasis)
+        matched, pairs = store.match(expected, True, True, EVAL_CONFIG_BY_KEY)
+
+    reminders, debug = build_reminder_report(expected, matched, True, True, EVAL_CONFIG_BY_KEY, pairs=pairs)
+    csv_reminders, csv_debug = full_rebuild(assoc, oasis)
+    assert_same_frames(reminders, csv_reminders)
+    assert_same_frames(debug, csv_debug)